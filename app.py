@@ -29,6 +29,18 @@ app.config.from_object(Config)
 # Setup CORS
 CORS(app, origins=['*'])
 
+# orjson / MessagePack response encoding (before instrumentation wraps it)
+from serialization import install as install_serialization
+install_serialization(app)
+
+# Stage timing (Server-Timing) headers and opt-in request profiling
+from instrumentation import install as install_instrumentation
+install_instrumentation(app)
+
+# Prometheus metrics on /metrics
+from metrics import install as install_metrics
+install_metrics(app)
+
 # Setup logging
 logging.basicConfig(level=getattr(logging, app.config['LOG_LEVEL']))
 app.logger.setLevel(getattr(logging, app.config['LOG_LEVEL']))
@@ -43,7 +55,12 @@ try:
         get_cumulative_performance as backend_cumulative_performance,
         risk_analysis as backend_risk_analysis,
         goal_planning as backend_goal_planning,
-        step_up_sip as backend_step_up_sip
+        step_up_sip as backend_step_up_sip,
+        get_benchmarks as backend_get_benchmarks,
+        rolling_metrics as backend_rolling_metrics,
+        goal_planning_batch as backend_goal_planning_batch,
+        retirement_swp as backend_retirement_swp,
+        strategy_compare as backend_strategy_compare
     )
     app.logger.info("Successfully imported backend functions")
 except ImportError as e:
@@ -65,6 +82,16 @@ except ImportError as e:
         return jsonify({'error': 'Backend not available'}), 503
     def backend_step_up_sip():
         return jsonify({'error': 'Backend not available'}), 503
+    def backend_get_benchmarks():
+        return jsonify({'error': 'Backend not available'}), 503
+    def backend_rolling_metrics():
+        return jsonify({'error': 'Backend not available'}), 503
+    def backend_goal_planning_batch():
+        return jsonify({'error': 'Backend not available'}), 503
+    def backend_retirement_swp():
+        return jsonify({'error': 'Backend not available'}), 503
+    def backend_strategy_compare():
+        return jsonify({'error': 'Backend not available'}), 503
 
 # Health check endpoint
 @app.route('/health')
@@ -140,11 +167,36 @@ def goal_planning():
     """Goal-based investment planning"""
     return backend_goal_planning()
 
+@app.route('/api/goal-planning/batch', methods=['POST'])
+def goal_planning_batch():
+    """Batch goal planning for many scenarios"""
+    return backend_goal_planning_batch()
+
+@app.route('/api/retirement/swp', methods=['POST'])
+def retirement_swp():
+    """Retirement withdrawal (SWP) simulation"""
+    return backend_retirement_swp()
+
+@app.route('/api/strategy-compare', methods=['POST'])
+def strategy_compare():
+    """Lumpsum, SIP, STP and value-averaging comparison"""
+    return backend_strategy_compare()
+
 @app.route('/api/step-up-sip', methods=['POST'])
 def step_up_sip():
     """Step-up SIP calculation"""
     return backend_step_up_sip()
 
+@app.route('/api/benchmarks', methods=['GET'])
+def get_benchmarks():
+    """List available benchmarks"""
+    return backend_get_benchmarks()
+
+@app.route('/api/rolling-metrics', methods=['POST'])
+def rolling_metrics():
+    """Rolling beta, alpha and tracking error against a benchmark"""
+    return backend_rolling_metrics()
+
 # Error handlers
 @app.errorhandler(404)
 def not_found(error):
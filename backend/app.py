@@ -1,155 +1,63 @@
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, make_response
 from flask_cors import CORS
-import requests
-import pandas as pd
+from werkzeug.http import parse_etags, quote_etag
 from datetime import datetime, timedelta
 import json
-from scipy.optimize import newton
 import traceback
 import time
-import random
 import threading
 from concurrent.futures import ThreadPoolExecutor, as_completed
 import functools
 import hashlib
 import numpy as np
 import math
+import os
 from fund_data_sources import create_fund_data_provider
+from fund_master import COMPREHENSIVE_FUND_LIST
+from http_transport import http_get
+from singleflight import SingleFlight
+from revalidate import REVALIDATOR, NAV_MAX_STALE, SEARCH_MAX_STALE
+from async_fetch import fetch_nav_histories, DEFAULT_BASE_URL as NAV_API_BASE_URL
+from benchmarks import resolve_benchmark, list_benchmarks
+from nav_store import NAVStore, NAVSeries
+from response_cache import create_response_cache, request_key
+from warmup import WARMUP_ENABLED, record_usage, hot_schemes, warm_caches
+from serialization import install as install_serialization, negotiate, decode, JSON_MIMETYPE
+from instrumentation import install as install_instrumentation, timed, propagate_context
+from metrics import install as install_metrics, cache_event, observe_xirr, track_queue
+from utils.synthetic_market import synthetic_nav_frame
+from utils.sip_engine import (sip_schedule, step_up_amounts, run_sip, valuation_nav, SimulationResult,
+                              combine_by_date, PORTFOLIO_ROWS)
+from utils.strategies import parse_plans, compare_strategies
+from utils.rolling_metrics import monthly_nav_panel, periodic_returns, rolling_regression
+from utils.goal_solver import solve_step_up_sip, total_step_up_investment, solve_goals
+from utils.withdrawal import (
+    monte_carlo_return_paths, historical_return_paths, required_corpus,
+    simulate_withdrawals, summarize_withdrawals, safe_withdrawal_rate
+)
+from utils.lazy_imports import lazy_import
+
+# Loaded on first use: health, search and goal planning never need them
+pd = lazy_import('pandas')
+optimize = lazy_import('scipy.optimize')
 
 app = Flask(__name__)
 CORS(app)
+install_serialization(app)  # Before instrumentation, which times its encoding
+install_instrumentation(app)
+install_metrics(app)
+
+# Stage timer around the SIP loop (Server-Timing 'sip')
+run_sip = timed('sip')(run_sip)
 
 # Initialize the fund data provider
 FUND_DATA_PROVIDER = create_fund_data_provider("hybrid")
 
-# Comprehensive static fund list - major Indian mutual funds
-COMPREHENSIVE_FUND_LIST = [
-    # Large Cap Funds
-    {"scheme_code": "122639", "fund_name": "Parag Parikh Flexi Cap Fund - Direct Plan - Growth"},
-    {"scheme_code": "120503", "fund_name": "SBI Bluechip Fund - Direct Plan - Growth"},
-    {"scheme_code": "120465", "fund_name": "HDFC Top 100 Fund - Direct Plan - Growth"},
-    {"scheme_code": "118825", "fund_name": "ICICI Prudential Bluechip Fund - Direct Plan - Growth"},
-    {"scheme_code": "101206", "fund_name": "Reliance Large Cap Fund - Direct Plan - Growth"},
-    {"scheme_code": "120716", "fund_name": "Aditya Birla Sun Life Frontline Equity Fund - Direct Plan - Growth"},
-    {"scheme_code": "118989", "fund_name": "Axis Bluechip Fund - Direct Plan - Growth"},
-    {"scheme_code": "125494", "fund_name": "Canara Robeco Bluechip Equity Fund - Direct Plan - Growth"},
-    {"scheme_code": "147654", "fund_name": "Kotak Bluechip Fund - Direct Plan - Growth"},
-    {"scheme_code": "112090", "fund_name": "DSP Top 100 Equity Fund - Direct Plan - Growth"},
-    
-    # Mid Cap Funds
-    {"scheme_code": "127042", "fund_name": "Motilal Oswal Midcap Fund - Direct Plan - Growth"},
-    {"scheme_code": "119597", "fund_name": "HDFC Mid-Cap Opportunities Fund - Direct Plan - Growth"},
-    {"scheme_code": "118825", "fund_name": "ICICI Prudential MidCap Fund - Direct Plan - Growth"},
-    {"scheme_code": "120444", "fund_name": "SBI Magnum Midcap Fund - Direct Plan - Growth"},
-    {"scheme_code": "143048", "fund_name": "Axis Midcap Fund - Direct Plan - Growth"},
-    {"scheme_code": "112090", "fund_name": "DSP Midcap Fund - Direct Plan - Growth"},
-    {"scheme_code": "101206", "fund_name": "Reliance Mid Cap Fund - Direct Plan - Growth"},
-    {"scheme_code": "118989", "fund_name": "Kotak Emerging Equity Fund - Direct Plan - Growth"},
-    {"scheme_code": "125494", "fund_name": "L&T Midcap Fund - Direct Plan - Growth"},
-    
-    # Small Cap Funds
-    {"scheme_code": "113177", "fund_name": "Nippon India Small Cap Fund - Direct Plan - Growth"},
-    {"scheme_code": "119551", "fund_name": "HDFC Small Cap Fund - Direct Plan - Growth"},
-    {"scheme_code": "120305", "fund_name": "SBI Small Cap Fund - Direct Plan - Growth"},
-    {"scheme_code": "118989", "fund_name": "Axis Small Cap Fund - Direct Plan - Growth"},
-    {"scheme_code": "101206", "fund_name": "Reliance Small Cap Fund - Direct Plan - Growth"},
-    {"scheme_code": "147654", "fund_name": "Kotak Small Cap Fund - Direct Plan - Growth"},
-    {"scheme_code": "112090", "fund_name": "DSP Small Cap Fund - Direct Plan - Growth"},
-    {"scheme_code": "143048", "fund_name": "ICICI Prudential Smallcap Fund - Direct Plan - Growth"},
-    
-    # Index Funds
-    {"scheme_code": "147625", "fund_name": "UTI Nifty 50 Index Fund - Direct Plan - Growth"},
-    {"scheme_code": "147614", "fund_name": "HDFC Index Fund - Sensex Plan - Direct Plan - Growth"},
-    {"scheme_code": "120503", "fund_name": "SBI Nifty Index Fund - Direct Plan - Growth"},
-    {"scheme_code": "118825", "fund_name": "ICICI Prudential Nifty Index Fund - Direct Plan - Growth"},
-    {"scheme_code": "112090", "fund_name": "DSP Nifty 50 Index Fund - Direct Plan - Growth"},
-    {"scheme_code": "147654", "fund_name": "Kotak Nifty Index Fund - Direct Plan - Growth"},
-    {"scheme_code": "143048", "fund_name": "Axis Nifty 100 Index Fund - Direct Plan - Growth"},
-    {"scheme_code": "101206", "fund_name": "Reliance Index Fund - Sensex Plan - Direct Plan - Growth"},
-    {"scheme_code": "125494", "fund_name": "L&T Nifty Index Fund - Direct Plan - Growth"},
-    
-    # Multi Cap / Flexi Cap Funds
-    {"scheme_code": "122639", "fund_name": "Parag Parikh Flexi Cap Fund - Direct Plan - Growth"},
-    {"scheme_code": "118825", "fund_name": "ICICI Prudential Multicap Fund - Direct Plan - Growth"},
-    {"scheme_code": "120503", "fund_name": "SBI Flexicap Fund - Direct Plan - Growth"},
-    {"scheme_code": "119597", "fund_name": "HDFC Flexicap Fund - Direct Plan - Growth"},
-    {"scheme_code": "143048", "fund_name": "Axis Flexicap Fund - Direct Plan - Growth"},
-    {"scheme_code": "101206", "fund_name": "Reliance Multi Cap Fund - Direct Plan - Growth"},
-    {"scheme_code": "147654", "fund_name": "Kotak Flexicap Fund - Direct Plan - Growth"},
-    {"scheme_code": "112090", "fund_name": "DSP Flexicap Fund - Direct Plan - Growth"},
-    
-    # Sectoral / Thematic Funds
-    {"scheme_code": "118825", "fund_name": "ICICI Prudential Technology Fund - Direct Plan - Growth"},
-    {"scheme_code": "120503", "fund_name": "SBI IT Fund - Direct Plan - Growth"},
-    {"scheme_code": "119597", "fund_name": "HDFC Banking and Financial Services Fund - Direct Plan - Growth"},
-    {"scheme_code": "143048", "fund_name": "Axis Banking & Financial Services Fund - Direct Plan - Growth"},
-    {"scheme_code": "101206", "fund_name": "Reliance Pharma Fund - Direct Plan - Growth"},
-    {"scheme_code": "147654", "fund_name": "Kotak Infrastructure & Economic Reform Fund - Direct Plan - Growth"},
-    {"scheme_code": "112090", "fund_name": "DSP Healthcare Fund - Direct Plan - Growth"},
-    {"scheme_code": "125494", "fund_name": "L&T Infrastructure Fund - Direct Plan - Growth"},
-    
-    # ELSS Funds
-    {"scheme_code": "120503", "fund_name": "SBI Long Term Equity Fund - Direct Plan - Growth"},
-    {"scheme_code": "118825", "fund_name": "ICICI Prudential Long Term Equity Fund - Direct Plan - Growth"},
-    {"scheme_code": "119597", "fund_name": "HDFC TaxSaver - Direct Plan - Growth"},
-    {"scheme_code": "143048", "fund_name": "Axis Long Term Equity Fund - Direct Plan - Growth"},
-    {"scheme_code": "101206", "fund_name": "Reliance Tax Saver ELSS Fund - Direct Plan - Growth"},
-    {"scheme_code": "147654", "fund_name": "Kotak Tax Saver Fund - Direct Plan - Growth"},
-    {"scheme_code": "112090", "fund_name": "DSP Tax Saver Fund - Direct Plan - Growth"},
-    
-    # Debt Funds
-    {"scheme_code": "120503", "fund_name": "SBI Corporate Bond Fund - Direct Plan - Growth"},
-    {"scheme_code": "118825", "fund_name": "ICICI Prudential Corporate Bond Fund - Direct Plan - Growth"},
-    {"scheme_code": "119597", "fund_name": "HDFC Corporate Bond Fund - Direct Plan - Growth"},
-    {"scheme_code": "143048", "fund_name": "Axis Corporate Debt Fund - Direct Plan - Growth"},
-    {"scheme_code": "101206", "fund_name": "Reliance Corporate Bond Fund - Direct Plan - Growth"},
-    {"scheme_code": "147654", "fund_name": "Kotak Corporate Bond Fund - Direct Plan - Growth"},
-    {"scheme_code": "112090", "fund_name": "DSP Corporate Bond Fund - Direct Plan - Growth"},
-    
-    # Hybrid Funds
-    {"scheme_code": "120503", "fund_name": "SBI Equity Hybrid Fund - Direct Plan - Growth"},
-    {"scheme_code": "118825", "fund_name": "ICICI Prudential Equity & Debt Fund - Direct Plan - Growth"},
-    {"scheme_code": "119597", "fund_name": "HDFC Hybrid Equity Fund - Direct Plan - Growth"},
-    {"scheme_code": "143048", "fund_name": "Axis Hybrid Fund - Direct Plan - Growth"},
-    {"scheme_code": "101206", "fund_name": "Reliance Hybrid Fund - Direct Plan - Growth"},
-    {"scheme_code": "147654", "fund_name": "Kotak Equity Hybrid Fund - Direct Plan - Growth"},
-    
-    # International Funds
-    {"scheme_code": "122639", "fund_name": "Parag Parikh Flexi Cap Fund - Direct Plan - Growth"},
-    {"scheme_code": "127042", "fund_name": "Motilal Oswal NASDAQ 100 Fund - Direct Plan - Growth"},
-    {"scheme_code": "143048", "fund_name": "Axis Global Innovation Fund - Direct Plan - Growth"},
-    {"scheme_code": "118825", "fund_name": "ICICI Prudential US Bluechip Equity Fund - Direct Plan - Growth"},
-    {"scheme_code": "119597", "fund_name": "HDFC International Advantage Fund - Direct Plan - Growth"},
-    
-    # Additional Popular Funds
-    {"scheme_code": "125494", "fund_name": "Canara Robeco Equity Diversified Fund - Direct Plan - Growth"},
-    {"scheme_code": "118989", "fund_name": "UTI Mastershare Fund - Direct Plan - Growth"},
-    {"scheme_code": "147625", "fund_name": "Tata Large Cap Fund - Direct Plan - Growth"},
-    {"scheme_code": "113177", "fund_name": "Franklin India Bluechip Fund - Direct Plan - Growth"},
-    {"scheme_code": "120444", "fund_name": "Invesco India Growth Opportunities Fund - Direct Plan - Growth"},
-    {"scheme_code": "112090", "fund_name": "Mirae Asset Large Cap Fund - Direct Plan - Growth"},
-    {"scheme_code": "143048", "fund_name": "Sundaram Large Cap Fund - Direct Plan - Growth"},
-    {"scheme_code": "101206", "fund_name": "Nippon India Large Cap Fund - Direct Plan - Growth"},
-    {"scheme_code": "147654", "fund_name": "Aditya Birla Sun Life Equity Fund - Direct Plan - Growth"},
-    {"scheme_code": "125494", "fund_name": "UTI Equity Fund - Direct Plan - Growth"},
-    
-    # More Scheme Codes for Popular Funds
-    {"scheme_code": "120305", "fund_name": "SBI Contra Fund - Direct Plan - Growth"},
-    {"scheme_code": "119550", "fund_name": "HDFC Equity Fund - Direct Plan - Growth"},
-    {"scheme_code": "118989", "fund_name": "Axis Long Term Equity Fund - Direct Plan - Growth"},
-    {"scheme_code": "147625", "fund_name": "UTI Value Opportunities Fund - Direct Plan - Growth"},
-    {"scheme_code": "113177", "fund_name": "Franklin India Prima Fund - Direct Plan - Growth"},
-    {"scheme_code": "120444", "fund_name": "Invesco India Contra Fund - Direct Plan - Growth"},
-    {"scheme_code": "112090", "fund_name": "Mirae Asset Emerging Bluechip Fund - Direct Plan - Growth"},
-    {"scheme_code": "143048", "fund_name": "Sundaram Select Midcap Fund - Direct Plan - Growth"},
-    {"scheme_code": "101206", "fund_name": "Nippon India Value Fund - Direct Plan - Growth"},
-    {"scheme_code": "147654", "fund_name": "Aditya Birla Sun Life Pure Value Fund - Direct Plan - Growth"}
-]
-
 # Global cache for search results
 SEARCH_CACHE = {}
 CACHE_TIMESTAMP = 0
 CACHE_DURATION = 86400  # 24 hours in seconds
+FUND_LIST_FLIGHT = SingleFlight(namespace='fund_list')  # One cold rebuild at a time
 
 # Add caching mechanism
 NAV_CACHE = {}
@@ -176,247 +84,272 @@ def get_cached_nav_data(scheme_code, start_date, end_date):
             cached_item = NAV_CACHE[cache_key]
             # Cache expires after 1 hour
             if time.time() - cached_item['timestamp'] < 3600:
+                cache_event('synthetic_nav', 'hit')
                 return cached_item['data']
+            del NAV_CACHE[cache_key]
+            cache_event('synthetic_nav', 'eviction')
+        cache_event('synthetic_nav', 'miss')
         return None
 
-def generate_optimized_mock_nav_data(scheme_code, start_date, end_date):
-    """Generate optimized mock NAV data for specific date range"""
-    try:
-        # Set random seed based on scheme_code for consistent data
-        random.seed(int(hashlib.md5(scheme_code.encode()).hexdigest(), 16) % 10000)
-        
-        # Generate monthly data points instead of daily for better performance
-        dates = pd.date_range(start=start_date, end=end_date, freq='MS')
-        navs = []
-        
-        base_nav = 50.0 + random.uniform(-10, 20)  # Starting NAV with variation
-        
-        for i, date in enumerate(dates):
-            # Add realistic monthly volatility
-            monthly_change = random.uniform(-0.15, 0.20)  # -15% to +20% monthly
-            base_nav = base_nav * (1 + monthly_change)
-            
-            # Ensure NAV doesn't go too low
-            if base_nav < 10:
-                base_nav = 10 + random.uniform(0, 5)
-            
-            navs.append(round(base_nav, 4))
-        
-        # Fill in daily data only for the last month to maintain some granularity
-        if len(dates) > 0:
-            last_month_start = dates[-1]
-            last_month_end = min(end_date, last_month_start + pd.DateOffset(months=1))
-            daily_dates = pd.date_range(start=last_month_start, end=last_month_end, freq='D')
-            
-            # Generate daily data for last month
-            last_nav = navs[-1] if navs else 50.0
-            daily_navs = []
-            
-            for daily_date in daily_dates:
-                daily_change = random.uniform(-0.05, 0.05)  # -5% to +5% daily
-                last_nav = last_nav * (1 + daily_change)
-                daily_navs.append(round(last_nav, 4))
-            
-            # Combine monthly and daily data
-            all_dates = list(dates[:-1]) + list(daily_dates)
-            all_navs = navs[:-1] + daily_navs
+# One in-flight NAV fetch per scheme; set NAV_SINGLEFLIGHT_DIR to coalesce across workers too
+NAV_FLIGHT = SingleFlight(
+    namespace='nav',
+    spill_dir=os.getenv('NAV_SINGLEFLIGHT_DIR') or None,
+    spill_ttl=int(os.getenv('NAV_SINGLEFLIGHT_TTL', 30))
+)
+
+def load_nav_history(scheme_code):
+    """Full NAV history from real data sources only (no mock fallback)"""
+    return NAV_FLIGHT.do(scheme_code, FUND_DATA_PROVIDER.get_nav_data, scheme_code, fallback=False)
+
+# Full NAV histories, shared by every request and date range
+NAV_STORE = NAVStore(load_nav_history, ttl=3600, max_stale=NAV_MAX_STALE)
+
+def missing_nav_histories(scheme_codes):
+    """Schemes neither in the NAV store nor recently found missing upstream"""
+    return [
+        code for code in dict.fromkeys(str(code) for code in scheme_codes)
+        if NAV_STORE.servable(code) is None and not NAV_STORE.recently_missing(code)
+    ]
+
+def store_nav_histories(histories):
+    """Put fetched histories into the NAV store, remembering schemes without enough data"""
+    for code, df in histories.items():
+        if df is None:
+            continue  # Not fetched; the NAV store loads it on demand
+        if len(df) > NAV_STORE.min_records:
+            NAV_STORE.put(code, df)
         else:
-            all_dates = dates
-            all_navs = navs
-        
-        df = pd.DataFrame({
-            'date': all_dates,
-            'nav': all_navs
-        })
-        df['date'] = pd.to_datetime(df['date'])
-        
-        return df.sort_values('date')
-        
+            NAV_STORE.mark_missing(code)
+
+@timed('fetch')
+def prefetch_nav_histories(scheme_codes, base_url=None):
+    """Load every scheme a request needs into the NAV store in one concurrent fetch"""
+    missing = missing_nav_histories(scheme_codes)
+    if not missing:
+        return
+    base_url = base_url or NAV_API_BASE_URL
+
+    try:
+        histories = NAV_FLIGHT.do_many(missing, lambda codes: fetch_nav_histories(codes, base_url))
     except Exception as e:
-        print(f"Error generating optimized mock data: {e}")
-        # Minimal fallback
-        dates = [start_date, end_date]
-        navs = [45.0, 55.0]
-        
-        df = pd.DataFrame({
-            'date': dates,
-            'nav': navs
-        })
-        df['date'] = pd.to_datetime(df['date'])
-        return df
+        print(f"Concurrent NAV fetch failed: {e}")
+        return
+
+    store_nav_histories(histories)
+    print(f"Prefetched NAV histories for {len(missing)} schemes")
+
+@timed('nav')
+def load_nav_series(scheme_code, start_date=None, end_date=None):
+    """NAV series for a date range - real history from the NAV store, else cached mock data"""
+    try:
+        series = NAV_STORE.get(scheme_code)
+        if series is not None:
+            window = series.window(start_date, end_date)
+            if len(window) > 10:  # Ensure we have sufficient data
+                return window
+            print(f"Insufficient real data ({len(window)} records) for {scheme_code} in range")
+    except Exception as e:
+        print(f"Error loading NAV history for {scheme_code}: {e}")
+
+    # Fallback to synthetic market data
+    if start_date is None:
+        start_date = datetime.now() - timedelta(days=5*365)  # 5 years default
+    if end_date is None:
+        end_date = datetime.now()
+
+    cached_series = get_cached_nav_data(scheme_code, start_date, end_date)
+    if cached_series is not None:
+        return cached_series
+
+    mock_series = NAVSeries.from_frame(
+        scheme_code, synthetic_nav_frame(scheme_code, start_date, end_date)
+    )
+    cache_nav_data(scheme_code, start_date, end_date, mock_series)
+
+    print(f"Generated {len(mock_series)} synthetic NAV records for {scheme_code}")
+    return mock_series
 
 # Optimized NAV fetcher with caching and better error handling
 def fetch_nav_optimized(scheme_code, start_date=None, end_date=None):
-    """Fetch NAV data using the new fund data provider with fallback to mock data"""
+    """Fetch NAV data as a DataFrame using the NAV store with fallback to mock data"""
+    return load_nav_series(scheme_code, start_date, end_date).to_frame()
+
+# Whole responses of the simulation endpoints (off unless RESPONSE_CACHE_BACKEND is set)
+RESPONSE_CACHE = create_response_cache()
+
+def nav_version(series):
+    """Version of a NAV history: its last date, length and last NAV"""
+    return f"{series.dates[-1]}:{len(series)}:{series.navs[-1]!r}"
+
+def nav_versions(scheme_codes):
+    """Version of each scheme's NAV history; None for synthetic data"""
+    versions = {}
+    for code in dict.fromkeys(str(code) for code in scheme_codes):
+        series = NAV_STORE.servable(code)
+        # Synthetic NAVs are deterministic per scheme and range
+        versions[code] = nav_version(series) if series is not None and len(series) else None
+    return versions
+
+def response_cache_key(endpoint, params, scheme_codes, mimetype=JSON_MIMETYPE):
+    """Response cache key for a request (and response format), once its schemes are in the NAV store"""
+    return request_key(f"{endpoint}:{mimetype}", params, nav_versions(scheme_codes))
+
+def fund_cache_params(data, benchmark=False, **extra):
+    """(params, scheme_codes): the fields of a funds + date range body that shape the response"""
+    funds = [
+        {'fund_name': fund['fund_name'], 'scheme_code': fund['scheme_code'], 'sip_amount': fund['sip_amount']}
+        for fund in data['funds']
+    ]
+    params = dict(extra, funds=funds, start_date=data['start_date'], end_date=data['end_date'])
+    scheme_codes = [fund['scheme_code'] for fund in funds]
+    if benchmark:
+        params['benchmark'] = resolve_benchmark(data.get('benchmark'))
+        scheme_codes.append(params['benchmark']['scheme_code'])
+    return params, scheme_codes
+
+def cached_response(endpoint, canonical=fund_cache_params):
+    """Serve a POST endpoint from RESPONSE_CACHE
+
+    canonical(body) returns (params, scheme_codes); the key adds the NAV
+    version of every scheme, so a new NAV is a new key. Only successful
+    responses are stored.
+    """
+    def decorator(f):
+        @functools.wraps(f)
+        def wrapper(*args, **kwargs):
+            if not RESPONSE_CACHE.enabled:
+                return f(*args, **kwargs)
+            try:
+                params, scheme_codes = canonical(request.get_json())
+            except Exception:
+                return f(*args, **kwargs)  # Malformed: let the endpoint report it
+
+            prefetch_nav_histories(scheme_codes)
+            mimetype = negotiate(request.accept_mimetypes)
+            key = response_cache_key(endpoint, params, scheme_codes, mimetype)
+            body = RESPONSE_CACHE.get(key)
+            if body is not None:
+                cache_event('response', 'hit')
+                record_usage(scheme_codes)  # Hits still count towards the warm-up hot list
+                response = app.response_class(body, mimetype=mimetype, headers={'X-Cache': 'HIT'})
+                response.vary.add('Accept')
+                return response
+
+            cache_event('response', 'miss')
+            response = make_response(f(*args, **kwargs))
+            if response.status_code == 200 and response.mimetype == mimetype:
+                if decode(response.get_data(), mimetype).get('success'):
+                    RESPONSE_CACHE.set(key, response.get_data())
+            response.headers['X-Cache'] = 'MISS'
+            return response
+        return wrapper
+    return decorator
+
+# Conditional GETs: ETags from the NAV store and scheme list versions, so browsers and nginx revalidate cheaply
+SEARCH_CACHE_CONTROL = 'public, max-age=300, stale-while-revalidate=3600'
+FUND_INFO_CACHE_CONTROL = 'public, max-age=300, stale-while-revalidate=600'
+FUND_MASTER_VERSION = hashlib.sha1(json.dumps(COMPREHENSIVE_FUND_LIST, sort_keys=True).encode('utf-8')).hexdigest()
+
+def make_etag(*parts):
+    """Unquoted ETag of JSON-serialisable parts"""
+    return hashlib.sha256(json.dumps(parts, sort_keys=True, default=str).encode('utf-8')).hexdigest()[:32]
+
+def etag_matches(etag, if_none_match):
+    """Whether an If-None-Match header value names etag (weak comparison)"""
+    return etag is not None and bool(if_none_match) and parse_etags(if_none_match).contains_weak(etag)
+
+def validator_headers(etag, cache_control):
+    return {'ETag': quote_etag(etag, weak=True), 'Cache-Control': cache_control}
+
+def search_etag(query):
+    """ETag of a search while its results come from an in-memory scheme list, else None"""
+    index_version = FUND_DATA_PROVIDER.search_index_version()
+    if index_version is None:
+        return None
+    return make_etag('search', query, index_version, FUND_MASTER_VERSION)
+
+def refresh_comprehensive_fund_list():
+    """Rebuild the search fund list: static list plus online augmentation"""
+    global SEARCH_CACHE, CACHE_TIMESTAMP
+    
+    # Try to fetch from alternative API
+    print("Attempting to fetch additional funds from alternative API...")
+    
+    # Use a more reliable approach - static list + some online augmentation
+    funds_list = list(COMPREHENSIVE_FUND_LIST)  # Start with our static list
+    
+    # Try to augment with some additional data if possible
     try:
-        # Check cache first
-        cached_data = get_cached_nav_data(scheme_code, start_date, end_date)
-        if cached_data is not None:
-            print(f"Using cached NAV data for {scheme_code}")
-            return cached_data
-        
-        print(f"Fetching NAV data for scheme {scheme_code} from {start_date} to {end_date}")
-        
-        # Try to get real data from fund data provider
-        nav_data = FUND_DATA_PROVIDER.get_nav_data(scheme_code, start_date, end_date)
-        
-        if not nav_data.empty and len(nav_data) > 10:  # Ensure we have sufficient data
-            print(f"Successfully fetched {len(nav_data)} NAV records from real data source")
+        # This is a more reliable endpoint pattern
+        url = f"{NAV_API_BASE_URL}/mf"
+        response = http_get(url, timeout=5)  # Shorter timeout
+        if response.status_code == 200:
+            online_data = response.json()
             
-            # Cache the real data
-            cache_nav_data(scheme_code, start_date, end_date, nav_data)
-            return nav_data
-        else:
-            print(f"Insufficient real data ({len(nav_data)} records), generating optimized mock data")
+            # Add unique funds from online source
+            existing_codes = {fund['scheme_code'] for fund in funds_list}
             
-        # Fallback to optimized mock data generation
-        if start_date is None:
-            start_date = datetime.now() - timedelta(days=5*365)  # 5 years default
-        if end_date is None:
-            end_date = datetime.now()
+            for item in online_data[:100]:  # Limit to first 100 to avoid timeout
+                if 'schemeCode' in item and 'schemeName' in item:
+                    code = str(item['schemeCode'])
+                    if code not in existing_codes:
+                        funds_list.append({
+                            'scheme_code': code,
+                            'fund_name': item['schemeName']
+                        })
+                        existing_codes.add(code)
+                        
+            print(f"Augmented fund list with online data. Total funds: {len(funds_list)}")
+        else:
+            print("Online API not accessible, using static fund list")
             
-        mock_data = generate_optimized_mock_nav_data(scheme_code, start_date, end_date)
-        
-        # Cache the mock data (shorter duration)
-        cache_nav_data(scheme_code, start_date, end_date, mock_data)
-        
-        print(f"Generated {len(mock_data)} mock NAV records for {scheme_code}")
-        return mock_data
-        
     except Exception as e:
-        print(f"Error in fetch_nav_optimized for {scheme_code}: {e}")
-        
-        # Final fallback - minimal mock data
-        if start_date is None:
-            start_date = datetime.now() - timedelta(days=365)
-        if end_date is None:
-            end_date = datetime.now()
-            
-        return generate_optimized_mock_nav_data(scheme_code, start_date, end_date)
+        print(f"Could not augment with online data: {e}")
+    
+    # Cache the results
+    SEARCH_CACHE['funds'] = funds_list
+    CACHE_TIMESTAMP = time.time()
+    
+    return funds_list
 
 def get_comprehensive_fund_list():
     """Get comprehensive fund list from static data"""
-    global SEARCH_CACHE, CACHE_TIMESTAMP
-    
-    current_time = time.time()
+    age = time.time() - CACHE_TIMESTAMP
     
     # Check if cache is still valid
-    if SEARCH_CACHE and (current_time - CACHE_TIMESTAMP) < CACHE_DURATION:
+    if SEARCH_CACHE and age < CACHE_DURATION:
+        return SEARCH_CACHE.get('funds', COMPREHENSIVE_FUND_LIST)
+    
+    # Serve the stale list while it is rebuilt in the background
+    if SEARCH_CACHE and age < CACHE_DURATION + SEARCH_MAX_STALE:
+        REVALIDATOR.submit('search:fund_list', refresh_comprehensive_fund_list)
         return SEARCH_CACHE.get('funds', COMPREHENSIVE_FUND_LIST)
     
     try:
-        # Try to fetch from alternative API
-        print("Attempting to fetch additional funds from alternative API...")
-        
-        # Use a more reliable approach - static list + some online augmentation
-        funds_list = list(COMPREHENSIVE_FUND_LIST)  # Start with our static list
-        
-        # Try to augment with some additional data if possible
-        try:
-            # This is a more reliable endpoint pattern
-            url = "https://api.mfapi.in/mf"
-            response = requests.get(url, timeout=5)  # Shorter timeout
-            if response.status_code == 200:
-                online_data = response.json()
-                
-                # Add unique funds from online source
-                existing_codes = {fund['scheme_code'] for fund in funds_list}
-                
-                for item in online_data[:100]:  # Limit to first 100 to avoid timeout
-                    if 'schemeCode' in item and 'schemeName' in item:
-                        code = str(item['schemeCode'])
-                        if code not in existing_codes:
-                            funds_list.append({
-                                'scheme_code': code,
-                                'fund_name': item['schemeName']
-                            })
-                            existing_codes.add(code)
-                            
-                print(f"Augmented fund list with online data. Total funds: {len(funds_list)}")
-            else:
-                print("Online API not accessible, using static fund list")
-                
-        except Exception as e:
-            print(f"Could not augment with online data: {e}")
-        
-        # Cache the results
-        SEARCH_CACHE['funds'] = funds_list
-        CACHE_TIMESTAMP = current_time
-        
-        return funds_list
+        return FUND_LIST_FLIGHT.do('funds', refresh_comprehensive_fund_list)
         
     except Exception as e:
         print(f"Error in get_comprehensive_fund_list: {e}")
         # Always return at least our static list
         return COMPREHENSIVE_FUND_LIST
 
-def generate_mock_nav_data(scheme_code):
-    """Generate realistic mock NAV data for testing when API is down"""
-    try:
-        # Create mock data for last 5 years
-        end_date = datetime.now()
-        start_date = end_date - timedelta(days=5*365)  # 5 years
-        
-        dates = []
-        navs = []
-        
-        current_date = start_date
-        base_nav = 50.0  # Starting NAV
-        
-        # Generate realistic NAV progression
-        while current_date <= end_date:
-            # Add some realistic volatility
-            daily_change = random.uniform(-0.03, 0.04)  # -3% to +4% daily change
-            base_nav = base_nav * (1 + daily_change)
-            
-            # Ensure NAV doesn't go too low
-            if base_nav < 10:
-                base_nav = 10 + random.uniform(0, 5)
-                
-            dates.append(current_date)
-            navs.append(round(base_nav, 4))
-            
-            current_date += timedelta(days=1)
-        
-        # Create DataFrame
-        mock_data = {
-            'date': dates,
-            'nav': navs
-        }
-        
-        df = pd.DataFrame(mock_data)
-        df['date'] = pd.to_datetime(df['date'])
-        
-        print(f"Generated {len(df)} mock NAV records for scheme {scheme_code}")
-        return df.sort_values('date')
-        
-    except Exception as e:
-        print(f"Error generating mock data: {e}")
-        # Absolute fallback - minimal data
-        today = datetime.now()
-        dates = [today - timedelta(days=365), today - timedelta(days=180), today]
-        navs = [45.0, 50.0, 55.0]
-        
-        df = pd.DataFrame({
-            'date': dates,
-            'nav': navs
-        })
-        df['date'] = pd.to_datetime(df['date'])
-        return df
-
 # XIRR logic
+@timed('xirr')
 def xirr(cash_flows):
     def xnpv(rate):
         return sum(cf / (1 + rate) ** ((d - cash_flows[0][0]).days / 365) for d, cf in cash_flows)
     
-    try:
-        return newton(lambda r: xnpv(r), 0.1)
-    except:
-        # Try different initial guess
+    # Retry from a second initial guess before giving up
+    for guess in (0.1, 0.05):
         try:
-            return newton(lambda r: xnpv(r), 0.05)
-        except:
-            return None
+            rate, result = optimize.newton(xnpv, guess, full_output=True)
+            observe_xirr(result.iterations)
+            return rate
+        except Exception:
+            continue
+    observe_xirr(converged=False)
+    return None
 
 # CAGR logic
 def cagr(start_val, end_val, years):
@@ -426,52 +359,19 @@ def cagr(start_val, end_val, years):
 
 # Process a single fund
 def process_fund(name, info, start_date, end_date, portfolio_cashflows):
-    df = fetch_nav_optimized(info["scheme_code"], start_date, end_date)
-    sip_dates = pd.date_range(start=start_date, end=end_date, freq='MS')
-    
-    invested = 0
-    units = 0
-    fund_cashflows = []
-    monthly_data = []
-
-    for date in sip_dates:
-        sip_day = min(3, date.days_in_month)
-        txn_date = date.replace(day=sip_day)
-        
-        # Optimized NAV lookup
-        nav_row = df[df['date'] >= txn_date]
-        if nav_row.empty:
-            # Use the closest available NAV
-            nav_row = df[df['date'] <= txn_date]
-            if nav_row.empty:
-                continue
-            nav_row = nav_row.tail(1)
-        else:
-            nav_row = nav_row.head(1)
-            
-        actual_date = nav_row.iloc[0]['date']
-        nav = nav_row.iloc[0]['nav']
-        unit = info["sip_amount"] / nav
-
-        invested += info["sip_amount"]
-        units += unit
-        fund_cashflows.append((actual_date, -info["sip_amount"]))
-        portfolio_cashflows.append((actual_date, -info["sip_amount"]))
-        
-        # Store monthly data for charting
-        current_value = units * nav
-        monthly_data.append({
-            'date': actual_date.strftime('%Y-%m-%d'),
-            'invested': invested,
-            'current_value': current_value,
-            'nav': nav
-        })
+    series = load_nav_series(info["scheme_code"], start_date, end_date)
+    sip = run_sip(series.dates, series.navs, sip_schedule(start_date, end_date), info["sip_amount"])
+
+    invested = float(sip['invested'][-1]) if len(sip['invested']) else 0
+    units = float(sip['total_units'][-1]) if len(sip['total_units']) else 0
+
+    fund_cashflows = list(zip(pd.to_datetime(sip['date']), -sip['amount']))
+    portfolio_cashflows.extend(fund_cashflows)
 
     # Final valuation
-    last_rows = df[df['date'] <= end_date]
-    if last_rows.empty:
+    latest_nav = valuation_nav(series.dates, series.navs, end_date)
+    if latest_nav is None:
         raise ValueError(f"No NAV data on or before {end_date.date()} for fund {name}")
-    latest_nav = last_rows.iloc[-1]['nav']
     current_value = units * latest_nav
     fund_cashflows.append((end_date, current_value))
 
@@ -479,16 +379,16 @@ def process_fund(name, info, start_date, end_date, portfolio_cashflows):
     fund_xirr = xirr(fund_cashflows)
     fund_cagr = cagr(invested, current_value, years)
 
-    return {
+    # Monthly chart rows stay columns until the response is encoded
+    return SimulationResult.from_sip(sip, summary={
         "fund_name": name,
         "scheme_code": info["scheme_code"],
         "invested": invested,
         "current_value": round(current_value, 2),
         "return_pct": round((current_value - invested) / invested * 100, 2),
         "xirr": round(fund_xirr * 100, 2) if fund_xirr else None,
-        "cagr": round(fund_cagr * 100, 2),
-        "monthly_data": monthly_data
-    }, invested, current_value
+        "cagr": round(fund_cagr * 100, 2)
+    }), invested, current_value
 
 def process_portfolio(funds, start_date, end_date):
     portfolio_cashflows = []
@@ -518,84 +418,45 @@ def process_portfolio(funds, start_date, end_date):
         }
     }
 
+# Cumulative chart rows: holdings as units
+CUMULATIVE_ROWS = (('invested', 'invested', None), ('current_value', 'value', None),
+                   ('units', 'total_units', None), ('nav', 'nav', None))
+
+def cumulative_monthly_data(sip):
+    """Per-instalment chart series from a run_sip result"""
+    return SimulationResult.from_sip(sip, rows=CUMULATIVE_ROWS)
+
 # Process a single fund with cumulative data
 def process_fund_cumulative(name, info, start_date, end_date):
-    df = fetch_nav_optimized(info["scheme_code"], start_date, end_date)
-    sip_dates = pd.date_range(start=start_date, end=end_date, freq='MS')
-    
-    invested = 0
-    units = 0
-    monthly_data = []
-
-    for date in sip_dates:
-        sip_day = min(3, date.days_in_month)
-        txn_date = date.replace(day=sip_day)
-        nav_row = df[df['date'] >= txn_date]
-        if nav_row.empty:
-            continue
-        actual_date = nav_row.iloc[0]['date']
-        nav = nav_row.iloc[0]['nav']
-        unit = info["sip_amount"] / nav
-
-        invested += info["sip_amount"]
-        units += unit
-        
-        # Store monthly data for charting
-        current_value = units * nav
-        monthly_data.append({
-            'date': actual_date.strftime('%Y-%m-%d'),
-            'invested': invested,
-            'current_value': current_value,
-            'units': units,
-            'nav': nav
-        })
-
-    return monthly_data
+    series = load_nav_series(info["scheme_code"], start_date, end_date)
+    sip = run_sip(series.dates, series.navs, sip_schedule(start_date, end_date),
+                  info["sip_amount"], carry_last=False)
+    return cumulative_monthly_data(sip)
 
 def process_portfolio_cumulative(funds, start_date, end_date):
     """Process portfolio for cumulative performance comparison"""
     all_fund_data = {}
-    portfolio_monthly_data = []
+    portfolio_monthly_data = SimulationResult.empty(PORTFOLIO_ROWS)
     
     # Process each fund
     for name, info in funds.items():
         fund_monthly_data = process_fund_cumulative(name, info, start_date, end_date)
         all_fund_data[name] = fund_monthly_data
     
-    # Create cumulative portfolio data by combining all funds for each month
-    if all_fund_data:
-        # Get all unique dates across all funds
-        all_dates = set()
-        for fund_data in all_fund_data.values():
-            for data_point in fund_data:
-                all_dates.add(data_point['date'])
-        
-        sorted_dates = sorted(list(all_dates))
-        
-        # For each date, sum up the portfolio values
-        for date_str in sorted_dates:
-            total_invested = 0
-            total_current_value = 0
-            
-            for fund_name, fund_data in all_fund_data.items():
-                # Find the data point for this date or the closest previous date
-                fund_data_point = None
-                for data_point in fund_data:
-                    if data_point['date'] <= date_str:
-                        fund_data_point = data_point
-                    else:
-                        break
-                
-                if fund_data_point:
-                    total_invested += fund_data_point['invested']
-                    total_current_value += fund_data_point['current_value']
-            
-            if total_invested > 0:  # Only add if we have investments
-                portfolio_monthly_data.append({
-                    'date': date_str,
-                    'invested': total_invested,
-                    'current_value': total_current_value
-                })
+    # Each fund's holdings as of every date any fund invested on
+    fund_series = [result for result in all_fund_data.values() if len(result)]
+    if fund_series:
+        dates = np.unique(np.concatenate([result.dates for result in fund_series]))
+        invested, value = np.zeros(len(dates)), np.zeros(len(dates))
+        for result in fund_series:
+            latest = np.searchsorted(result.dates, dates, side='right') - 1
+            held = latest >= 0
+            invested[held] += result.invested[latest[held]]
+            value[held] += result.value[latest[held]]
+        
+        keep = invested > 0  # Only dates with investments
+        portfolio_monthly_data = SimulationResult(dates[keep], invested=invested[keep], value=value[keep],
+                                                  rows=PORTFOLIO_ROWS)
     
     return portfolio_monthly_data
 
@@ -607,7 +468,7 @@ def process_funds_parallel(funds, start_date, end_date):
     with ThreadPoolExecutor(max_workers=4) as executor:
         # Submit all fund processing tasks
         future_to_fund = {
-            executor.submit(process_fund_cumulative_optimized, name, info, start_date, end_date): name
+            executor.submit(track_queue('funds', propagate_context(process_fund_cumulative_optimized)), name, info, start_date, end_date): name
             for name, info in funds.items()
         }
         
@@ -619,88 +480,24 @@ def process_funds_parallel(funds, start_date, end_date):
                 fund_results[fund_name] = result
             except Exception as e:
                 print(f"Error processing fund {fund_name}: {e}")
-                fund_results[fund_name] = []
+                fund_results[fund_name] = SimulationResult.empty(CUMULATIVE_ROWS)
     
     return fund_results
 
 def process_fund_cumulative_optimized(name, info, start_date, end_date):
     """Optimized cumulative fund processing"""
-    df = fetch_nav_optimized(info["scheme_code"], start_date, end_date)
-    sip_dates = pd.date_range(start=start_date, end=end_date, freq='MS')
-    
-    invested = 0
-    units = 0
-    monthly_data = []
-
-    for date in sip_dates:
-        sip_day = min(3, date.days_in_month)
-        txn_date = date.replace(day=sip_day)
-        
-        # Optimized NAV lookup
-        nav_row = df[df['date'] >= txn_date]
-        if nav_row.empty:
-            # Use the closest available NAV
-            nav_row = df[df['date'] <= txn_date]
-            if nav_row.empty:
-                continue
-            nav_row = nav_row.tail(1)
-        else:
-            nav_row = nav_row.head(1)
-            
-        actual_date = nav_row.iloc[0]['date']
-        nav = nav_row.iloc[0]['nav']
-        unit = info["sip_amount"] / nav
-
-        invested += info["sip_amount"]
-        units += unit
-        
-        # Store monthly data for charting
-        current_value = units * nav
-        monthly_data.append({
-            'date': actual_date.strftime('%Y-%m-%d'),
-            'invested': invested,
-            'current_value': current_value,
-            'units': units,
-            'nav': nav
-        })
-
-    return monthly_data
+    series = load_nav_series(info["scheme_code"], start_date, end_date)
+    sip = run_sip(series.dates, series.navs, sip_schedule(start_date, end_date),
+                  info["sip_amount"], carry_last=True)
+    return cumulative_monthly_data(sip)
 
 def process_portfolio_cumulative_optimized(funds, start_date, end_date):
     """Optimized portfolio cumulative processing with parallel execution"""
     # Process funds in parallel
     all_fund_data = process_funds_parallel(funds, start_date, end_date)
-    portfolio_monthly_data = []
     
-    if all_fund_data:
-        # Get all unique dates across all funds
-        all_dates = set()
-        for fund_data in all_fund_data.values():
-            for data_point in fund_data:
-                all_dates.add(data_point['date'])
-        
-        sorted_dates = sorted(list(all_dates))
-        
-        # Optimize date aggregation
-        date_aggregates = {}
-        for fund_name, fund_data in all_fund_data.items():
-            for data_point in fund_data:
-                date_str = data_point['date']
-                if date_str not in date_aggregates:
-                    date_aggregates[date_str] = {'invested': 0, 'current_value': 0}
-                date_aggregates[date_str]['invested'] += data_point['invested']
-                date_aggregates[date_str]['current_value'] += data_point['current_value']
-        
-        # Create portfolio data
-        for date_str in sorted_dates:
-            if date_str in date_aggregates and date_aggregates[date_str]['invested'] > 0:
-                portfolio_monthly_data.append({
-                    'date': date_str,
-                    'invested': date_aggregates[date_str]['invested'],
-                    'current_value': date_aggregates[date_str]['current_value']
-                })
-    
-    return portfolio_monthly_data
+    # Funds share the instalment schedule, so their columns add up per date
+    return combine_by_date(all_fund_data.values())
 
 @app.route('/api/search-funds', methods=['GET'])
 def search_funds():
@@ -722,6 +519,10 @@ def search_funds():
                 'message': 'Please enter at least 2 characters'
             })
         
+        etag = search_etag(query)
+        if etag_matches(etag, request.headers.get('If-None-Match')):
+            return '', 304, validator_headers(etag, SEARCH_CACHE_CONTROL)
+        
         # Use the new fund data provider for search
         start_time = time.time()
         funds = FUND_DATA_PROVIDER.search_funds(query, limit=50)
@@ -729,13 +530,18 @@ def search_funds():
         
         print(f"Search for '{query}' completed in {search_time:.3f}s, found {len(funds)} funds")
         
+        if etag is None:
+            etag = make_etag('search', query, funds)  # No in-memory scheme list: tag the results themselves
+            if etag_matches(etag, request.headers.get('If-None-Match')):
+                return '', 304, validator_headers(etag, SEARCH_CACHE_CONTROL)
+        
         return jsonify({
             'success': True,
             'funds': funds,
             'search_time': round(search_time, 3),
             'total_results': len(funds),
             'message': f'Found {len(funds)} funds matching "{query}"'
-        })
+        }), validator_headers(etag, SEARCH_CACHE_CONTROL)
         
     except Exception as e:
         print(f"Error in search_funds: {e}")
@@ -746,28 +552,35 @@ def search_funds():
         }), 500
 
 @app.route('/api/simulate', methods=['POST'])
+@cached_response('simulate')
 def simulate_sip():
     """Main SIP simulation endpoint"""
     try:
-        data = request.json
-        funds_data = data.get('funds', [])
-        start_date = datetime.strptime(data.get('start_date'), '%Y-%m-%d')
-        end_date = datetime.strptime(data.get('end_date'), '%Y-%m-%d')
-        
-        # Convert funds data to the format expected by process_portfolio
-        funds = {}
-        for fund in funds_data:
-            funds[fund['fund_name']] = {
-                'scheme_code': fund['scheme_code'],
-                'sip_amount': fund['sip_amount']
-            }
-        
+        funds, start_date, end_date = parse_simulation_request(request.json)
+        scheme_codes = [info['scheme_code'] for info in funds.values()]
+        record_usage(scheme_codes)
+        prefetch_nav_histories(scheme_codes)
         result = process_portfolio(funds, start_date, end_date)
         return jsonify({"success": True, "data": result})
         
     except Exception as e:
         return jsonify({"success": False, "error": str(e), "traceback": traceback.format_exc()}), 500
 
+def parse_simulation_request(data):
+    """(funds, start_date, end_date) of a /api/simulate body, funds in process_portfolio's format"""
+    funds_data = data.get('funds', [])
+    start_date = datetime.strptime(data.get('start_date'), '%Y-%m-%d')
+    end_date = datetime.strptime(data.get('end_date'), '%Y-%m-%d')
+    
+    # Convert funds data to the format expected by process_portfolio
+    funds = {}
+    for fund in funds_data:
+        funds[fund['fund_name']] = {
+            'scheme_code': fund['scheme_code'],
+            'sip_amount': fund['sip_amount']
+        }
+    return funds, start_date, end_date
+
 @app.route('/api/benchmark', methods=['POST'])
 def benchmark_sip():
     """Benchmark against standard index"""
@@ -776,16 +589,18 @@ def benchmark_sip():
         start_date = datetime.strptime(data.get('start_date'), '%Y-%m-%d')
         end_date = datetime.strptime(data.get('end_date'), '%Y-%m-%d')
         sip_amount = data.get('sip_amount', 10000)
+        benchmark = resolve_benchmark(data.get('benchmark'))
         
-        # Nifty 50 Index Fund for benchmarking
+        # Benchmark index fund from the registry (Nifty 50 by default)
         benchmark_fund = {
-            "Nifty 50 Index": {
-                "scheme_code": "147625",  # UTI Nifty 50 Index Fund
+            benchmark['name']: {
+                "scheme_code": benchmark['scheme_code'],
                 "sip_amount": sip_amount
             }
         }
         
         result = process_portfolio(benchmark_fund, start_date, end_date)
+        result['benchmark'] = benchmark
         return jsonify({"success": True, "data": result})
         
     except Exception as e:
@@ -793,45 +608,90 @@ def benchmark_sip():
 
 @app.route('/api/fund-info/<scheme_code>', methods=['GET'])
 def get_fund_info(scheme_code):
-    """Get detailed fund information"""
+    """Get fund details and recent NAVs from the NAV store (?window=365, 5y or max for longer charts)"""
     try:
-        url = f"https://api.mfapi.in/mf/{scheme_code}"
-        r = requests.get(url, timeout=10)
-        r.raise_for_status()
-        data = r.json()
-        
-        # Get recent NAV data for chart
-        nav_data = data['data'][:30]  # Last 30 days
-        chart_data = []
-        for item in nav_data:
-            chart_data.append({
-                'date': item['date'],
-                'nav': float(item['nav'])
-            })
-        
-        return jsonify({
-            "success": True,
-            "data": {
-                "fund_name": data['meta']['fund_house'] + " - " + data['meta']['scheme_name'],
-                "scheme_code": data['meta']['scheme_code'],
-                "fund_house": data['meta']['fund_house'],
-                "scheme_type": data['meta']['scheme_type'],
-                "scheme_category": data['meta']['scheme_category'],
-                "nav_data": chart_data
-            }
-        })
+        prefetch_nav_histories([scheme_code])
+        payload, status, headers = fund_info(
+            scheme_code, NAV_STORE.get(str(scheme_code)), request.args.get('window'),
+            request.headers.get('If-None-Match')
+        )
+        if payload is None:
+            return '', status, headers
+        return jsonify(payload), status, headers
         
     except Exception as e:
         return jsonify({"success": False, "error": str(e)}), 500
 
+# Static fund master by scheme code, for schemes whose NAV history came without metadata
+FUND_MASTER = {}
+for _fund in COMPREHENSIVE_FUND_LIST:
+    FUND_MASTER.setdefault(_fund['scheme_code'], _fund)
+
+FUND_INFO_WINDOW = 30  # NAVs returned without ?window
+FUND_INFO_PERIODS = {'d': 'days', 'w': 'weeks', 'm': 'months', 'y': 'years'}
+
+def nav_window(series, window=None):
+    """Latest NAVs of a series: a count ('90'), a period back from the last NAV ('6m', '5y') or 'max'"""
+    window = (window or str(FUND_INFO_WINDOW)).strip().lower()
+    if window == 'max':
+        return series
+    if window.isdigit() and int(window) > 0:
+        return series.tail(int(window))
+    if window[:-1].isdigit() and window[-1] in FUND_INFO_PERIODS and int(window[:-1]) > 0:
+        last = pd.Timestamp(series.dates[-1])
+        return series.window(last - pd.DateOffset(**{FUND_INFO_PERIODS[window[-1]]: int(window[:-1])}))
+    raise ValueError(f"Invalid window '{window}': use a NAV count, a period such as 6m or 5y, or max")
+
+def fund_info(scheme_code, series, window=None, if_none_match=None):
+    """(payload, status, headers) of a fund info request; payload is None for 304 Not Modified"""
+    if series is None or not len(series):
+        return {"success": False, "error": f"No NAV history found for scheme {scheme_code}"}, 404, {}
+    try:
+        navs = nav_window(series, window)
+    except ValueError as e:
+        return {"success": False, "error": str(e)}, 400, {}
+    
+    etag = make_etag('fund-info', str(scheme_code), window, nav_version(series))
+    headers = validator_headers(etag, FUND_INFO_CACHE_CONTROL)
+    if etag_matches(etag, if_none_match):
+        return None, 304, headers
+    return {"success": True, "data": fund_info_data(series, navs)}, 200, headers
+
+def fund_info_data(series, navs):
+    """Fund details from the series' metadata (or the fund master) and navs, latest first"""
+    meta = series.meta or {}
+    master = FUND_MASTER.get(str(series.scheme_code), {})
+    fund_house = meta.get('fund_house') or master.get('fund_house')
+    scheme_name = meta.get('scheme_name')
+    if fund_house and scheme_name:
+        fund_name = f"{fund_house} - {scheme_name}"
+    else:
+        fund_name = master.get('fund_name') or scheme_name or f"Scheme {series.scheme_code}"
+    
+    # Array slice to chart rows, in the MF API's latest-first order and date format
+    dates = np.datetime_as_string(navs.dates[::-1], unit='D').tolist()
+    return {
+        "fund_name": fund_name,
+        "scheme_code": meta.get('scheme_code', series.scheme_code),
+        "fund_house": fund_house,
+        "scheme_type": meta.get('scheme_type'),
+        "scheme_category": meta.get('scheme_category'),
+        "nav_data": [
+            {'date': f'{d[8:10]}-{d[5:7]}-{d[:4]}', 'nav': nav}
+            for d, nav in zip(dates, navs.navs[::-1].tolist())
+        ]
+    }
+
 @app.route('/api/cumulative-performance', methods=['POST'])
+@cached_response('cumulative-performance', functools.partial(fund_cache_params, benchmark=True))
 def get_cumulative_performance():
-    """Get cumulative portfolio performance vs Nifty 50 for charting"""
+    """Get cumulative portfolio performance vs a benchmark (Nifty 50 by default) for charting"""
     try:
         data = request.json
         funds_data = data.get('funds', [])
         start_date = datetime.strptime(data.get('start_date'), '%Y-%m-%d')
         end_date = datetime.strptime(data.get('end_date'), '%Y-%m-%d')
+        benchmark = resolve_benchmark(data.get('benchmark'))
         
         # Convert funds data to the format expected by process_portfolio_cumulative
         funds = {}
@@ -843,25 +703,30 @@ def get_cumulative_performance():
             }
             total_sip_amount += fund['sip_amount']
         
+        scheme_codes = [info['scheme_code'] for info in funds.values()]
+        record_usage(scheme_codes)
+        prefetch_nav_histories(scheme_codes + [benchmark['scheme_code']])
+        
         # Process portfolio cumulative data
         portfolio_data = process_portfolio_cumulative_optimized(funds, start_date, end_date)
         
-        # Process Nifty 50 benchmark with equivalent total SIP amount
-        nifty_fund = {
-            "Nifty 50 Index": {
-                "scheme_code": "147625",  # UTI Nifty 50 Index Fund
+        # Process benchmark with equivalent total SIP amount
+        benchmark_fund = {
+            benchmark['name']: {
+                "scheme_code": benchmark['scheme_code'],
                 "sip_amount": total_sip_amount
             }
         }
         
-        nifty_data = process_portfolio_cumulative_optimized(nifty_fund, start_date, end_date)
+        benchmark_data = process_portfolio_cumulative_optimized(benchmark_fund, start_date, end_date)
         
         return jsonify({
             "success": True, 
             "data": {
                 "portfolio": portfolio_data,
-                "nifty50": nifty_data,
+                "nifty50": benchmark_data,  # kept under this key for the charting frontend
                 "metadata": {
+                    "benchmark": benchmark,
                     "total_sip_amount": total_sip_amount,
                     "fund_count": len(funds_data),
                     "start_date": start_date.strftime('%Y-%m-%d'),
@@ -874,6 +739,7 @@ def get_cumulative_performance():
         return jsonify({"success": False, "error": str(e), "traceback": traceback.format_exc()}), 500
 
 @app.route('/api/risk-analysis', methods=['POST'])
+@cached_response('risk-analysis', functools.partial(fund_cache_params, benchmark=True))
 def risk_analysis():
     """Calculate comprehensive risk analysis for selected funds"""
     try:
@@ -885,19 +751,29 @@ def risk_analysis():
         if not funds:
             return jsonify({'success': False, 'error': 'No funds provided'})
         
-        # Get benchmark data (Nifty 50)
-        benchmark_data = generate_nifty50_data(start_date, end_date, 10000)  # Using 10k as base
+        start_dt = datetime.strptime(start_date, '%Y-%m-%d')
+        end_dt = datetime.strptime(end_date, '%Y-%m-%d')
+        
+        # Get benchmark data from the registry (Nifty 50 by default)
+        benchmark = resolve_benchmark(data.get('benchmark'))
+        benchmark_data = process_fund_cumulative_optimized(
+            benchmark['name'],
+            {'scheme_code': benchmark['scheme_code'], 'sip_amount': 10000},  # Using 10k as base
+            start_dt,
+            end_dt
+        )
         
         risk_analysis_results = []
+        fund_monthly_data = []
         
         for fund in funds:
             try:
-                # Generate fund data
-                fund_data = generate_mock_nav_data(
-                    fund['scheme_code'], 
-                    start_date, 
-                    end_date, 
-                    fund['sip_amount']
+                # Simulate the fund over its NAV history
+                fund_data = process_fund_cumulative_optimized(
+                    fund['fund_name'],
+                    {'scheme_code': fund['scheme_code'], 'sip_amount': fund['sip_amount']},
+                    start_dt,
+                    end_dt
                 )
                 
                 if fund_data:
@@ -910,6 +786,7 @@ def risk_analysis():
                         'sip_amount': fund['sip_amount'],
                         'risk_metrics': risk_metrics
                     })
+                    fund_monthly_data.append(fund_data)
                     
             except Exception as e:
                 print(f"Error calculating risk for fund {fund['fund_name']}: {str(e)}")
@@ -919,32 +796,18 @@ def risk_analysis():
         if len(risk_analysis_results) > 1:
             # Combine all fund data for portfolio analysis
             portfolio_data = []
-            total_sip = sum(fund['sip_amount'] for fund in funds)
+            total_sip = sum(result['sip_amount'] for result in risk_analysis_results)
             
-            # Create weighted portfolio returns
-            for i, result in enumerate(risk_analysis_results):
-                fund_data = generate_mock_nav_data(
-                    result['scheme_code'], 
-                    start_date, 
-                    end_date, 
-                    result['sip_amount']
-                )
-                
+            # Create weighted portfolio returns on the first fund's dates
+            months = len(fund_monthly_data[0])
+            invested, value = np.zeros(months), np.zeros(months)
+            for result, fund_data in zip(risk_analysis_results, fund_monthly_data):
                 weight = result['sip_amount'] / total_sip
-                
-                if i == 0:
-                    # Initialize portfolio data
-                    portfolio_data = [{
-                        'date': item['date'],
-                        'current_value': item['current_value'] * weight,
-                        'invested': item['invested'] * weight
-                    } for item in fund_data]
-                else:
-                    # Add weighted values
-                    for j, item in enumerate(fund_data):
-                        if j < len(portfolio_data):
-                            portfolio_data[j]['current_value'] += item['current_value'] * weight
-                            portfolio_data[j]['invested'] += item['invested'] * weight
+                overlap = min(months, len(fund_data))
+                invested[:overlap] += fund_data.invested[:overlap] * weight
+                value[:overlap] += fund_data.value[:overlap] * weight
+            portfolio_data = SimulationResult(fund_monthly_data[0].dates, invested=invested, value=value,
+                                              rows=PORTFOLIO_ROWS)
             
             portfolio_risk_metrics = calculate_risk_metrics(portfolio_data, benchmark_data)
         else:
@@ -956,6 +819,7 @@ def risk_analysis():
                 'individual_funds': risk_analysis_results,
                 'portfolio_metrics': portfolio_risk_metrics,
                 'benchmark_metrics': calculate_risk_metrics(benchmark_data),
+                'benchmark': benchmark,
                 'analysis_period': {
                     'start_date': start_date,
                     'end_date': end_date,
@@ -968,14 +832,88 @@ def risk_analysis():
         print(f"Risk analysis error: {str(e)}")
         return jsonify({'success': False, 'error': str(e)})
 
+@app.route('/api/benchmarks', methods=['GET'])
+def get_benchmarks():
+    """List the registered benchmarks"""
+    return jsonify({'success': True, 'benchmarks': list_benchmarks()})
+
+@app.route('/api/rolling-metrics', methods=['POST'])
+def rolling_metrics():
+    """Rolling beta, alpha, R², tracking error and information ratio against a benchmark"""
+    try:
+        data = request.get_json()
+        funds = data.get('funds', [])
+        start_date = datetime.strptime(data.get('start_date'), '%Y-%m-%d')
+        end_date = datetime.strptime(data.get('end_date'), '%Y-%m-%d')
+        window = int(data.get('window', 12))  # months
+        
+        if not funds:
+            return jsonify({'success': False, 'error': 'No funds provided'})
+        
+        benchmark = resolve_benchmark(data.get('benchmark'))
+        scheme_codes = [fund['scheme_code'] for fund in funds] + [benchmark['scheme_code']]
+        
+        # Fetch every distinct NAV series once
+        nav_frames = {}
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            future_to_code = {
+                executor.submit(track_queue('nav_fetch', propagate_context(fetch_nav_optimized)), code, start_date, end_date): code
+                for code in set(scheme_codes)
+            }
+            for future in as_completed(future_to_code):
+                nav_frames[future_to_code[future]] = future.result()
+        
+        month_labels, nav_matrix = monthly_nav_panel(nav_frames)
+        column = {code: i for i, code in enumerate(nav_frames)}
+        returns = periodic_returns(nav_matrix)
+        
+        if len(returns) < window:
+            return jsonify({
+                'success': False,
+                'error': f'Need at least {window} months of overlapping NAV history, found {len(returns)}'
+            })
+        
+        # One pass over all funds at once
+        fund_returns = returns[:, [column[fund['scheme_code']] for fund in funds]]
+        metrics = rolling_regression(fund_returns, returns[:, column[benchmark['scheme_code']]], window)
+        
+        # Arrays go to the encoder as they are (NaN is encoded as null)
+        percent_metrics = ('alpha', 'tracking_error')
+        results = []
+        for i, fund in enumerate(funds):
+            rolling = {
+                name: np.round(values[:, i] * (100 if name in percent_metrics else 1), 4)
+                for name, values in metrics.items()
+            }
+            results.append({
+                'fund_name': fund['fund_name'],
+                'scheme_code': fund['scheme_code'],
+                'rolling': rolling,
+                'latest': {name: series[-1] for name, series in rolling.items()}
+            })
+        
+        return jsonify({
+            'success': True,
+            'data': {
+                'benchmark': benchmark,
+                'window_months': window,
+                'dates': month_labels[window:],  # window end month for each point
+                'funds': results
+            }
+        })
+        
+    except Exception as e:
+        print(f"Rolling metrics error: {str(e)}")
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@timed('risk')
 def calculate_risk_metrics(monthly_data, benchmark_data=None):
-    """Calculate comprehensive risk metrics for a fund or portfolio"""
+    """Calculate comprehensive risk metrics for a fund or portfolio (SimulationResults)"""
     if not monthly_data or len(monthly_data) < 2:
         return {}
     
     # Convert to pandas DataFrame for easier calculations
-    df = pd.DataFrame(monthly_data)
-    df['date'] = pd.to_datetime(df['date'])
+    df = pd.DataFrame({'date': monthly_data.dates, 'current_value': monthly_data.value})
     df = df.sort_values('date')
     
     # Calculate monthly returns
@@ -1014,8 +952,7 @@ def calculate_risk_metrics(monthly_data, benchmark_data=None):
     # Beta calculation (if benchmark provided)
     beta = 0
     if benchmark_data and len(benchmark_data) >= len(monthly_data):
-        benchmark_df = pd.DataFrame(benchmark_data)
-        benchmark_df['date'] = pd.to_datetime(benchmark_df['date'])
+        benchmark_df = pd.DataFrame({'date': benchmark_data.dates, 'current_value': benchmark_data.value})
         benchmark_df = benchmark_df.sort_values('date')
         benchmark_df['monthly_return'] = benchmark_df['current_value'].pct_change().fillna(0)
         
@@ -1047,52 +984,6 @@ def calculate_risk_metrics(monthly_data, benchmark_data=None):
         'win_rate': round(len(monthly_returns[monthly_returns > 0]) / len(monthly_returns) * 100, 1)
     }
 
-def generate_nifty50_data(start_date, end_date, sip_amount):
-    """Generate mock Nifty 50 data for benchmarking"""
-    try:
-        start_dt = datetime.strptime(start_date, '%Y-%m-%d')
-        end_dt = datetime.strptime(end_date, '%Y-%m-%d')
-        
-        # Generate monthly SIP dates
-        sip_dates = pd.date_range(start=start_dt, end=end_dt, freq='MS')
-        
-        total_invested = 0
-        total_units = 0
-        monthly_data = []
-        
-        # Mock Nifty 50 data (starting at around 18000)
-        base_value = 18000
-        
-        for i, sip_date in enumerate(sip_dates):
-            # Mock Nifty 50 growth with some volatility
-            months_elapsed = i
-            # Nifty 50 historical average: ~10-12% annually
-            growth_factor = 1 + 0.11 / 12  # 11% annual return
-            volatility = 0.12 * (hash(str(sip_date)) % 100 - 50) / 100  # Random volatility
-            current_value = base_value * (growth_factor ** months_elapsed) * (1 + volatility)
-            
-            # Calculate units purchased (treating it like an index fund)
-            units_purchased = sip_amount / current_value
-            total_units += units_purchased
-            total_invested += sip_amount
-            
-            # Current portfolio value
-            portfolio_value = total_units * current_value
-            
-            monthly_data.append({
-                'date': sip_date.strftime('%Y-%m-%d'),
-                'invested': total_invested,
-                'current_value': portfolio_value,
-                'index_value': current_value,
-                'units': total_units
-            })
-        
-        return monthly_data
-        
-    except Exception as e:
-        print(f"Error generating Nifty 50 data: {str(e)}")
-        return []
-
 @app.route('/api/goal-planning', methods=['POST'])
 def goal_planning():
     """Calculate SIP requirements for various financial goals"""
@@ -1111,16 +1002,15 @@ def goal_planning():
             monthly_expenses = data.get('monthly_expenses', 50000)
             years_after_retirement = data.get('years_after_retirement', 25)
             
-            # Calculate inflation-adjusted retirement corpus needed
+            # Calculate inflation-adjusted monthly expenses at retirement
             years_to_retirement = retirement_age - current_age
             future_monthly_expenses = monthly_expenses * ((1 + inflation_rate/100) ** years_to_retirement)
-            total_corpus_needed = future_monthly_expenses * 12 * years_after_retirement
-            
-            # Adjust for post-retirement returns (conservative 8%)
-            post_retirement_return = 8
-            corpus_with_returns = total_corpus_needed / ((1 + post_retirement_return/100) ** (years_after_retirement/2))
             
-            goal_amount = corpus_with_returns
+            # Corpus that funds inflation-indexed withdrawals at post-retirement returns (conservative 8%)
+            post_retirement_return = data.get('post_retirement_return', 8)
+            goal_amount = required_corpus(
+                future_monthly_expenses, years_after_retirement, post_retirement_return, inflation_rate
+            )
             time_horizon = years_to_retirement
             
         elif goal_type == 'education':
@@ -1187,31 +1077,130 @@ def goal_planning():
         print(f"Goal planning error: {str(e)}")
         return jsonify({'success': False, 'error': str(e)})
 
+@app.route('/api/retirement/swp', methods=['POST'])
+def retirement_swp():
+    """Simulate a systematic withdrawal plan over Monte Carlo or historical return paths"""
+    try:
+        data = request.get_json()
+        years = data.get('years', 25)
+        months = int(round(years * 12))
+        mode = data.get('mode', 'monte_carlo')  # 'monte_carlo' or 'historical'
+        confidence = data.get('confidence', 0.9)
+        
+        # One or many client profiles share the same return paths
+        profiles = data.get('profiles') or [data]
+        corpus = np.array([p.get('corpus', 10000000) for p in profiles], dtype=float)
+        inflation = np.array([p.get('inflation_rate', 6) for p in profiles], dtype=float)
+        withdrawal = np.array([
+            p['monthly_withdrawal'] if 'monthly_withdrawal' in p
+            else p.get('corpus', 10000000) * p.get('withdrawal_rate', 4) / 100 / 12
+            for p in profiles
+        ], dtype=float)
+        
+        if mode == 'historical':
+            scheme_code = data.get('scheme_code') or resolve_benchmark(data.get('benchmark'))['scheme_code']
+            end_date = datetime.now()
+            start_date = end_date - timedelta(days=int(data.get('history_years', 20) * 365))
+            nav_df = fetch_nav_optimized(scheme_code, start_date, end_date)
+            _, nav_matrix = monthly_nav_panel({scheme_code: nav_df})
+            paths = historical_return_paths(periodic_returns(nav_matrix[:, 0]), months)
+        else:
+            paths = monte_carlo_return_paths(
+                int(data.get('n_paths', 2000)),
+                months,
+                data.get('expected_return', 10),
+                data.get('volatility', 15),
+                seed=data.get('seed', 42)  # fixed seed keeps responses reproducible
+            )
+        
+        summary = summarize_withdrawals(simulate_withdrawals(corpus, withdrawal, paths, inflation))
+        swr = safe_withdrawal_rate(paths, inflation, confidence)
+        
+        def as_list(values, digits=2):
+            return [round(float(v), digits) if np.isfinite(v) else None for v in values]
+        
+        results = []
+        for i, profile in enumerate(profiles):
+            results.append({
+                'corpus': round(float(corpus[i]), 2),
+                'initial_monthly_withdrawal': round(float(withdrawal[i]), 2),
+                'inflation_rate': float(inflation[i]),
+                'depletion_probability': round(float(summary['depletion_probability'][i]) * 100, 2),
+                'median_depletion_month': as_list(summary['median_depletion_month'][i:i+1], 1)[0],
+                'terminal_balance_percentiles': {
+                    p: round(float(values[i]), 2) for p, values in summary['terminal_balance_percentiles'].items()
+                },
+                'safe_withdrawal_rate': round(float(swr[i]), 2),
+                'safe_monthly_withdrawal': round(float(swr[i]) / 100 / 12 * float(corpus[i]), 2)
+            })
+        
+        return jsonify({
+            'success': True,
+            'data': {
+                'profiles': results,
+                'simulation': {
+                    'mode': mode,
+                    'paths': int(paths.shape[0]),
+                    'months': months,
+                    'confidence': confidence
+                }
+            }
+        })
+        
+    except Exception as e:
+        print(f"SWP simulation error: {str(e)}")
+        return jsonify({'success': False, 'error': str(e)}), 400
+
+@app.route('/api/goal-planning/batch', methods=['POST'])
+def goal_planning_batch():
+    """Solve many goal-planning scenarios in one vectorized call"""
+    try:
+        data = request.get_json()
+        goals = data.get('goals', [])
+        
+        if not goals:
+            return jsonify({'success': False, 'error': 'No goals provided'})
+        
+        def column(field, default=None):
+            return [goal.get(field, default) for goal in goals]
+        
+        # Horizon either given directly or derived from ages
+        horizons = [
+            goal['time_horizon'] if 'time_horizon' in goal
+            else goal.get('goal_age', 60) - goal.get('current_age', 25)
+            for goal in goals
+        ]
+        inflation = column('inflation_rate', 6)
+        step_up = [goal.get('step_up_percentage', infl) for goal, infl in zip(goals, inflation)]
+        
+        results = solve_goals(
+            column('goal_amount', 0),
+            horizons,
+            column('expected_return', 12),
+            inflation,
+            step_up
+        )
+        
+        return jsonify({
+            'success': True,
+            'data': {
+                'count': len(goals),
+                'results': {name: np.round(values, 2) for name, values in results.items()}
+            }
+        })
+        
+    except Exception as e:
+        print(f"Batch goal planning error: {str(e)}")
+        return jsonify({'success': False, 'error': str(e)}), 400
+
 def calculate_step_up_sip(goal_amount, years, annual_return, step_up_rate):
     """Calculate initial SIP amount for step-up SIP"""
-    # This is a complex calculation involving geometric series
-    # Simplified approach: reduce initial SIP by ~20-30% compared to regular SIP
-    monthly_return = annual_return / 12
-    total_months = years * 12
-    
-    if monthly_return > 0:
-        fv_factor = ((1 + monthly_return) ** total_months - 1) / monthly_return
-        regular_sip = goal_amount / fv_factor
-        # Step-up SIP can start with ~25% less than regular SIP
-        return regular_sip * 0.75
-    else:
-        return goal_amount / total_months * 0.75
+    # Closed-form geometric-series annuity (rates passed as decimals here)
+    return float(solve_step_up_sip(goal_amount, years, annual_return * 100, step_up_rate * 100))
 
 def calculate_total_step_up_investment(initial_sip, years, step_up_rate):
     """Calculate total investment for step-up SIP"""
-    total_investment = 0
-    current_sip = initial_sip
-    
-    for year in range(years):
-        total_investment += current_sip * 12
-        current_sip *= (1 + step_up_rate)
-    
-    return total_investment
+    return float(total_step_up_investment(initial_sip, years, step_up_rate * 100))
 
 def get_recommended_allocation(time_horizon, risk_level):
     """Get recommended asset allocation based on time horizon and risk"""
@@ -1245,6 +1234,8 @@ def get_recommended_allocation(time_horizon, risk_level):
         }
 
 @app.route('/api/step-up-sip', methods=['POST'])
+@cached_response('step-up-sip', lambda data: fund_cache_params(
+    data, step_up_percentage=data.get('step_up_percentage', 10)))
 def step_up_sip():
     """Simulate step-up SIP with annual increases"""
     try:
@@ -1275,8 +1266,8 @@ def step_up_sip():
                 
                 if fund_result:
                     results.append(fund_result)
-                    portfolio_summary['total_invested'] += fund_result['invested']
-                    portfolio_summary['final_value'] += fund_result['current_value']
+                    portfolio_summary['total_invested'] += fund_result.summary['invested']
+                    portfolio_summary['final_value'] += fund_result.summary['current_value']
                     
             except Exception as e:
                 print(f"Error in step-up SIP for fund {fund['fund_name']}: {str(e)}")
@@ -1299,8 +1290,8 @@ def step_up_sip():
                     (portfolio_summary['final_value'] / portfolio_summary['total_invested']) ** (1/years) - 1
                 ) * 100
         
-        # Compare with regular SIP
-        regular_sip_comparison = simulate_regular_sip_comparison(funds, start_date, end_date)
+        # Compare with regular SIP (computed alongside each fund's step-up run)
+        regular_sip_comparison = summarize_regular_sip(results)
         
         return jsonify({
             'success': True,
@@ -1319,127 +1310,164 @@ def step_up_sip():
         print(f"Step-up SIP error: {str(e)}")
         return jsonify({'success': False, 'error': str(e)})
 
+STEP_UP_ROWS = (('sip_amount', 'amount', 0), ('nav', 'nav', 2), ('units_purchased', 'units', 4),
+                ('total_units', 'total_units', 4), ('invested', 'invested', 0), ('current_value', 'value', 0))
+
 def simulate_step_up_sip_for_fund(fund, start_date, end_date, step_up_percentage):
-    """Simulate step-up SIP for a single fund"""
+    """Simulate step-up SIP for a single fund, with the regular SIP run in the same pass"""
     try:
         start_dt = datetime.strptime(start_date, '%Y-%m-%d')
         end_dt = datetime.strptime(end_date, '%Y-%m-%d')
         
-        # Generate monthly SIP dates
-        sip_dates = pd.date_range(start=start_dt, end=end_dt, freq='MS')
-        
-        current_sip_amount = fund['sip_amount']
-        total_invested = 0
-        total_units = 0
-        monthly_data = []
+        series = load_nav_series(fund['scheme_code'], start_dt, end_dt)
+        txn_dates = sip_schedule(start_dt, end_dt)
         
-        # Mock NAV data (in real implementation, use actual NAV)
-        base_nav = 50 + (hash(fund['scheme_code']) % 100)
+        # Column 0 is the step-up plan, column 1 the flat SIP it is compared with
+        amounts = np.column_stack([
+            step_up_amounts(fund['sip_amount'], len(txn_dates), step_up_percentage),
+            np.full(len(txn_dates), float(fund['sip_amount']))
+        ])
+        sip = run_sip(series.dates, series.navs, txn_dates, amounts)
+        if len(sip['nav']) == 0:
+            return None
         
-        for i, sip_date in enumerate(sip_dates):
-            # Increase SIP amount annually
-            year_number = i // 12
-            if year_number > 0:
-                current_sip_amount = fund['sip_amount'] * ((1 + step_up_percentage/100) ** year_number)
-            
-            # Mock NAV calculation with some volatility
-            months_elapsed = i
-            growth_factor = 1 + (0.12 + (hash(fund['scheme_code']) % 10 - 5) * 0.01) / 12  # 12% base + variation
-            volatility = 0.15 * (hash(str(sip_date)) % 100 - 50) / 100  # Random volatility
-            nav = base_nav * (growth_factor ** months_elapsed) * (1 + volatility)
-            
-            # Calculate units purchased
-            units_purchased = current_sip_amount / nav
-            total_units += units_purchased
-            total_invested += current_sip_amount
-            
-            # Current value
-            current_value = total_units * nav
-            
-            monthly_data.append({
-                'date': sip_date.strftime('%Y-%m-%d'),
-                'sip_amount': round(current_sip_amount, 0),
-                'nav': round(nav, 2),
-                'units_purchased': round(units_purchased, 4),
-                'total_units': round(total_units, 4),
-                'invested': round(total_invested, 0),
-                'current_value': round(current_value, 0)
-            })
+        latest_nav = valuation_nav(series.dates, series.navs, end_dt) or float(sip['nav'][-1])
+        total_units = sip['total_units'][-1]
+        total_invested = sip['invested'][-1]
+        final_value = total_units * latest_nav
         
         # Calculate final metrics
-        final_value = monthly_data[-1]['current_value'] if monthly_data else 0
-        return_pct = ((final_value - total_invested) / total_invested * 100) if total_invested > 0 else 0
+        step_up_invested, step_up_value = float(total_invested[0]), float(final_value[0])
+        return_pct = (step_up_value - step_up_invested) / step_up_invested * 100
         
         # Calculate CAGR
-        years = len(sip_dates) / 12
-        cagr = ((final_value / total_invested) ** (1/years) - 1) * 100 if years > 0 and total_invested > 0 else 0
+        years = len(txn_dates) / 12
+        cagr = ((step_up_value / step_up_invested) ** (1/years) - 1) * 100 if years > 0 else 0
         
-        return {
+        # Chart rows are the step-up plan's columns (column 0), rounded when encoded
+        return SimulationResult.from_sip(sip, plan=0, rows=STEP_UP_ROWS, summary={
             'fund_name': fund['fund_name'],
             'scheme_code': fund['scheme_code'],
             'initial_sip': fund['sip_amount'],
-            'final_sip': round(current_sip_amount, 0),
-            'invested': round(total_invested, 0),
-            'current_value': round(final_value, 0),
+            'final_sip': round(float(sip['amount'][-1, 0]), 0),
+            'invested': round(step_up_invested, 0),
+            'current_value': round(step_up_value, 0),
             'return_pct': round(return_pct, 2),
             'cagr': round(cagr, 2),
-            'total_units': round(total_units, 4),
-            'monthly_data': monthly_data
-        }
+            'total_units': round(float(total_units[0]), 4),
+            'regular_sip': {
+                'invested': float(total_invested[1]),
+                'current_value': float(final_value[1])
+            }
+        })
         
     except Exception as e:
         print(f"Error simulating step-up SIP for fund: {str(e)}")
         return None
 
-def simulate_regular_sip_comparison(funds, start_date, end_date):
-    """Compare step-up SIP with regular SIP"""
+def summarize_regular_sip(fund_results):
+    """Regular SIP totals from simulate_step_up_sip_for_fund results"""
+    total_regular_invested = sum(r.summary['regular_sip']['invested'] for r in fund_results)
+    total_regular_value = sum(r.summary['regular_sip']['current_value'] for r in fund_results)
+    regular_return = ((total_regular_value - total_regular_invested) / total_regular_invested * 100) if total_regular_invested > 0 else 0
+    
+    return {
+        'regular_sip': {
+            'total_invested': round(total_regular_invested, 0),
+            'final_value': round(total_regular_value, 0),
+            'return_percentage': round(regular_return, 2)
+        }
+    }
+
+STRATEGY_DEFAULTS = ('lumpsum', 'sip', 'value_averaging')  # Plus 'stp' when a source fund is given
+
+def strategy_cache_params(data):
+    """(params, scheme_codes) of a /api/strategy-compare body"""
+    params = {key: data.get(key) for key in ('scheme_code', 'source_scheme_code', 'start_date', 'end_date',
+                                            'sip_amount', 'amount', 'strategies')}
+    return params, [code for code in (data['scheme_code'], data.get('source_scheme_code')) if code]
+
+@app.route('/api/strategy-compare', methods=['POST'])
+@cached_response('strategy-compare', strategy_cache_params)
+def strategy_compare():
+    """Compare lumpsum, SIP, STP and value-averaging plans on the same NAV history"""
     try:
-        total_regular_invested = 0
-        total_regular_value = 0
-        
-        for fund in funds:
-            # Simulate regular SIP
-            start_dt = datetime.strptime(start_date, '%Y-%m-%d')
-            end_dt = datetime.strptime(end_date, '%Y-%m-%d')
-            sip_dates = pd.date_range(start=start_dt, end=end_dt, freq='MS')
-            
-            regular_invested = fund['sip_amount'] * len(sip_dates)
-            
-            # Mock final value calculation (simplified)
-            base_nav = 50 + (hash(fund['scheme_code']) % 100)
-            months = len(sip_dates)
-            growth_factor = 1 + 0.12 / 12  # 12% annual return
-            
-            # Simplified SIP calculation
-            total_units = 0
-            for i in range(months):
-                nav = base_nav * (growth_factor ** i)
-                units = fund['sip_amount'] / nav
-                total_units += units
-            
-            final_nav = base_nav * (growth_factor ** months)
-            regular_value = total_units * final_nav
-            
-            total_regular_invested += regular_invested
-            total_regular_value += regular_value
+        data = request.get_json()
+        scheme_code = data['scheme_code']
+        source_code = data.get('source_scheme_code')  # Debt fund that STPs transfer from
+        start_date = datetime.strptime(data.get('start_date'), '%Y-%m-%d')
+        end_date = datetime.strptime(data.get('end_date'), '%Y-%m-%d')
         
-        regular_return = ((total_regular_value - total_regular_invested) / total_regular_invested * 100) if total_regular_invested > 0 else 0
+        # Lumpsum and STP invest what the SIP would over the period, unless told otherwise
+        sip_amount = data.get('sip_amount', 10000)
+        defaults = {
+            'sip_amount': sip_amount,
+            'monthly_target': sip_amount,
+            'amount': data.get('amount', sip_amount * len(sip_schedule(start_date, end_date)))
+        }
+        plans = parse_plans(data.get('strategies') or STRATEGY_DEFAULTS + (('stp',) if source_code else ()),
+                            defaults)
+        
+        scheme_codes = [code for code in (scheme_code, source_code) if code]
+        record_usage(scheme_codes)
+        prefetch_nav_histories(scheme_codes)
+        target = load_nav_series(scheme_code, start_date, end_date)
+        source = load_nav_series(source_code, start_date, end_date) if source_code else None
+        results = compare_strategies(plans, target, start_date, end_date, source)
+        
+        # Returns as process_fund reports them, from each plan's own cash flows
+        years = (end_date - start_date).days / 365
+        for result in results:
+            invested, value = result.summary['invested'], result.summary['current_value']
+            flows = result.amount != 0
+            cash_flows = list(zip(pd.to_datetime(result.dates[flows]), -result.amount[flows]))
+            plan_xirr = xirr(cash_flows + [(end_date, value)])
+            result.summary.update({
+                'invested': round(invested, 2),
+                'current_value': round(value, 2),
+                'return_pct': round((value - invested) / invested * 100, 2) if invested > 0 else None,
+                'xirr': round(plan_xirr * 100, 2) if plan_xirr else None,
+                'cagr': round(cagr(invested, value, years) * 100, 2)
+            })
         
-        return {
-            'regular_sip': {
-                'total_invested': round(total_regular_invested, 0),
-                'final_value': round(total_regular_value, 0),
-                'return_percentage': round(regular_return, 2)
+        ranked = [result.summary for result in results if result.summary['xirr'] is not None]
+        return jsonify({
+            'success': True,
+            'data': {
+                'scheme_code': scheme_code,
+                'source_scheme_code': source_code,
+                'strategies': results,
+                'best_strategy': max(ranked, key=lambda summary: summary['xirr'])['strategy'] if ranked else None,
+                'period': {
+                    'start_date': data['start_date'],
+                    'end_date': data['end_date'],
+                    'instalments': len(results[0])
+                }
             }
-        }
+        })
         
+    except (KeyError, ValueError) as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
     except Exception as e:
-        print(f"Error in regular SIP comparison: {str(e)}")
-        return {}
+        print(f"Strategy comparison error: {str(e)}")
+        return jsonify({'success': False, 'error': str(e)}), 500
 
 @app.route('/')
 def index():
     return "SIP Simulator API is running!"
 
+def warmup():
+    """Load the hot schemes' NAV histories and the search indexes (run before workers fork)"""
+    return warm_caches(
+        hot_schemes([resolve_benchmark()['scheme_code']]),
+        prefetch_nav_histories,
+        NAV_STORE,
+        search_warmers=[FUND_DATA_PROVIDER.warm_search_index, refresh_comprehensive_fund_list]
+    )
+
+# gunicorn's preload_app imports this module in the master: warm up there once
+if WARMUP_ENABLED:
+    warmup()
+
 if __name__ == '__main__':
     app.run(debug=True, host='0.0.0.0', port=5000) 
\ No newline at end of file
@@ -8,6 +8,7 @@ sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 from flask import Flask, jsonify
 from flask_cors import CORS
 from config import DEBUG, HOST, PORT
+from serialization import install as install_serialization
 
 # Import route blueprints
 from routes.simulation_routes import simulation_bp
@@ -17,6 +18,7 @@ from routes.fund_routes import fund_bp
 # Create Flask app
 app = Flask(__name__)
 CORS(app)
+install_serialization(app)  # Encodes the services' SimulationResults
 
 # Register blueprints
 app.register_blueprint(simulation_bp, url_prefix='/api')
@@ -11,20 +11,9 @@ from logging.handlers import RotatingFileHandler
 from flask import Flask, request, jsonify, send_from_directory
 from flask_cors import CORS
 from flask_talisman import Talisman
-import requests
-import pandas as pd
-from datetime import datetime, timedelta
-import json
-from scipy.optimize import newton
-import traceback
+from werkzeug.middleware.proxy_fix import ProxyFix
+from datetime import datetime
 import time
-import random
-import threading
-from concurrent.futures import ThreadPoolExecutor, as_completed
-import functools
-import hashlib
-import numpy as np
-import math
 
 # Add backend directory to Python path
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
@@ -42,6 +31,7 @@ class ProductionConfig:
     REDIS_URL = os.getenv('REDIS_URL', 'redis://localhost:6379/0')
     RATE_LIMIT_ENABLED = os.getenv('RATE_LIMIT_ENABLED', 'True').lower() == 'true'
     RATE_LIMIT_PER_MINUTE = int(os.getenv('RATE_LIMIT_PER_MINUTE', 100))
+    TRUSTED_PROXIES = int(os.getenv('TRUSTED_PROXIES', 1))
     LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
     LOG_FILE = os.getenv('LOG_FILE', 'logs/app.log')
     SECURITY_HEADERS = True
@@ -59,6 +49,11 @@ app = Flask(__name__, static_folder='../frontend', static_url_path='')
 # Load configuration
 app.config.from_object(config)
 
+# Behind nginx (or Render's router) remote_addr is the proxy: take the client
+# address from X-Forwarded-For, trusting only the proxies we sit behind
+if getattr(config, 'TRUSTED_PROXIES', 1):
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_for=config.TRUSTED_PROXIES)
+
 # Setup CORS with production settings
 if getattr(config, 'DEBUG', False):
     CORS(app, origins=['*'])
@@ -76,6 +71,18 @@ if not getattr(config, 'DEBUG', False) and getattr(config, 'SECURITY_HEADERS', T
         'connect-src': "'self' https://api.mfapi.in"
     })
 
+# orjson / MessagePack response encoding (before instrumentation wraps it)
+from serialization import install as install_serialization
+install_serialization(app)
+
+# Stage timing (Server-Timing) headers and opt-in request profiling
+from instrumentation import install as install_instrumentation
+install_instrumentation(app)
+
+# Prometheus metrics on /metrics
+from metrics import install as install_metrics
+install_metrics(app)
+
 # Setup logging
 def setup_logging():
     """Configure production-grade logging"""
@@ -119,73 +126,42 @@ setup_logging()
 
 # Import the main application logic with fallback
 try:
-    from app import (
-        COMPREHENSIVE_FUND_LIST, NAV_CACHE, CACHE_LOCK, SEARCH_CACHE, CACHE_TIMESTAMP,
-        get_cache_key, cache_nav_data, get_cached_nav_data, generate_optimized_mock_nav_data,
-        fetch_nav_optimized, get_comprehensive_fund_list, generate_mock_nav_data,
-        xirr, cagr, process_fund, process_portfolio, process_fund_cumulative,
-        process_portfolio_cumulative, process_funds_parallel, process_fund_cumulative_optimized,
-        process_portfolio_cumulative_optimized, calculate_risk_metrics, generate_nifty50_data,
-        calculate_step_up_sip, calculate_total_step_up_investment, get_recommended_allocation,
-        simulate_step_up_sip_for_fund, simulate_regular_sip_comparison
-    )
+    from app import SEARCH_CACHE, CACHE_TIMESTAMP, get_comprehensive_fund_list
     app.logger.info("Successfully imported all functions from app module")
 except ImportError as e:
     app.logger.error(f"Failed to import from app module: {e}")
-    # Create minimal fallback functions for demonstration
-    COMPREHENSIVE_FUND_LIST = [
-        {"scheme_code": "122639", "fund_name": "Parag Parikh Flexi Cap Fund - Direct Plan - Growth"},
-        {"scheme_code": "120503", "fund_name": "SBI Bluechip Fund - Direct Plan - Growth"},
-        {"scheme_code": "120465", "fund_name": "HDFC Top 100 Fund - Direct Plan - Growth"},
-    ]
-    NAV_CACHE = {}
-    CACHE_LOCK = threading.Lock()
+    # Fall back to the static fund master
+    from fund_master import COMPREHENSIVE_FUND_LIST
     SEARCH_CACHE = {}
     CACHE_TIMESTAMP = 0
     
     def get_comprehensive_fund_list():
         return COMPREHENSIVE_FUND_LIST
-    
-    def calculate_risk_metrics(data):
-        return {'volatility': 15.5, 'sharpe_ratio': 1.2, 'max_drawdown': 8.5}
 
 # Rate limiting decorator
 from functools import wraps
-import time
+from rate_limiter import create_rate_limiter
 
-# Simple rate limiting using in-memory store
-request_counts = {}
-request_lock = threading.Lock()
+# Token buckets shared by all workers on the host (RATE_LIMIT_BACKEND, see rate_limiter.py)
+RATE_LIMITER = create_rate_limiter()
 
 def rate_limit(max_requests=100, per_seconds=60):
-    """Rate limiting decorator"""
+    """Rate limiting decorator: max_requests per per_seconds for each client, per endpoint"""
     def decorator(f):
         @wraps(f)
         def wrapper(*args, **kwargs):
             if not getattr(config, 'RATE_LIMIT_ENABLED', True):
                 return f(*args, **kwargs)
             
-            client_ip = request.remote_addr
-            current_time = time.time()
-            
-            with request_lock:
-                if client_ip not in request_counts:
-                    request_counts[client_ip] = []
-                
-                # Clean old requests
-                request_counts[client_ip] = [
-                    req_time for req_time in request_counts[client_ip]
-                    if current_time - req_time < per_seconds
-                ]
-                
-                # Check rate limit
-                if len(request_counts[client_ip]) >= max_requests:
-                    return jsonify({
-                        'error': 'Rate limit exceeded',
-                        'message': f'Maximum {max_requests} requests per {per_seconds} seconds'
-                    }), 429
-                
-                request_counts[client_ip].append(current_time)
+            client_key = f"{f.__name__}:{request.remote_addr}"
+            allowed, retry_after = RATE_LIMITER.allow(client_key, max_requests, per_seconds)
+            if not allowed:
+                response = jsonify({
+                    'error': 'Rate limit exceeded',
+                    'message': f'Maximum {max_requests} requests per {per_seconds} seconds'
+                })
+                response.headers['Retry-After'] = str(max(1, round(retry_after)))
+                return response, 429
             
             return f(*args, **kwargs)
         return wrapper
@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+"""
+ASGI entry point for SIP Simulator
+Serves the same /api/* routes as the Flask app. Search and the cold-cache
+NAV fetches of fund info and simulations are native async (one aiohttp
+session per process), so a worker can hold thousands of requests waiting
+on a slow upstream; the CPU-bound simulation runs in a thread pool. Every
+other route is the Flask app itself, mounted through a WSGI adapter.
+
+Run: uvicorn asgi:app --app-dir backend --workers 4
+"""
+
+import asyncio
+import logging
+import os
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+
+from a2wsgi import WSGIMiddleware
+from starlette.applications import Starlette
+from starlette.responses import Response
+from starlette.routing import Mount, Route
+from utils.lazy_imports import lazy_import
+from async_fetch import UpstreamStatusError, fetch_nav_histories_async
+from fund_data_sources import MFAPIProvider
+from http_transport import TRANSPORT, http_get
+from serialization import dumps_bytes
+from warmup import record_usage
+
+try:
+    import backend.app as sip_app  # Imported from the repository root
+except ImportError:
+    import app as sip_app  # Run from backend/
+
+aiohttp = lazy_import('aiohttp', optional=True)  # None: upstream calls go through the threaded transport
+
+logger = logging.getLogger(__name__)
+
+ENGINE_THREADS = int(os.getenv('ASGI_ENGINE_THREADS', os.cpu_count() or 4))  # Simulations at once
+IO_THREADS = int(os.getenv('ASGI_IO_THREADS', 32))  # Blocking provider fallbacks
+WSGI_THREADS = int(os.getenv('ASGI_WSGI_THREADS', 16))  # Requests served by the mounted Flask app
+UPSTREAM_CONNECTIONS = int(os.getenv('ASGI_UPSTREAM_CONNECTIONS', 100))  # Per upstream host
+UPSTREAM_TIMEOUT = 15
+
+ENGINE_POOL = ThreadPoolExecutor(max_workers=ENGINE_THREADS, thread_name_prefix='asgi-engine')
+IO_POOL = ThreadPoolExecutor(max_workers=IO_THREADS, thread_name_prefix='asgi-io')
+
+# Scheme code (or 'search') -> task fetching it, so concurrent requests share one upstream call
+_IN_FLIGHT = {}
+
+class JSONResponse(Response):
+    """JSON encoded like the Flask app's responses (orjson, NumPy-aware)"""
+
+    media_type = 'application/json'
+
+    def render(self, content):
+        return dumps_bytes(content)
+
+def run_in(pool, fn, *args):
+    return asyncio.get_running_loop().run_in_executor(pool, fn, *args)
+
+async def get_json(session, url, timeout=UPSTREAM_TIMEOUT):
+    """GET url as JSON, honouring the transport's circuit breaker for its host"""
+    breaker = TRANSPORT.breaker(url)
+    if not breaker.allow():
+        raise ConnectionError(f"Circuit open for {url}")
+    try:
+        if session is None:
+            response = await run_in(IO_POOL, http_get, url, timeout)
+            if response.status_code != 200:
+                raise UpstreamStatusError(response.status_code, url)
+            payload = response.json()
+        else:
+            async with session.get(url, timeout=aiohttp.ClientTimeout(total=timeout)) as response:
+                if response.status != 200:
+                    raise UpstreamStatusError(response.status, url)
+                payload = await response.json(content_type=None)
+    except UpstreamStatusError as e:
+        (breaker.record_success if e.status < 500 else breaker.record_failure)()
+        raise
+    except Exception:
+        breaker.record_failure()
+        raise
+    breaker.record_success()
+    return payload
+
+def not_modified(etag, cache_control):
+    return Response(status_code=304, headers=sip_app.validator_headers(etag, cache_control))
+
+def shared(key, start):
+    """The in-flight task for key, or a new one from start()"""
+    task = _IN_FLIGHT.get(key)
+    if task is None:
+        task = _IN_FLIGHT[key] = asyncio.ensure_future(start())
+        task.add_done_callback(lambda _: _IN_FLIGHT.pop(key, None))
+    return task
+
+# NAV histories
+
+async def prefetch_nav_histories(session, scheme_codes):
+    """Async counterpart of the Flask app's prefetch: cold schemes in one concurrent fetch"""
+    missing = sip_app.missing_nav_histories(scheme_codes)
+    new = [code for code in missing if code not in _IN_FLIGHT]
+    if new:
+        async def fetch():
+            histories = await fetch_nav_histories_async(new, sip_app.NAV_API_BASE_URL, session=session)
+            sip_app.store_nav_histories(histories)
+
+        task = asyncio.ensure_future(fetch())
+        for code in new:
+            _IN_FLIGHT[code] = task
+        task.add_done_callback(lambda _: [_IN_FLIGHT.pop(code, None) for code in new])
+
+    waiting = {_IN_FLIGHT[code] for code in missing if code in _IN_FLIGHT}
+    for outcome in await asyncio.gather(*waiting, return_exceptions=True):
+        if isinstance(outcome, Exception):
+            logger.warning(f"Concurrent NAV fetch failed: {outcome}")
+
+# Search
+
+def mfapi_provider():
+    """The MF API provider behind FUND_DATA_PROVIDER, whose search index can be loaded async"""
+    provider = sip_app.FUND_DATA_PROVIDER
+    for candidate in [provider, *getattr(provider, 'providers', [])]:
+        if isinstance(candidate, MFAPIProvider):
+            return candidate
+    return None
+
+async def load_search_index(session, provider):
+    async def download():
+        funds_list = await get_json(session, f"{provider.base_url}/mf")
+        provider.store_search_index(funds_list)
+
+    try:
+        await shared('search', download)
+    except Exception as e:
+        logger.warning(f"Could not load the MF API scheme list: {e}")
+
+# Handlers
+
+async def health(request):
+    return JSONResponse({'status': 'healthy', 'timestamp': time.time(), 'server': 'asgi'})
+
+async def search_funds(request):
+    """Search for mutual funds; the scheme list is downloaded without blocking the loop"""
+    query = request.query_params.get('q', '').strip()
+    if len(query) < 2:
+        message = 'Please enter a search term' if not query else 'Please enter at least 2 characters'
+        return JSONResponse({'success': True, 'funds': [], 'message': message})
+
+    try:
+        start_time = time.time()
+        funds = []
+        provider = mfapi_provider()
+        if provider is not None and not provider.has_search_index():
+            await load_search_index(request.app.state.session, provider)
+
+        if_none_match = request.headers.get('if-none-match')
+        etag = sip_app.search_etag(query)
+        if sip_app.etag_matches(etag, if_none_match):
+            return not_modified(etag, sip_app.SEARCH_CACHE_CONTROL)
+
+        if provider is not None and provider.has_search_index():
+            funds = provider.search_funds(query, limit=50)  # In-memory filter
+        if not funds:
+            # Other providers and the static list, which may block
+            funds = await run_in(IO_POOL, sip_app.FUND_DATA_PROVIDER.search_funds, query, 50)
+        search_time = time.time() - start_time
+
+        if etag is None:
+            etag = sip_app.make_etag('search', query, funds)
+            if sip_app.etag_matches(etag, if_none_match):
+                return not_modified(etag, sip_app.SEARCH_CACHE_CONTROL)
+
+        return JSONResponse({
+            'success': True,
+            'funds': funds,
+            'search_time': round(search_time, 3),
+            'total_results': len(funds),
+            'message': f'Found {len(funds)} funds matching "{query}"'
+        }, headers=sip_app.validator_headers(etag, sip_app.SEARCH_CACHE_CONTROL))
+
+    except Exception as e:
+        logger.error(f"Error in search_funds: {e}")
+        return JSONResponse({'success': False, 'error': f'Search failed: {str(e)}', 'funds': []}, 500)
+
+async def simulate_sip(request):
+    """SIP simulation: NAVs fetched async, the engine run in the engine pool"""
+    try:
+        data = await request.json()
+        funds, start_date, end_date = sip_app.parse_simulation_request(data)
+        scheme_codes = [info['scheme_code'] for info in funds.values()]
+        record_usage(scheme_codes)
+        await prefetch_nav_histories(request.app.state.session, scheme_codes)
+
+        key = None
+        if sip_app.RESPONSE_CACHE.enabled:
+            key = sip_app.response_cache_key('simulate', *sip_app.fund_cache_params(data))
+            body = await run_in(IO_POOL, sip_app.RESPONSE_CACHE.get, key)
+            if body is not None:
+                return Response(body, media_type='application/json', headers={'X-Cache': 'HIT'})
+
+        result = await run_in(ENGINE_POOL, sip_app.process_portfolio, funds, start_date, end_date)
+        response = JSONResponse({'success': True, 'data': result})
+        if key is not None:
+            await run_in(IO_POOL, sip_app.RESPONSE_CACHE.set, key, response.body)
+            response.headers['X-Cache'] = 'MISS'
+        return response
+
+    except Exception as e:
+        return JSONResponse({'success': False, 'error': str(e), 'traceback': traceback.format_exc()}, 500)
+
+async def fund_info(request):
+    """Fund details and recent NAVs from the NAV store, cold schemes fetched async"""
+    try:
+        scheme_code = str(request.path_params['scheme_code'])
+        await prefetch_nav_histories(request.app.state.session, [scheme_code])
+        # If the async fetch failed, NAV_STORE.get tries the providers (blocking)
+        series = sip_app.NAV_STORE.servable(scheme_code) or await run_in(IO_POOL, sip_app.NAV_STORE.get, scheme_code)
+        payload, status, headers = sip_app.fund_info(
+            scheme_code, series, request.query_params.get('window'), request.headers.get('if-none-match')
+        )
+        if payload is None:
+            return Response(status_code=status, headers=headers)
+        return JSONResponse(payload, status, headers=headers)
+
+    except Exception as e:
+        return JSONResponse({'success': False, 'error': str(e)}, 500)
+
+@asynccontextmanager
+async def lifespan(app):
+    """One pooled aiohttp session per process for every upstream call"""
+    app.state.session = None
+    if aiohttp is not None:
+        connector = aiohttp.TCPConnector(limit=0, limit_per_host=UPSTREAM_CONNECTIONS)
+        app.state.session = aiohttp.ClientSession(connector=connector)
+    try:
+        yield
+    finally:
+        if app.state.session is not None:
+            await app.state.session.close()
+
+app = Starlette(
+    routes=[
+        Route('/health', health),
+        Route('/api/search-funds', search_funds, methods=['GET']),
+        Route('/api/simulate', simulate_sip, methods=['POST']),
+        Route('/api/fund-info/{scheme_code}', fund_info, methods=['GET']),
+        # Everything else (risk, goals, step-up, metrics, ...) is the Flask app
+        Mount('/', app=WSGIMiddleware(sip_app.app, workers=WSGI_THREADS)),
+    ],
+    lifespan=lifespan
+)
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Concurrent NAV fetch stage for SIP Simulator
+Fetches the NAV histories of every scheme in a request at once, so a
+cold-cache request costs one upstream round-trip instead of one per fund
+"""
+
+import asyncio
+import logging
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from utils.lazy_imports import lazy_import
+from fund_data_sources import MFAPI_BASE_URL, parse_mfapi_nav
+from http_transport import TRANSPORT, http_get
+
+pd = lazy_import('pandas')
+aiohttp = lazy_import('aiohttp', optional=True)  # None: fall back to the pooled threaded transport
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BASE_URL = MFAPI_BASE_URL
+FETCH_TIMEOUT = 15
+FETCH_CONCURRENCY = int(os.getenv('NAV_FETCH_CONCURRENCY', 16))  # Connections per request
+
+class UpstreamStatusError(IOError):
+    """Non-200 response from the NAV API"""
+
+    def __init__(self, status, url):
+        super().__init__(f"HTTP {status} from {url}")
+        self.status = status
+
+async def _fetch_with_aiohttp(session, url, timeout):
+    async with session.get(url, timeout=aiohttp.ClientTimeout(total=timeout)) as response:
+        if response.status != 200:
+            raise UpstreamStatusError(response.status, url)
+        return await response.json(content_type=None)
+
+async def _fetch_with_threads(url, timeout):
+    response = await asyncio.to_thread(http_get, url, timeout)
+    if response.status_code != 200:
+        raise UpstreamStatusError(response.status_code, url)
+    return response.json()
+
+async def fetch_nav_histories_async(scheme_codes, base_url=DEFAULT_BASE_URL, timeout=FETCH_TIMEOUT, session=None):
+    """Fetch full NAV histories for all schemes concurrently
+
+    Returns {scheme_code: DataFrame}; schemes that could not be fetched map
+    to an empty DataFrame. Shares the transport's circuit breaker, so a
+    host that is known to be down is not hit at all. A long-lived event
+    loop (the ASGI app) passes its own aiohttp session to reuse connections.
+    """
+    codes = list(dict.fromkeys(str(code) for code in scheme_codes))
+    results = {code: pd.DataFrame() for code in codes}
+    if not codes:
+        return results
+
+    breaker = TRANSPORT.breaker(base_url)
+    if not breaker.allow():
+        logger.warning(f"Circuit open for {base_url}, skipping NAV fetch")
+        return results
+
+    urls = [f"{base_url}/mf/{code}" for code in codes]
+    if session is not None:
+        payloads = await asyncio.gather(
+            *[_fetch_with_aiohttp(session, url, timeout) for url in urls], return_exceptions=True
+        )
+    elif aiohttp is not None:
+        connector = aiohttp.TCPConnector(limit_per_host=FETCH_CONCURRENCY)
+        async with aiohttp.ClientSession(connector=connector) as session:
+            payloads = await asyncio.gather(
+                *[_fetch_with_aiohttp(session, url, timeout) for url in urls], return_exceptions=True
+            )
+    else:
+        payloads = await asyncio.gather(
+            *[_fetch_with_threads(url, timeout) for url in urls], return_exceptions=True
+        )
+    return _collect(codes, payloads, results, breaker)
+
+def _collect(codes, payloads, results, breaker):
+    """Parse fetched payloads into results and report the host's health to its breaker"""
+    reachable = False
+    for code, payload in zip(codes, payloads):
+        if isinstance(payload, BaseException):
+            # A 4xx (e.g. unknown scheme) still means the host is up
+            reachable = reachable or (isinstance(payload, UpstreamStatusError) and payload.status < 500)
+            logger.warning(f"NAV fetch failed for {code}: {payload}")
+            continue
+        reachable = True
+        try:
+            results[code] = parse_mfapi_nav(payload)
+        except Exception as e:
+            logger.warning(f"Could not parse NAV data for {code}: {e}")
+
+    if reachable:
+        breaker.record_success()
+    else:
+        breaker.record_failure()
+    return results
+
+def _green():
+    """True in a gevent-patched process, where requests are greenlets sharing one thread
+
+    asyncio keeps one running loop per OS thread, so two greenlets running
+    event loops at once would collide; they fetch through the (patched,
+    cooperative) threaded transport instead.
+    """
+    monkey = sys.modules.get('gevent.monkey')
+    return monkey is not None and monkey.is_module_patched('socket')
+
+def fetch_nav_histories_green(scheme_codes, base_url=DEFAULT_BASE_URL, timeout=FETCH_TIMEOUT):
+    """fetch_nav_histories_async without an event loop, on cooperative (greenlet) threads"""
+    codes = list(dict.fromkeys(str(code) for code in scheme_codes))
+    results = {code: pd.DataFrame() for code in codes}
+    if not codes:
+        return results
+
+    breaker = TRANSPORT.breaker(base_url)
+    if not breaker.allow():
+        logger.warning(f"Circuit open for {base_url}, skipping NAV fetch")
+        return results
+
+    def fetch(url):
+        try:
+            response = http_get(url, timeout)
+            if response.status_code != 200:
+                raise UpstreamStatusError(response.status_code, url)
+            return response.json()
+        except Exception as e:
+            return e
+
+    urls = [f"{base_url}/mf/{code}" for code in codes]
+    with ThreadPoolExecutor(max_workers=min(FETCH_CONCURRENCY, len(urls))) as executor:
+        payloads = list(executor.map(fetch, urls))
+    return _collect(codes, payloads, results, breaker)
+
+def fetch_nav_histories(scheme_codes, base_url=DEFAULT_BASE_URL, timeout=FETCH_TIMEOUT):
+    """Blocking wrapper for synchronous (WSGI) handlers"""
+    if _green():
+        return fetch_nav_histories_green(scheme_codes, base_url, timeout)
+    return asyncio.run(fetch_nav_histories_async(scheme_codes, base_url, timeout))
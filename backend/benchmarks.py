@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Benchmark registry for SIP Simulator
+Maps benchmark keys to NAV series served by the regular NAV pipeline
+"""
+
+import threading
+
+DEFAULT_BENCHMARK = 'nifty50'
+
+# Built-in benchmarks - index funds tracked through the regular NAV pipeline
+BENCHMARK_REGISTRY = {
+    'nifty50': {
+        'name': 'Nifty 50 Index',
+        'scheme_code': '147625',  # UTI Nifty 50 Index Fund
+        'description': 'UTI Nifty 50 Index Fund - Direct Plan - Growth'
+    },
+    'sensex': {
+        'name': 'Sensex',
+        'scheme_code': '147614',  # HDFC Index Fund - Sensex Plan
+        'description': 'HDFC Index Fund - Sensex Plan - Direct Plan - Growth'
+    },
+    'nifty100': {
+        'name': 'Nifty 100 Index',
+        'scheme_code': '143048',  # Axis Nifty 100 Index Fund
+        'description': 'Axis Nifty 100 Index Fund - Direct Plan - Growth'
+    }
+}
+
+REGISTRY_LOCK = threading.Lock()
+
+def register_benchmark(key, name, scheme_code, description=''):
+    """Register (or replace) a benchmark backed by any scheme code"""
+    if not scheme_code:
+        raise ValueError("A benchmark needs a scheme_code")
+
+    with REGISTRY_LOCK:
+        BENCHMARK_REGISTRY[key.lower()] = {
+            'name': name,
+            'scheme_code': str(scheme_code),
+            'description': description
+        }
+
+def resolve_benchmark(benchmark=None):
+    """Resolve a registry key or a raw scheme code to a benchmark definition"""
+    key = str(benchmark or DEFAULT_BENCHMARK).strip()
+
+    with REGISTRY_LOCK:
+        entry = BENCHMARK_REGISTRY.get(key.lower())
+
+    if entry:
+        return dict(entry, key=key.lower())
+
+    # Any scheme in the NAV store can act as a benchmark
+    if key.isdigit():
+        return {
+            'key': key,
+            'name': f'Scheme {key}',
+            'scheme_code': key,
+            'description': ''
+        }
+
+    raise ValueError(f"Unknown benchmark: {key}")
+
+def list_benchmarks():
+    """List registered benchmarks"""
+    with REGISTRY_LOCK:
+        return [dict(entry, key=key) for key, entry in BENCHMARK_REGISTRY.items()]
@@ -32,6 +32,7 @@ class Config:
     # Rate Limiting
     RATE_LIMIT_ENABLED = os.getenv('RATE_LIMIT_ENABLED', 'True').lower() == 'true'
     RATE_LIMIT_PER_MINUTE = int(os.getenv('RATE_LIMIT_PER_MINUTE', 100))
+    TRUSTED_PROXIES = int(os.getenv('TRUSTED_PROXIES', 1))  # Reverse proxies setting X-Forwarded-For
     
     # Logging Configuration
     LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
@@ -145,6 +146,17 @@ def get_config():
     env = os.getenv('FLASK_ENV', 'development')
     return config.get(env, config['default'])
 
+# Settings of the active configuration for modules that import them by name
+ACTIVE_CONFIG = get_config()
+DEBUG = ACTIVE_CONFIG.DEBUG
+HOST = ACTIVE_CONFIG.HOST
+PORT = ACTIVE_CONFIG.PORT
+API_TIMEOUT = ACTIVE_CONFIG.API_TIMEOUT
+RISK_FREE_RATE = ACTIVE_CONFIG.RISK_FREE_RATE
+DEFAULT_EXPECTED_RETURN = ACTIVE_CONFIG.DEFAULT_EXPECTED_RETURN
+DEFAULT_INFLATION_RATE = ACTIVE_CONFIG.DEFAULT_INFLATION_RATE
+ASSET_ALLOCATION_TEMPLATES = ACTIVE_CONFIG.ASSET_ALLOCATION_TEMPLATES
+
 # Data source configuration
 FUND_DATA_SOURCES = {
     'mfapi': {
@@ -4,17 +4,30 @@ Real-time Mutual Fund Data Sources
 Alternative implementations to replace hardcoded fund data
 """
 
-import requests
+import hashlib
 import json
+import os
 import time
-import pandas as pd
 from datetime import datetime, timedelta
 import logging
+from utils.lazy_imports import lazy_import
+from utils.synthetic_market import synthetic_nav_frame
+from http_transport import http_get
+from revalidate import REVALIDATOR, SEARCH_MAX_STALE
+from provider_selection import ProviderSelector
+from singleflight import SingleFlight
+from fund_master import COMPREHENSIVE_FUND_LIST
+
+pd = lazy_import('pandas')
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Upstream endpoints (point them at loadtest/mock_upstream.py for load tests)
+MFAPI_BASE_URL = os.getenv('MFAPI_BASE_URL', 'https://api.mfapi.in').rstrip('/')
+AMFI_NAV_URL = os.getenv('AMFI_NAV_URL', 'https://www.amfiindia.com/spages/NAVAll.txt')
+
 # Data source configuration
 FUND_DATA_SOURCES = {
     'mfapi': {
@@ -55,6 +68,17 @@ FUND_DATA_SOURCES = {
     }
 }
 
+def parse_mfapi_nav(payload):
+    """DataFrame of 'date'/'nav' rows from an MF API scheme payload, its 'meta' kept in df.attrs"""
+    df = pd.DataFrame(payload.get('data', []))
+    if df.empty:
+        return pd.DataFrame()
+    df['date'] = pd.to_datetime(df['date'], format='%d-%m-%Y')
+    df['nav'] = pd.to_numeric(df['nav'], errors='coerce')
+    df = df.dropna().sort_values('date')
+    df.attrs['meta'] = payload.get('meta')
+    return df
+
 class MutualFundDataProvider:
     """Base class for mutual fund data providers"""
     
@@ -73,6 +97,14 @@ class MutualFundDataProvider:
     def get_nav_data(self, scheme_code, start_date=None, end_date=None):
         """Get NAV data for a fund"""
         raise NotImplementedError
+    
+    def warm_search_index(self):
+        """Build the provider's search index ahead of the first search; True if built"""
+        return False
+
+    def search_index_version(self):
+        """Version of the in-memory scheme list searches are served from, or None without one"""
+        return None
 
 class MFAPIProvider(MutualFundDataProvider):
     """
@@ -82,7 +114,10 @@ class MFAPIProvider(MutualFundDataProvider):
     
     def __init__(self):
         super().__init__()
-        self.base_url = "https://api.mfapi.in"
+        self.base_url = MFAPI_BASE_URL
+        # Concurrent cold searches (threaded or gevent workers) share one download
+        self._flight = SingleFlight('mfapi-search')
+        self._index_version = (None, None)  # (search index, its version)
         
     def search_funds(self, query, limit=50):
         """Search funds using MF API"""
@@ -90,49 +125,94 @@ class MFAPIProvider(MutualFundDataProvider):
             # Get all funds list
             cache_key = "all_funds"
             if cache_key in self.cache:
-                cached_time, funds_list = self.cache[cache_key]
-                if time.time() - cached_time < self.cache_duration:
-                    return self._filter_funds(funds_list, query, limit)
+                cached_time, search_index = self.cache[cache_key]
+                age = time.time() - cached_time
+                if age < self.cache_duration:
+                    return self._filter_funds(search_index, query, limit)
+                
+                # Serve the stale list while it is refreshed in the background
+                if age < self.cache_duration + SEARCH_MAX_STALE:
+                    REVALIDATOR.submit(('mfapi', id(self), cache_key), self._fetch_search_index)
+                    return self._filter_funds(search_index, query, limit)
             
             # Fetch fresh data
-            response = requests.get(f"{self.base_url}/mf", timeout=10)
-            if response.status_code == 200:
-                funds_list = response.json()
-                self.cache[cache_key] = (time.time(), funds_list)
-                return self._filter_funds(funds_list, query, limit)
-            else:
-                logger.error(f"MF API error: {response.status_code}")
+            search_index = self._flight.do(cache_key, self._fetch_search_index)
+            if search_index is None:
                 return []
+            return self._filter_funds(search_index, query, limit)
                 
         except Exception as e:
             logger.error(f"Error in MFAPIProvider.search_funds: {e}")
             return []
     
-    def _filter_funds(self, funds_list, query, limit):
+    def warm_search_index(self):
+        return self._fetch_search_index() is not None
+    
+    def has_search_index(self):
+        """Whether search_funds is served from memory (fresh, or stale while revalidating)"""
+        entry = self.cache.get("all_funds")
+        return entry is not None and time.time() - entry[0] < self.cache_duration + SEARCH_MAX_STALE
+    
+    def search_index_version(self):
+        """Digest of the cached scheme list's codes and names, computed once per list"""
+        if not self.has_search_index():
+            return None
+        search_index = self.cache["all_funds"][1]
+        indexed, version = self._index_version
+        if indexed is not search_index:
+            digest = hashlib.sha1()
+            for _, fund in search_index:
+                digest.update(f"{fund['scheme_code']}\t{fund['fund_name']}\n".encode('utf-8'))
+            version = digest.hexdigest()
+            self._index_version = (search_index, version)
+        return version
+    
+    def store_search_index(self, funds_list):
+        """Cache the search index of a downloaded scheme list"""
+        search_index = self._build_search_index(funds_list)
+        self.cache["all_funds"] = (time.time(), search_index)
+        return search_index
+    
+    def _fetch_search_index(self):
+        """Download the full scheme list and cache its search index"""
+        response = http_get(f"{self.base_url}/mf", timeout=10)
+        if response.status_code != 200:
+            logger.error(f"MF API error: {response.status_code}")
+            return None
+        return self.store_search_index(response.json())
+    
+    @staticmethod
+    def _build_search_index(funds_list):
+        """Lower-cased names paired with ready-made results, built once per fund list"""
+        return [
+            (fund['schemeName'].lower(), {
+                'scheme_code': str(fund['schemeCode']),
+                'fund_name': fund['schemeName'],
+                'fund_house': fund.get('fundHouse', 'Unknown')
+            })
+            for fund in funds_list
+            if 'schemeName' in fund and 'schemeCode' in fund
+        ]
+    
+    def _filter_funds(self, search_index, query, limit):
         """Filter funds based on search query"""
         query_lower = query.lower()
+        words = query_lower.split()
         filtered_funds = []
         
-        for fund in funds_list:
-            if 'schemeName' in fund and 'schemeCode' in fund:
-                fund_name = fund['schemeName'].lower()
-                if (query_lower in fund_name or 
-                    any(word in fund_name for word in query_lower.split())):
-                    filtered_funds.append({
-                        'scheme_code': str(fund['schemeCode']),
-                        'fund_name': fund['schemeName'],
-                        'fund_house': fund.get('fundHouse', 'Unknown')
-                    })
-                    
-                    if len(filtered_funds) >= limit:
-                        break
+        for fund_name, fund in search_index:
+            if query_lower in fund_name or any(word in fund_name for word in words):
+                filtered_funds.append(dict(fund))
+                
+                if len(filtered_funds) >= limit:
+                    break
         
         return filtered_funds
     
     def get_fund_details(self, scheme_code):
         """Get fund details from MF API"""
         try:
-            response = requests.get(f"{self.base_url}/mf/{scheme_code}", timeout=10)
+            response = http_get(f"{self.base_url}/mf/{scheme_code}", timeout=10)
             if response.status_code == 200:
                 data = response.json()
                 return {
@@ -153,18 +233,10 @@ class MFAPIProvider(MutualFundDataProvider):
     def get_nav_data(self, scheme_code, start_date=None, end_date=None):
         """Get NAV data from MF API"""
         try:
-            response = requests.get(f"{self.base_url}/mf/{scheme_code}", timeout=15)
+            response = http_get(f"{self.base_url}/mf/{scheme_code}", timeout=15)
             if response.status_code == 200:
-                data = response.json()
-                nav_data = data.get('data', [])
-                
-                # Convert to DataFrame
-                df = pd.DataFrame(nav_data)
+                df = parse_mfapi_nav(response.json())
                 if not df.empty:
-                    df['date'] = pd.to_datetime(df['date'], format='%d-%m-%Y')
-                    df['nav'] = pd.to_numeric(df['nav'], errors='coerce')
-                    df = df.dropna().sort_values('date')
-                    
                     # Filter by date range if provided
                     if start_date:
                         start_date = pd.to_datetime(start_date)
@@ -213,13 +285,13 @@ class AMFIDataProvider(MutualFundDataProvider):
     
     def __init__(self):
         super().__init__()
-        self.nav_url = "https://www.amfiindia.com/spages/NAVAll.txt"
+        self.nav_url = AMFI_NAV_URL
         
     def search_funds(self, query, limit=50):
         """Search funds using AMFI data"""
         try:
             # Download and parse AMFI NAV file
-            response = requests.get(self.nav_url, timeout=15)
+            response = http_get(self.nav_url, timeout=15)
             if response.status_code == 200:
                 return self._parse_amfi_data(response.text, query, limit)
             return []
@@ -276,43 +348,67 @@ class HybridDataProvider(MutualFundDataProvider):
     Falls back to hardcoded data if all APIs fail
     """
     
-    def __init__(self, rapidapi_key=None):
+    def __init__(self, rapidapi_key=None, providers=None):
         super().__init__()
-        self.providers = [
-            MFAPIProvider(),
-            AMFIDataProvider()
-        ]
+        if providers is None:
+            providers = [
+                MFAPIProvider(),
+                AMFIDataProvider()
+            ]
+            
+            if rapidapi_key:
+                providers.append(RapidAPIProvider(rapidapi_key))
         
-        if rapidapi_key:
-            self.providers.append(RapidAPIProvider(rapidapi_key))
+        self.providers = providers
+        # Adaptive ordering and hedged requests across the providers
+        self.selector = ProviderSelector(self.providers)
     
-    def search_funds(self, query, limit=50):
-        """Try multiple providers for fund search"""
+    def warm_search_index(self):
+        """Warm every provider's search index"""
+        built = False
         for provider in self.providers:
             try:
-                results = provider.search_funds(query, limit)
-                if results:
-                    logger.info(f"Successfully got {len(results)} results from {provider.__class__.__name__}")
-                    return results
+                built = provider.warm_search_index() or built
             except Exception as e:
-                logger.warning(f"Provider {provider.__class__.__name__} failed: {e}")
-                continue
+                logger.warning(f"Provider {self.selector.name(provider)} search warmup failed: {e}")
+        return built
+    
+    def search_index_version(self):
+        """Versions of the providers' in-memory scheme lists, or None if none is loaded"""
+        versions = [provider.search_index_version() for provider in self.providers]
+        if not any(versions):
+            return None
+        return ':'.join(version or '-' for version in versions)
+    
+    def search_funds(self, query, limit=50):
+        """Try multiple providers for fund search"""
+        results, provider = self.selector.call(
+            'search', lambda p: p.search_funds(query, limit), lambda r: bool(r)
+        )
+        if provider is not None:
+            logger.info(f"Successfully got {len(results)} results from {self.selector.name(provider)}")
+            return results
         
         # Fallback to hardcoded data
         logger.warning("All providers failed, falling back to hardcoded data")
         return self._fallback_search(query, limit)
     
-    def get_nav_data(self, scheme_code, start_date=None, end_date=None):
-        """Try multiple providers for NAV data"""
-        for provider in self.providers:
-            try:
-                data = provider.get_nav_data(scheme_code, start_date, end_date)
-                if not data.empty:
-                    logger.info(f"Successfully got NAV data from {provider.__class__.__name__}")
-                    return data
-            except Exception as e:
-                logger.warning(f"Provider {provider.__class__.__name__} failed for NAV data: {e}")
-                continue
+    def get_nav_data(self, scheme_code, start_date=None, end_date=None, fallback=True):
+        """Try multiple providers for NAV data
+
+        With fallback=False an empty DataFrame is returned when every
+        provider fails, instead of generated mock data.
+        """
+        data, provider = self.selector.call(
+            'nav', lambda p: p.get_nav_data(scheme_code, start_date, end_date),
+            lambda df: df is not None and not df.empty
+        )
+        if provider is not None:
+            logger.info(f"Successfully got NAV data from {self.selector.name(provider)}")
+            return data
+        
+        if not fallback:
+            return pd.DataFrame()
         
         # Fallback to mock data
         logger.warning("All providers failed for NAV data, generating mock data")
@@ -320,9 +416,6 @@ class HybridDataProvider(MutualFundDataProvider):
     
     def _fallback_search(self, query, limit):
         """Fallback to hardcoded fund list"""
-        # Import the existing hardcoded list
-        from app import COMPREHENSIVE_FUND_LIST
-        
         query_lower = query.lower()
         filtered_funds = []
         
@@ -335,16 +428,13 @@ class HybridDataProvider(MutualFundDataProvider):
         return filtered_funds
     
     def _generate_fallback_nav_data(self, scheme_code, start_date, end_date):
-        """Generate mock NAV data as fallback"""
-        # Use existing mock data generation logic
-        from app import generate_optimized_mock_nav_data
-        
+        """Generate synthetic NAV data as fallback"""
         if not start_date:
             start_date = datetime.now() - timedelta(days=365)
         if not end_date:
             end_date = datetime.now()
             
-        return generate_optimized_mock_nav_data(scheme_code, start_date, end_date)
+        return synthetic_nav_frame(scheme_code, start_date, end_date)
 
 # Factory function to create the appropriate provider
 def create_fund_data_provider(provider_type="hybrid", **kwargs):
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Fund master for SIP Simulator
+Static list of major Indian mutual funds, used for search when the data
+providers are unavailable. Kept free of heavy imports so search and
+fallback code can use it without loading the simulation stack.
+"""
+
+# Comprehensive static fund list - major Indian mutual funds
+COMPREHENSIVE_FUND_LIST = [
+    # Large Cap Funds
+    {"scheme_code": "122639", "fund_name": "Parag Parikh Flexi Cap Fund - Direct Plan - Growth"},
+    {"scheme_code": "120503", "fund_name": "SBI Bluechip Fund - Direct Plan - Growth"},
+    {"scheme_code": "120465", "fund_name": "HDFC Top 100 Fund - Direct Plan - Growth"},
+    {"scheme_code": "118825", "fund_name": "ICICI Prudential Bluechip Fund - Direct Plan - Growth"},
+    {"scheme_code": "101206", "fund_name": "Reliance Large Cap Fund - Direct Plan - Growth"},
+    {"scheme_code": "120716", "fund_name": "Aditya Birla Sun Life Frontline Equity Fund - Direct Plan - Growth"},
+    {"scheme_code": "118989", "fund_name": "Axis Bluechip Fund - Direct Plan - Growth"},
+    {"scheme_code": "125494", "fund_name": "Canara Robeco Bluechip Equity Fund - Direct Plan - Growth"},
+    {"scheme_code": "147654", "fund_name": "Kotak Bluechip Fund - Direct Plan - Growth"},
+    {"scheme_code": "112090", "fund_name": "DSP Top 100 Equity Fund - Direct Plan - Growth"},
+    
+    # Mid Cap Funds
+    {"scheme_code": "127042", "fund_name": "Motilal Oswal Midcap Fund - Direct Plan - Growth"},
+    {"scheme_code": "119597", "fund_name": "HDFC Mid-Cap Opportunities Fund - Direct Plan - Growth"},
+    {"scheme_code": "118825", "fund_name": "ICICI Prudential MidCap Fund - Direct Plan - Growth"},
+    {"scheme_code": "120444", "fund_name": "SBI Magnum Midcap Fund - Direct Plan - Growth"},
+    {"scheme_code": "143048", "fund_name": "Axis Midcap Fund - Direct Plan - Growth"},
+    {"scheme_code": "112090", "fund_name": "DSP Midcap Fund - Direct Plan - Growth"},
+    {"scheme_code": "101206", "fund_name": "Reliance Mid Cap Fund - Direct Plan - Growth"},
+    {"scheme_code": "118989", "fund_name": "Kotak Emerging Equity Fund - Direct Plan - Growth"},
+    {"scheme_code": "125494", "fund_name": "L&T Midcap Fund - Direct Plan - Growth"},
+    
+    # Small Cap Funds
+    {"scheme_code": "113177", "fund_name": "Nippon India Small Cap Fund - Direct Plan - Growth"},
+    {"scheme_code": "119551", "fund_name": "HDFC Small Cap Fund - Direct Plan - Growth"},
+    {"scheme_code": "120305", "fund_name": "SBI Small Cap Fund - Direct Plan - Growth"},
+    {"scheme_code": "118989", "fund_name": "Axis Small Cap Fund - Direct Plan - Growth"},
+    {"scheme_code": "101206", "fund_name": "Reliance Small Cap Fund - Direct Plan - Growth"},
+    {"scheme_code": "147654", "fund_name": "Kotak Small Cap Fund - Direct Plan - Growth"},
+    {"scheme_code": "112090", "fund_name": "DSP Small Cap Fund - Direct Plan - Growth"},
+    {"scheme_code": "143048", "fund_name": "ICICI Prudential Smallcap Fund - Direct Plan - Growth"},
+    
+    # Index Funds
+    {"scheme_code": "147625", "fund_name": "UTI Nifty 50 Index Fund - Direct Plan - Growth"},
+    {"scheme_code": "147614", "fund_name": "HDFC Index Fund - Sensex Plan - Direct Plan - Growth"},
+    {"scheme_code": "120503", "fund_name": "SBI Nifty Index Fund - Direct Plan - Growth"},
+    {"scheme_code": "118825", "fund_name": "ICICI Prudential Nifty Index Fund - Direct Plan - Growth"},
+    {"scheme_code": "112090", "fund_name": "DSP Nifty 50 Index Fund - Direct Plan - Growth"},
+    {"scheme_code": "147654", "fund_name": "Kotak Nifty Index Fund - Direct Plan - Growth"},
+    {"scheme_code": "143048", "fund_name": "Axis Nifty 100 Index Fund - Direct Plan - Growth"},
+    {"scheme_code": "101206", "fund_name": "Reliance Index Fund - Sensex Plan - Direct Plan - Growth"},
+    {"scheme_code": "125494", "fund_name": "L&T Nifty Index Fund - Direct Plan - Growth"},
+    
+    # Multi Cap / Flexi Cap Funds
+    {"scheme_code": "122639", "fund_name": "Parag Parikh Flexi Cap Fund - Direct Plan - Growth"},
+    {"scheme_code": "118825", "fund_name": "ICICI Prudential Multicap Fund - Direct Plan - Growth"},
+    {"scheme_code": "120503", "fund_name": "SBI Flexicap Fund - Direct Plan - Growth"},
+    {"scheme_code": "119597", "fund_name": "HDFC Flexicap Fund - Direct Plan - Growth"},
+    {"scheme_code": "143048", "fund_name": "Axis Flexicap Fund - Direct Plan - Growth"},
+    {"scheme_code": "101206", "fund_name": "Reliance Multi Cap Fund - Direct Plan - Growth"},
+    {"scheme_code": "147654", "fund_name": "Kotak Flexicap Fund - Direct Plan - Growth"},
+    {"scheme_code": "112090", "fund_name": "DSP Flexicap Fund - Direct Plan - Growth"},
+    
+    # Sectoral / Thematic Funds
+    {"scheme_code": "118825", "fund_name": "ICICI Prudential Technology Fund - Direct Plan - Growth"},
+    {"scheme_code": "120503", "fund_name": "SBI IT Fund - Direct Plan - Growth"},
+    {"scheme_code": "119597", "fund_name": "HDFC Banking and Financial Services Fund - Direct Plan - Growth"},
+    {"scheme_code": "143048", "fund_name": "Axis Banking & Financial Services Fund - Direct Plan - Growth"},
+    {"scheme_code": "101206", "fund_name": "Reliance Pharma Fund - Direct Plan - Growth"},
+    {"scheme_code": "147654", "fund_name": "Kotak Infrastructure & Economic Reform Fund - Direct Plan - Growth"},
+    {"scheme_code": "112090", "fund_name": "DSP Healthcare Fund - Direct Plan - Growth"},
+    {"scheme_code": "125494", "fund_name": "L&T Infrastructure Fund - Direct Plan - Growth"},
+    
+    # ELSS Funds
+    {"scheme_code": "120503", "fund_name": "SBI Long Term Equity Fund - Direct Plan - Growth"},
+    {"scheme_code": "118825", "fund_name": "ICICI Prudential Long Term Equity Fund - Direct Plan - Growth"},
+    {"scheme_code": "119597", "fund_name": "HDFC TaxSaver - Direct Plan - Growth"},
+    {"scheme_code": "143048", "fund_name": "Axis Long Term Equity Fund - Direct Plan - Growth"},
+    {"scheme_code": "101206", "fund_name": "Reliance Tax Saver ELSS Fund - Direct Plan - Growth"},
+    {"scheme_code": "147654", "fund_name": "Kotak Tax Saver Fund - Direct Plan - Growth"},
+    {"scheme_code": "112090", "fund_name": "DSP Tax Saver Fund - Direct Plan - Growth"},
+    
+    # Debt Funds
+    {"scheme_code": "120503", "fund_name": "SBI Corporate Bond Fund - Direct Plan - Growth"},
+    {"scheme_code": "118825", "fund_name": "ICICI Prudential Corporate Bond Fund - Direct Plan - Growth"},
+    {"scheme_code": "119597", "fund_name": "HDFC Corporate Bond Fund - Direct Plan - Growth"},
+    {"scheme_code": "143048", "fund_name": "Axis Corporate Debt Fund - Direct Plan - Growth"},
+    {"scheme_code": "101206", "fund_name": "Reliance Corporate Bond Fund - Direct Plan - Growth"},
+    {"scheme_code": "147654", "fund_name": "Kotak Corporate Bond Fund - Direct Plan - Growth"},
+    {"scheme_code": "112090", "fund_name": "DSP Corporate Bond Fund - Direct Plan - Growth"},
+    
+    # Hybrid Funds
+    {"scheme_code": "120503", "fund_name": "SBI Equity Hybrid Fund - Direct Plan - Growth"},
+    {"scheme_code": "118825", "fund_name": "ICICI Prudential Equity & Debt Fund - Direct Plan - Growth"},
+    {"scheme_code": "119597", "fund_name": "HDFC Hybrid Equity Fund - Direct Plan - Growth"},
+    {"scheme_code": "143048", "fund_name": "Axis Hybrid Fund - Direct Plan - Growth"},
+    {"scheme_code": "101206", "fund_name": "Reliance Hybrid Fund - Direct Plan - Growth"},
+    {"scheme_code": "147654", "fund_name": "Kotak Equity Hybrid Fund - Direct Plan - Growth"},
+    
+    # International Funds
+    {"scheme_code": "122639", "fund_name": "Parag Parikh Flexi Cap Fund - Direct Plan - Growth"},
+    {"scheme_code": "127042", "fund_name": "Motilal Oswal NASDAQ 100 Fund - Direct Plan - Growth"},
+    {"scheme_code": "143048", "fund_name": "Axis Global Innovation Fund - Direct Plan - Growth"},
+    {"scheme_code": "118825", "fund_name": "ICICI Prudential US Bluechip Equity Fund - Direct Plan - Growth"},
+    {"scheme_code": "119597", "fund_name": "HDFC International Advantage Fund - Direct Plan - Growth"},
+    
+    # Additional Popular Funds
+    {"scheme_code": "125494", "fund_name": "Canara Robeco Equity Diversified Fund - Direct Plan - Growth"},
+    {"scheme_code": "118989", "fund_name": "UTI Mastershare Fund - Direct Plan - Growth"},
+    {"scheme_code": "147625", "fund_name": "Tata Large Cap Fund - Direct Plan - Growth"},
+    {"scheme_code": "113177", "fund_name": "Franklin India Bluechip Fund - Direct Plan - Growth"},
+    {"scheme_code": "120444", "fund_name": "Invesco India Growth Opportunities Fund - Direct Plan - Growth"},
+    {"scheme_code": "112090", "fund_name": "Mirae Asset Large Cap Fund - Direct Plan - Growth"},
+    {"scheme_code": "143048", "fund_name": "Sundaram Large Cap Fund - Direct Plan - Growth"},
+    {"scheme_code": "101206", "fund_name": "Nippon India Large Cap Fund - Direct Plan - Growth"},
+    {"scheme_code": "147654", "fund_name": "Aditya Birla Sun Life Equity Fund - Direct Plan - Growth"},
+    {"scheme_code": "125494", "fund_name": "UTI Equity Fund - Direct Plan - Growth"},
+    
+    # More Scheme Codes for Popular Funds
+    {"scheme_code": "120305", "fund_name": "SBI Contra Fund - Direct Plan - Growth"},
+    {"scheme_code": "119550", "fund_name": "HDFC Equity Fund - Direct Plan - Growth"},
+    {"scheme_code": "118989", "fund_name": "Axis Long Term Equity Fund - Direct Plan - Growth"},
+    {"scheme_code": "147625", "fund_name": "UTI Value Opportunities Fund - Direct Plan - Growth"},
+    {"scheme_code": "113177", "fund_name": "Franklin India Prima Fund - Direct Plan - Growth"},
+    {"scheme_code": "120444", "fund_name": "Invesco India Contra Fund - Direct Plan - Growth"},
+    {"scheme_code": "112090", "fund_name": "Mirae Asset Emerging Bluechip Fund - Direct Plan - Growth"},
+    {"scheme_code": "143048", "fund_name": "Sundaram Select Midcap Fund - Direct Plan - Growth"},
+    {"scheme_code": "101206", "fund_name": "Nippon India Value Fund - Direct Plan - Growth"},
+    {"scheme_code": "147654", "fund_name": "Aditya Birla Sun Life Pure Value Fund - Direct Plan - Growth"}
+]
@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Shared HTTP transport for SIP Simulator data providers
+One pooled keep-alive session per worker process, bounded concurrency per
+upstream host, retries with jittered exponential backoff and a circuit
+breaker that fails fast while an upstream is down
+"""
+
+import os
+import random
+import threading
+import time
+from urllib.parse import urlsplit
+import requests
+from requests.adapters import HTTPAdapter
+
+# Settings (see env.example)
+POOL_SIZE = int(os.getenv('HTTP_POOL_SIZE', 10))
+MAX_PER_HOST = int(os.getenv('HTTP_MAX_PER_HOST', 4))
+ACQUIRE_TIMEOUT = float(os.getenv('HTTP_ACQUIRE_TIMEOUT', 5))
+RETRIES = int(os.getenv('HTTP_RETRIES', 2))
+BACKOFF_BASE = float(os.getenv('HTTP_BACKOFF_BASE', 0.25))
+BACKOFF_MAX = float(os.getenv('HTTP_BACKOFF_MAX', 4))
+BREAKER_THRESHOLD = int(os.getenv('HTTP_BREAKER_THRESHOLD', 5))
+BREAKER_COOLDOWN = float(os.getenv('HTTP_BREAKER_COOLDOWN', 30))
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+class CircuitOpenError(requests.RequestException):
+    """Raised without calling upstream while its circuit breaker is open"""
+
+class HostBusyError(requests.RequestException):
+    """Raised when no per-host connection slot frees up in time"""
+
+class CircuitBreaker:
+    """Opens after `threshold` consecutive failures; allows one probe per cooldown"""
+
+    def __init__(self, threshold=BREAKER_THRESHOLD, cooldown=BREAKER_COOLDOWN):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at = None
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return 'closed'
+        return 'half-open' if time.monotonic() - self.opened_at >= self.cooldown else 'open'
+
+    def allow(self):
+        """Whether a request may go upstream now"""
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            if time.monotonic() - self.opened_at >= self.cooldown:
+                # Half-open: let this request probe, hold the rest for another cooldown
+                self.opened_at = time.monotonic()
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.failures >= self.threshold:
+                self.opened_at = time.monotonic()
+
+class HTTPTransport:
+    """Pooled, retrying, per-host bounded HTTP GETs"""
+
+    def __init__(self, pool_size=POOL_SIZE, max_per_host=MAX_PER_HOST, acquire_timeout=ACQUIRE_TIMEOUT,
+                 retries=RETRIES, backoff_base=BACKOFF_BASE, backoff_max=BACKOFF_MAX,
+                 breaker_threshold=BREAKER_THRESHOLD, breaker_cooldown=BREAKER_COOLDOWN):
+        self.pool_size = pool_size
+        self.max_per_host = max_per_host
+        self.acquire_timeout = acquire_timeout
+        self.retries = retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.breaker_threshold = breaker_threshold
+        self.breaker_cooldown = breaker_cooldown
+        self.reset()
+
+    def reset(self):
+        """Drop the session, host slots and breakers (e.g. in a forked worker)
+
+        The lock is recreated as the parent may have held it when forking,
+        and the jitter generator reseeded so workers don't back off in step.
+        """
+        self._lock = threading.Lock()
+        self._random = random.Random()
+        self._session = None
+        self._slots = {}
+        self._breakers = {}
+
+    @property
+    def session(self):
+        with self._lock:
+            if self._session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=self.pool_size, pool_maxsize=self.pool_size, max_retries=0)
+                session.mount('http://', adapter)
+                session.mount('https://', adapter)
+                self._session = session
+            return self._session
+
+    def _host_state(self, host):
+        with self._lock:
+            if host not in self._slots:
+                self._slots[host] = threading.BoundedSemaphore(self.max_per_host)
+                self._breakers[host] = CircuitBreaker(self.breaker_threshold, self.breaker_cooldown)
+            return self._slots[host], self._breakers[host]
+
+    def breaker(self, url):
+        """Circuit breaker guarding the host of url"""
+        return self._host_state(urlsplit(url).netloc)[1]
+
+    def _backoff(self, attempt):
+        """Full-jitter exponential backoff"""
+        return self._random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    def get(self, url, timeout=10, **kwargs):
+        """GET with pooling, per-host limits, retries and circuit breaking"""
+        host = urlsplit(url).netloc
+        slots, breaker = self._host_state(host)
+
+        if not breaker.allow():
+            raise CircuitOpenError(f"Circuit open for {host}")
+
+        for attempt in range(self.retries + 1):
+            if not slots.acquire(timeout=self.acquire_timeout):
+                raise HostBusyError(f"No free connection slot for {host}")
+            try:
+                response = self.session.get(url, timeout=timeout, **kwargs)
+            except (requests.ConnectionError, requests.Timeout):
+                response = None
+                if attempt == self.retries:
+                    breaker.record_failure()
+                    raise
+            finally:
+                slots.release()
+
+            if response is not None:
+                if response.status_code not in RETRY_STATUSES:
+                    breaker.record_success()
+                    return response
+                if attempt == self.retries:
+                    breaker.record_failure()
+                    return response
+                response.close()
+
+            time.sleep(self._backoff(attempt))
+
+# Process-wide transport; forked workers start with a fresh session
+TRANSPORT = HTTPTransport()
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=TRANSPORT.reset)
+
+def http_get(url, timeout=10, **kwargs):
+    """GET through the shared transport"""
+    return TRANSPORT.get(url, timeout=timeout, **kwargs)
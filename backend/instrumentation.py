@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+Request instrumentation for SIP Simulator
+Stage timers (fetch, nav, sip, xirr, risk, serialize) are collected per
+request in a context variable and returned as a Server-Timing header.
+Requests carrying an X-Profile header can also be profiled, when
+PROFILE_REQUESTS is enabled: 'sample' runs a statistical profiler that
+writes folded stacks (flamegraph.pl / speedscope input), 'cprofile' writes
+a pstats file.
+"""
+
+import contextvars
+import cProfile
+import functools
+import logging
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+
+logger = logging.getLogger(__name__)
+
+PROFILE_REQUESTS = os.getenv('PROFILE_REQUESTS', '').lower() in ('1', 'true', 'yes')
+PROFILE_TOKEN = os.getenv('PROFILE_TOKEN', '')  # When set, X-Profile-Token must match
+PROFILE_DIR = os.getenv('PROFILE_DIR', 'logs/profiles')
+PROFILE_INTERVAL = float(os.getenv('PROFILE_INTERVAL', 0.005))  # Sampling period (seconds)
+
+_TIMINGS = contextvars.ContextVar('sip_stage_timings', default=None)
+
+class StageTimings:
+    """Accumulated duration and call count per stage of one request"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.stages = {}
+        self._lock = threading.Lock()  # Stages also run in executor threads
+
+    def add(self, name, seconds):
+        with self._lock:
+            total, count = self.stages.get(name, (0.0, 0))
+            self.stages[name] = (total + seconds, count + 1)
+
+    def header(self):
+        """Server-Timing value; durations in milliseconds, repeated stages summed"""
+        with self._lock:
+            stages = list(self.stages.items())
+        parts = [
+            f'{name};dur={total * 1000:.1f}' + (f';desc="x{count}"' if count > 1 else '')
+            for name, (total, count) in stages
+        ]
+        parts.append(f'total;dur={(time.perf_counter() - self.started) * 1000:.1f}')
+        return ', '.join(parts)
+
+def start_request():
+    timings = StageTimings()
+    _TIMINGS.set(timings)
+    return timings
+
+def current_timings():
+    return _TIMINGS.get()
+
+class stage:
+    """Time a block as a named stage of the current request (no-op outside requests)"""
+
+    __slots__ = ('name', 'timings', 'started')
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.timings = _TIMINGS.get()
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        if self.timings is not None:
+            self.timings.add(self.name, time.perf_counter() - self.started)
+        return False
+
+def timed(name):
+    """Decorator form of stage"""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with stage(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def propagate_context(fn):
+    """fn bound to a copy of the caller's context, so stages in executor threads are recorded"""
+    return functools.partial(contextvars.copy_context().run, fn)
+
+# Profiling
+
+class SamplingProfiler:
+    """Statistical profiler for one thread, aggregating folded stacks"""
+
+    def __init__(self, thread_id, interval=PROFILE_INTERVAL):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='profile-sampler', daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            self.stacks[';'.join(reversed(stack))] += 1
+
+    def write(self, path):
+        """Folded stacks, one 'frame;frame;... count' line per distinct stack"""
+        with open(path, 'w') as f:
+            for folded, count in self.stacks.most_common():
+                f.write(f"{folded} {count}\n")
+
+class CProfileProfiler:
+    """Deterministic profiler for the calling thread"""
+
+    def __init__(self):
+        self.profile = cProfile.Profile()
+
+    def start(self):
+        self.profile.enable()
+
+    def stop(self):
+        self.profile.disable()
+
+    def write(self, path):
+        self.profile.dump_stats(path)
+
+PROFILERS = {'sample': ('.folded', SamplingProfiler), 'cprofile': ('.pstats', CProfileProfiler)}
+
+# One profile at a time per process keeps the overhead bounded
+_PROFILE_LOCK = threading.Lock()
+
+def _requested_profiler(request):
+    mode = request.headers.get('X-Profile', '').strip().lower()
+    if not PROFILE_REQUESTS or mode not in PROFILERS:
+        return None
+    if PROFILE_TOKEN and request.headers.get('X-Profile-Token') != PROFILE_TOKEN:
+        return None
+    return mode
+
+def install(app):
+    """Add stage timing (and opt-in profiling) to every request of a Flask app"""
+    from flask import g, request
+
+    provider = app.json
+    response = provider.response
+
+    @functools.wraps(response)
+    def timed_response(*args, **kwargs):
+        with stage('serialize'):
+            return response(*args, **kwargs)
+
+    provider.response = timed_response
+
+    @app.before_request
+    def _start_instrumentation():
+        start_request()
+        mode = _requested_profiler(request)
+        if mode and _PROFILE_LOCK.acquire(blocking=False):
+            suffix, profiler_class = PROFILERS[mode]
+            profiler = profiler_class(threading.get_ident()) if mode == 'sample' else profiler_class()
+            g.sip_profile = (profiler, suffix)
+            profiler.start()
+
+    @app.after_request
+    def _finish_instrumentation(response):
+        profile = g.pop('sip_profile', None)
+        if profile is not None:
+            profiler, suffix = profile
+            try:
+                profiler.stop()
+                os.makedirs(PROFILE_DIR, exist_ok=True)
+                name = f"{time.strftime('%Y%m%d-%H%M%S')}-{request.endpoint}-{uuid.uuid4().hex[:8]}{suffix}"
+                profiler.write(os.path.join(PROFILE_DIR, name))
+                response.headers['X-Profile-Output'] = name
+            except Exception as e:
+                logger.warning(f"Could not write request profile: {e}")
+            finally:
+                _PROFILE_LOCK.release()
+
+        timings = current_timings()
+        if timings is not None:
+            response.headers['Server-Timing'] = timings.header()
+        return response
+
+    @app.teardown_request
+    def _end_instrumentation(error=None):
+        _TIMINGS.set(None)
+        # A request that failed before after_request still frees the profiler
+        profile = g.pop('sip_profile', None)
+        if profile is not None:
+            profile[0].stop()
+            _PROFILE_LOCK.release()
+
+    return app
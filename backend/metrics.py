@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Prometheus metrics for SIP Simulator
+Request latency per route, NAV cache events, provider latency and errors,
+XIRR solver iterations and thread-pool queue depths, exported on /metrics.
+Under gunicorn, PROMETHEUS_MULTIPROC_DIR (set in gunicorn.conf.py) makes
+every worker write its samples to shared files, and /metrics aggregates
+them across workers. Without prometheus_client the helpers are no-ops.
+"""
+
+import logging
+import os
+import time
+
+try:
+    from prometheus_client import (
+        CollectorRegistry, Counter, Gauge, Histogram, CONTENT_TYPE_LATEST, generate_latest, multiprocess
+    )
+except ImportError:  # Metrics are optional
+    Counter = None
+
+logger = logging.getLogger(__name__)
+
+MULTIPROC_DIR = os.getenv('PROMETHEUS_MULTIPROC_DIR') or os.getenv('prometheus_multiproc_dir')
+
+if Counter is not None:
+    REQUEST_LATENCY = Histogram(
+        'sip_request_duration_seconds', 'Request latency by route',
+        ['route', 'method', 'status'],
+        buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+    )
+    REQUESTS_IN_PROGRESS = Gauge(
+        'sip_requests_in_progress', 'Requests being handled', multiprocess_mode='livesum'
+    )
+    CACHE_EVENTS = Counter(
+        'sip_cache_events_total', 'Cache lookups (hit, stale, miss) and evictions', ['cache', 'event']
+    )
+    PROVIDER_LATENCY = Histogram(
+        'sip_provider_call_duration_seconds', 'Upstream data provider calls by outcome',
+        ['provider', 'operation', 'outcome'],
+        buckets=(0.05, 0.1, 0.25, 0.5, 1, 2, 4, 8, 15, 30)
+    )
+    XIRR_ITERATIONS = Histogram(
+        'sip_xirr_iterations', 'Newton iterations per converged XIRR solve',
+        buckets=(1, 2, 3, 4, 5, 6, 8, 10, 15, 20, 30, 50)
+    )
+    XIRR_FAILURES = Counter('sip_xirr_failures_total', 'XIRR solves that did not converge')
+    POOL_QUEUE_DEPTH = Gauge(
+        'sip_pool_queue_depth', 'Tasks waiting for a worker thread', ['pool'], multiprocess_mode='livesum'
+    )
+
+def cache_event(cache, event, count=1):
+    if Counter is not None and count:
+        CACHE_EVENTS.labels(cache, event).inc(count)
+
+def observe_provider(provider, operation, seconds, ok):
+    if Counter is not None:
+        PROVIDER_LATENCY.labels(provider, operation, 'ok' if ok else 'error').observe(seconds)
+
+def observe_xirr(iterations=None, converged=True):
+    if Counter is None:
+        return
+    if converged:
+        XIRR_ITERATIONS.observe(iterations)
+    else:
+        XIRR_FAILURES.inc()
+
+def track_queue(pool, fn):
+    """fn counted in pool's queue depth from now until a worker thread starts it"""
+    if Counter is None:
+        return fn
+    depth = POOL_QUEUE_DEPTH.labels(pool)
+    depth.inc()
+
+    def run(*args, **kwargs):
+        depth.dec()
+        return fn(*args, **kwargs)
+    return run
+
+def render():
+    """(body, content_type) of the exposition, aggregated across workers in multiprocess mode"""
+    if MULTIPROC_DIR:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(), CONTENT_TYPE_LATEST
+
+def mark_process_dead(pid):
+    """Drop a dead worker's live gauges (gunicorn child_exit hook)"""
+    if Counter is not None and MULTIPROC_DIR:
+        multiprocess.mark_process_dead(pid)
+
+def install(app):
+    """Time every request of a Flask app and serve /metrics"""
+    from flask import Response, g, jsonify, request
+
+    @app.before_request
+    def _start_request_metrics():
+        g.metrics_started = time.perf_counter()
+        if Counter is not None:
+            REQUESTS_IN_PROGRESS.inc()
+
+    @app.after_request
+    def _observe_request(response):
+        started = g.get('metrics_started')
+        if Counter is not None and started is not None:
+            route = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+            REQUEST_LATENCY.labels(route, request.method, str(response.status_code)).observe(
+                time.perf_counter() - started
+            )
+        return response
+
+    @app.teardown_request
+    def _end_request_metrics(error=None):
+        if Counter is not None and g.pop('metrics_started', None) is not None:
+            REQUESTS_IN_PROGRESS.dec()
+
+    @app.route('/metrics')
+    def metrics_endpoint():
+        """Prometheus exposition of request, cache, provider and engine metrics"""
+        if Counter is None:
+            return jsonify({'error': 'prometheus_client is not installed'}), 503
+        try:
+            body, content_type = render()
+            return Response(body, content_type=content_type)
+        except Exception as e:
+            logger.error(f"Error rendering metrics: {e}")
+            return jsonify({'success': False, 'error': str(e)}), 500
+
+    return app
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+NAV store for SIP Simulator
+Keeps the full NAV history of each scheme as NumPy arrays so every date
+range is a cheap slice of the same cached series
+"""
+
+import threading
+import time
+import numpy as np
+from utils.lazy_imports import lazy_import
+from revalidate import REVALIDATOR
+from metrics import cache_event
+
+pd = lazy_import('pandas')
+
+class NAVSeries:
+    """NAV history of one scheme as sorted date (datetime64[D]) and NAV arrays
+
+    meta is the provider's scheme metadata (fund house, name, type,
+    category) when the history came with it, else None.
+    """
+
+    __slots__ = ('scheme_code', 'dates', 'navs', 'fetched_at', 'meta')
+
+    def __init__(self, scheme_code, dates, navs, fetched_at=None, meta=None):
+        self.scheme_code = scheme_code
+        self.dates = dates
+        self.navs = navs
+        self.fetched_at = fetched_at if fetched_at is not None else time.time()
+        self.meta = meta
+
+    @classmethod
+    def from_frame(cls, scheme_code, df):
+        """Build a series from a provider DataFrame with 'date' and 'nav' columns (and meta in df.attrs)"""
+        if df is None or df.empty:
+            return cls(scheme_code, np.array([], dtype='datetime64[D]'), np.array([], dtype=float))
+        meta = df.attrs.get('meta')
+        df = df.dropna(subset=['date', 'nav']).sort_values('date')
+        dates = pd.to_datetime(df['date']).to_numpy().astype('datetime64[D]')
+        navs = df['nav'].to_numpy(dtype=float)
+        return cls(scheme_code, dates, navs, meta=meta)
+
+    def __len__(self):
+        return len(self.navs)
+
+    def window(self, start_date=None, end_date=None):
+        """Slice of the series between start_date and end_date (inclusive)"""
+        lo = 0 if start_date is None else np.searchsorted(self.dates, np.datetime64(pd.Timestamp(start_date).date()), 'left')
+        hi = len(self.dates) if end_date is None else np.searchsorted(self.dates, np.datetime64(pd.Timestamp(end_date).date()), 'right')
+        return NAVSeries(self.scheme_code, self.dates[lo:hi], self.navs[lo:hi], self.fetched_at, self.meta)
+
+    def tail(self, count):
+        """The latest count NAVs"""
+        return NAVSeries(self.scheme_code, self.dates[-count:], self.navs[-count:], self.fetched_at, self.meta)
+
+    def to_frame(self):
+        """DataFrame view in the providers' 'date'/'nav' format"""
+        return pd.DataFrame({
+            'date': pd.to_datetime(self.dates),
+            'nav': self.navs
+        })
+
+class NAVStore:
+    """Thread-safe per-scheme cache of full NAV histories
+
+    loader(scheme_code) must return a DataFrame with 'date' and 'nav'
+    columns (empty when no real data is available). Entries past their ttl
+    are served for up to max_stale more seconds while a background refresh
+    reloads them.
+    """
+
+    def __init__(self, loader, ttl=3600, min_records=10, miss_ttl=60, max_stale=0, revalidator=REVALIDATOR):
+        self.loader = loader
+        self.ttl = ttl
+        self.max_stale = max_stale
+        self.revalidator = revalidator
+        self.min_records = min_records
+        self.miss_ttl = miss_ttl
+        self._series = {}
+        self._misses = {}
+        self._lock = threading.Lock()
+
+    def peek(self, scheme_code):
+        """Cached series if present and fresh, without loading"""
+        with self._lock:
+            series = self._series.get(scheme_code)
+        if series is not None and time.time() - series.fetched_at < self.ttl:
+            return series
+        return None
+
+    def servable(self, scheme_code):
+        """Cached series if fresh, or stale within max_stale (scheduling a refresh)
+
+        Never blocks on the loader.
+        """
+        with self._lock:
+            series = self._series.get(scheme_code)
+        if series is None:
+            return None
+
+        age = time.time() - series.fetched_at
+        if age < self.ttl:
+            return series
+        if age < self.ttl + self.max_stale:
+            # A refresh that just failed is not retried until miss_ttl passes
+            if not self.recently_missing(scheme_code):
+                self.revalidator.submit(('nav', id(self), scheme_code), self.refresh, scheme_code)
+            return series
+        return None
+
+    def get(self, scheme_code):
+        """Series for a scheme, loading it when missing or too stale to serve"""
+        series = self.servable(scheme_code)
+        if series is not None:
+            cache_event('nav_store', 'hit' if time.time() - series.fetched_at < self.ttl else 'stale')
+            return series
+        cache_event('nav_store', 'miss')
+        if self.recently_missing(scheme_code):
+            return None
+        return self.refresh(scheme_code)
+
+    def refresh(self, scheme_code):
+        """Reload a scheme; a failed reload leaves any cached series in place"""
+        series = NAVSeries.from_frame(scheme_code, self.loader(scheme_code))
+        if len(series) <= self.min_records:
+            self.mark_missing(scheme_code)
+            return None
+
+        with self._lock:
+            self._series[scheme_code] = series
+            self._misses.pop(scheme_code, None)
+        return series
+
+    def put(self, scheme_code, df):
+        """Store a DataFrame fetched elsewhere (e.g. a batch prefetch)"""
+        series = NAVSeries.from_frame(scheme_code, df)
+        with self._lock:
+            self._series[scheme_code] = series
+            self._misses.pop(scheme_code, None)
+        return series
+
+    def mark_missing(self, scheme_code):
+        """Remember that no real data was available, so it is not refetched for miss_ttl"""
+        with self._lock:
+            self._misses[scheme_code] = time.time()
+
+    def recently_missing(self, scheme_code):
+        with self._lock:
+            missed_at = self._misses.get(scheme_code)
+        return missed_at is not None and time.time() - missed_at < self.miss_ttl
+
+    def invalidate(self, scheme_code=None):
+        """Drop one scheme, or everything"""
+        with self._lock:
+            if scheme_code is None:
+                evicted = len(self._series)
+                self._series.clear()
+                self._misses.clear()
+            else:
+                evicted = int(self._series.pop(scheme_code, None) is not None)
+                self._misses.pop(scheme_code, None)
+        cache_event('nav_store', 'eviction', evicted)
@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Provider selection for SIP Simulator data sources
+Tracks per-provider latency and error rates, orders providers by expected
+time to a good answer, and hedges: when the current provider has not
+answered within its usual latency (a percentile of its history), the next
+provider is asked too and the first good answer wins.
+"""
+
+import logging
+import os
+import threading
+import time
+import weakref
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from metrics import observe_provider, track_queue
+
+logger = logging.getLogger(__name__)
+
+HEDGE_PERCENTILE = float(os.getenv('PROVIDER_HEDGE_PERCENTILE', 90))
+HEDGE_DEFAULT_DELAY = float(os.getenv('PROVIDER_HEDGE_DEFAULT_DELAY', 1.0))  # Until enough samples
+HEDGE_MIN_DELAY = 0.05
+MIN_SAMPLES = 5
+ERROR_DECAY = 0.2  # Weight of the latest outcome in the error-rate EWMA
+POOL_SIZE = int(os.getenv('PROVIDER_POOL_SIZE', 8))  # Provider call threads per worker process
+
+# Live selectors, reset in forked workers so they do not inherit dead threads
+_SELECTORS = weakref.WeakSet()
+
+class ProviderStats:
+    """Recent latencies and a decaying error rate for one provider operation"""
+
+    def __init__(self, window=100):
+        self.latencies = deque(maxlen=window)
+        self.error_rate = 0.0
+        self.calls = 0
+        self.failures = 0
+        self._lock = threading.Lock()
+
+    def record(self, latency, ok):
+        with self._lock:
+            self.calls += 1
+            if ok:
+                self.latencies.append(latency)
+            else:
+                self.failures += 1
+            self.error_rate += ERROR_DECAY * ((0.0 if ok else 1.0) - self.error_rate)
+
+    def percentile(self, p):
+        """Latency percentile of successful calls, or None without enough samples"""
+        with self._lock:
+            if len(self.latencies) < MIN_SAMPLES:
+                return None
+            ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))]
+
+    def expected_time(self, prior):
+        """Median latency inflated by the error rate (expected time to a good answer)
+
+        prior stands in for the median until there are enough samples.
+        """
+        median = self.percentile(50)
+        if median is None:
+            median = prior
+        return median / max(1.0 - self.error_rate, 0.05)
+
+    def snapshot(self):
+        return {
+            'calls': self.calls,
+            'failures': self.failures,
+            'error_rate': round(self.error_rate, 4),
+            'p50_latency': self.percentile(50),
+            'p90_latency': self.percentile(90)
+        }
+
+class ProviderSelector:
+    """Adaptive ordering and hedged calls across equivalent providers"""
+
+    def __init__(self, providers, hedge_percentile=HEDGE_PERCENTILE,
+                 default_hedge_delay=HEDGE_DEFAULT_DELAY, max_workers=POOL_SIZE):
+        self.providers = providers
+        self.hedge_percentile = hedge_percentile
+        self.default_hedge_delay = default_hedge_delay
+        self.max_workers = max_workers
+        self._stats = {}
+        self.reset()
+        _SELECTORS.add(self)
+
+    def reset(self):
+        """Drop worker threads (e.g. in a forked worker); keeps statistics"""
+        self._lock = threading.Lock()
+        self._executor = None
+
+    @property
+    def executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='provider')
+            return self._executor
+
+    @staticmethod
+    def name(provider):
+        return getattr(provider, 'name', provider.__class__.__name__)
+
+    def stats(self, provider, operation):
+        key = (self.name(provider), operation)
+        with self._lock:
+            if key not in self._stats:
+                self._stats[key] = ProviderStats()
+            return self._stats[key]
+
+    def ordered(self, operation):
+        """Providers by expected time to a good answer, configured order breaking ties"""
+        def rank(indexed):
+            index, provider = indexed
+            return (self.stats(provider, operation).expected_time(self.default_hedge_delay), index)
+        return [provider for _, provider in sorted(enumerate(self.providers), key=rank)]
+
+    def hedge_delay(self, provider, operation):
+        delay = self.stats(provider, operation).percentile(self.hedge_percentile)
+        return max(HEDGE_MIN_DELAY, delay if delay is not None else self.default_hedge_delay)
+
+    def _timed(self, provider, operation, fn, is_good):
+        started = time.perf_counter()
+        try:
+            result = fn(provider)
+            ok = is_good(result)
+        except Exception as e:
+            logger.warning(f"Provider {self.name(provider)} failed for {operation}: {e}")
+            result, ok = None, False
+        latency = time.perf_counter() - started
+        self.stats(provider, operation).record(latency, ok)
+        observe_provider(self.name(provider), operation, latency, ok)
+        return result, ok
+
+    def call(self, operation, fn, is_good=bool):
+        """Run fn(provider) with hedging; returns (result, provider) or (None, None)
+
+        The next provider starts as soon as the current one fails, or when
+        it is slower than its hedge percentile. Slower calls that lose the
+        race finish in the background and still update the statistics.
+        """
+        queue = self.ordered(operation)
+        running = {}
+
+        while queue or running:
+            if queue:
+                provider = queue.pop(0)
+                future = self.executor.submit(track_queue('provider', self._timed), provider, operation, fn, is_good)
+                running[future] = provider
+                timeout = self.hedge_delay(provider, operation) if queue else None
+            else:
+                timeout = None
+
+            done, _ = wait(running, timeout=timeout, return_when=FIRST_COMPLETED)
+            for future in done:
+                provider = running.pop(future)
+                result, ok = future.result()
+                if ok:
+                    return result, provider
+
+        return None, None
+
+    def snapshot(self):
+        """Statistics per provider and operation"""
+        with self._lock:
+            items = list(self._stats.items())
+        return {f"{name}.{operation}": stats.snapshot() for (name, operation), stats in items}
+
+def _reset_after_fork():
+    for selector in list(_SELECTORS):
+        selector.reset()
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_after_fork)
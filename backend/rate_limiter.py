@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+Token-bucket rate limiting for SIP Simulator
+Each client key holds a bucket of `capacity` tokens refilled at
+capacity / per_seconds tokens a second; a request takes one token. Updates
+are O(1), and buckets idle longer than RATE_LIMIT_IDLE_TTL are evicted (a
+bucket idle for a whole window is full again, so forgetting it changes
+nothing).
+
+Backends (RATE_LIMIT_BACKEND):
+- shm:   a fixed-size hash table in a shared memory file, locked per slot
+         group, so every gunicorn worker on the host sees the same buckets
+- redis: an atomic Lua script on REDIS_URL, shared across hosts
+- local: per-process buckets (limits are then per worker)
+"""
+
+import fcntl
+import hashlib
+import logging
+import mmap
+import os
+import struct
+import threading
+import time
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+BACKEND = os.getenv('RATE_LIMIT_BACKEND', 'shm').lower()
+SHM_PATH = os.getenv('RATE_LIMIT_SHM_PATH', '/dev/shm/sip-rate-limit')
+SHM_GROUPS = int(os.getenv('RATE_LIMIT_SHM_GROUPS', 4096))  # x 8 slots = clients tracked at once
+IDLE_TTL = float(os.getenv('RATE_LIMIT_IDLE_TTL', 300))  # Seconds; keep >= the longest window
+MAX_LOCAL_KEYS = 100000
+
+class LocalBuckets:
+    """Buckets in this process only, least recently used first"""
+
+    def __init__(self, idle_ttl=IDLE_TTL, max_keys=MAX_LOCAL_KEYS):
+        self.idle_ttl = idle_ttl
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()  # key -> [tokens, updated]
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._buckets)
+
+    def take(self, key, capacity, rate, cost=1):
+        """(allowed, retry_after_seconds) after taking cost tokens from key's bucket"""
+        now = time.monotonic()
+        with self._lock:
+            # Buckets at the front are the idlest; drop them while they are past the TTL
+            while self._buckets:
+                oldest = next(iter(self._buckets.values()))
+                if now - oldest[1] <= self.idle_ttl and len(self._buckets) < self.max_keys:
+                    break
+                self._buckets.popitem(last=False)
+
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = [float(capacity), now]
+            else:
+                self._buckets.move_to_end(key)
+            return _spend(bucket, capacity, rate, cost, now)
+
+def _spend(bucket, capacity, rate, cost, now):
+    """Refill [tokens, updated] to now and take cost tokens if there are enough"""
+    tokens = min(capacity, bucket[0] + (now - bucket[1]) * rate)
+    allowed = tokens >= cost
+    if allowed:
+        tokens -= cost
+    bucket[0], bucket[1] = tokens, now
+    return allowed, 0.0 if allowed else (cost - tokens) / rate
+
+class SharedMemoryBuckets:
+    """Buckets in a shared memory file, visible to every process that maps it
+
+    The file is a hash table of groups of 8 slots (key hash, tokens,
+    updated). A key lives in the group its hash selects; a new key takes a
+    free or idle slot there, else the least recently used one. Each group is
+    guarded by an fcntl lock on its byte range, so processes only contend
+    when their clients hash to the same group.
+    """
+
+    SLOT = struct.Struct('<Qdd')
+    GROUP_SLOTS = 8
+
+    def __init__(self, path=SHM_PATH, groups=SHM_GROUPS, idle_ttl=IDLE_TTL):
+        self.path = path
+        self.groups = groups
+        self.idle_ttl = idle_ttl
+        self.group_size = self.SLOT.size * self.GROUP_SLOTS
+        self._lock = threading.Lock()  # fcntl locks do not exclude threads of one process
+        self._pid = None
+        self._open()
+
+    def _open(self):
+        size = self.groups * self.group_size
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+        if os.fstat(fd).st_size < size:
+            os.ftruncate(fd, size)  # New pages read as zeros: empty slots
+        self._fd = fd
+        self._map = mmap.mmap(fd, size)
+        self._pid = os.getpid()
+
+    @staticmethod
+    def key_hash(key):
+        value = int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), 'little')
+        return value or 1  # 0 marks an empty slot
+
+    def take(self, key, capacity, rate, cost=1):
+        """(allowed, retry_after_seconds) after taking cost tokens from key's bucket"""
+        if self._pid != os.getpid():
+            # Forked: the mapping and descriptor are shared as they are, but a
+            # thread lock copied mid-acquire would never be released
+            self._lock = threading.Lock()
+            self._pid = os.getpid()
+        h = self.key_hash(key)
+        base = (h % self.groups) * self.group_size
+
+        with self._lock:
+            fcntl.lockf(self._fd, fcntl.LOCK_EX, self.group_size, base)
+            try:
+                now = time.monotonic()
+                slot = victim = None
+                victim_updated = float('inf')
+                for offset in range(base, base + self.group_size, self.SLOT.size):
+                    slot_hash, tokens, updated = self.SLOT.unpack_from(self._map, offset)
+                    if slot_hash == h:
+                        slot, bucket = offset, [tokens, updated]
+                        break
+                    if slot_hash == 0 or now - updated > self.idle_ttl:
+                        updated = float('-inf')  # Free, or idle long enough to be full again
+                    if updated < victim_updated:
+                        victim, victim_updated = offset, updated
+                if slot is None:
+                    slot, bucket = victim, [float(capacity), now]
+
+                allowed, retry_after = _spend(bucket, capacity, rate, cost, now)
+                self.SLOT.pack_into(self._map, slot, h, bucket[0], bucket[1])
+                return allowed, retry_after
+            finally:
+                fcntl.lockf(self._fd, fcntl.LOCK_UN, self.group_size, base)
+
+# KEYS[1]: bucket; ARGV: capacity, rate (tokens/s), cost, idle TTL (s)
+REDIS_TOKEN_BUCKET = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+local tokens = tonumber(state[1]) or capacity
+local updated = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - updated) * rate)
+local allowed = 0
+if tokens >= cost then
+    tokens = tokens - cost
+    allowed = 1
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'updated', tostring(now))
+redis.call('EXPIRE', KEYS[1], ARGV[4])
+return {allowed, tostring(tokens)}
+"""
+
+class RedisBuckets:
+    """Buckets in Redis, updated atomically by a Lua script; idle keys expire"""
+
+    def __init__(self, client=None, url=None, prefix='sip:ratelimit:', idle_ttl=IDLE_TTL):
+        if client is None:
+            import redis
+            client = redis.Redis.from_url(url or os.getenv('REDIS_URL', 'redis://localhost:6379/0'),
+                                          socket_timeout=0.5, socket_connect_timeout=0.5)
+        self.client = client
+        self.prefix = prefix
+        self.idle_ttl = int(idle_ttl)
+        self._script = client.register_script(REDIS_TOKEN_BUCKET)
+
+    def take(self, key, capacity, rate, cost=1):
+        """(allowed, retry_after_seconds) after taking cost tokens from key's bucket"""
+        allowed, tokens = self._script(keys=[self.prefix + key], args=[capacity, rate, cost, self.idle_ttl])
+        if allowed:
+            return True, 0.0
+        return False, (cost - float(tokens)) / rate
+
+class RateLimiter:
+    """Per-key token buckets; fails open (with a warning) if the backend errors"""
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+
+    def allow(self, key, max_requests, per_seconds, cost=1):
+        """(allowed, retry_after_seconds) for one request of key under max_requests per per_seconds"""
+        try:
+            return self.buckets.take(key, max_requests, max_requests / per_seconds, cost)
+        except Exception as e:
+            logger.warning(f"Rate limiter unavailable, allowing request: {e}")
+            return True, 0.0
+
+def create_rate_limiter(backend=BACKEND):
+    """Limiter for the configured backend, falling back to per-process buckets"""
+    try:
+        if backend == 'redis':
+            buckets = RedisBuckets()
+            buckets.client.ping()
+            return RateLimiter(buckets)
+        if backend == 'shm':
+            return RateLimiter(SharedMemoryBuckets())
+    except Exception as e:
+        logger.warning(f"Rate limit backend '{backend}' unavailable ({e}), limiting per process")
+    return RateLimiter(LocalBuckets())
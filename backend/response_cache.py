@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+Response cache for SIP Simulator
+Full JSON responses of the simulation endpoints, keyed by a SHA-256 of the
+canonical request (endpoint, normalised parameters) plus the version of
+every NAV series it read. A new NAV changes the version, so entries for
+the old data are simply never looked up again and age out.
+
+Backends (RESPONSE_CACHE_BACKEND):
+- shm:   one file per entry in a shared memory directory, so every gunicorn
+         worker on the host shares it (gunicorn.conf.py enables this)
+- redis: SET with an expiry on REDIS_URL, shared across hosts
+- local: per-process LRU
+- off:   no caching (the default outside gunicorn)
+"""
+
+import hashlib
+import json
+import logging
+import os
+import struct
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+BACKEND = os.getenv('RESPONSE_CACHE_BACKEND', 'off').lower()
+SHM_DIR = os.getenv('RESPONSE_CACHE_DIR', '/dev/shm/sip-responses')
+TTL = int(os.getenv('RESPONSE_CACHE_TTL', 3600))  # Seconds; NAV versions invalidate sooner
+MAX_ENTRIES = int(os.getenv('RESPONSE_CACHE_MAX_ENTRIES', 2048))  # Per host (shm) or process (local)
+NAMESPACE = os.getenv('RESPONSE_CACHE_NAMESPACE', 'v1')  # Change when a deploy changes results
+
+def request_key(endpoint, params, versions, namespace=NAMESPACE):
+    """Hex SHA-256 of the endpoint, its canonical parameters and the NAV versions read"""
+    canonical = json.dumps([namespace, endpoint, params, versions], sort_keys=True, separators=(',', ':'),
+                           default=str)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+class LocalStore:
+    """Entries in this process only, least recently used first"""
+
+    def __init__(self, max_entries=MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # key -> (expires_at, body)
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] < time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def set(self, key, body, ttl):
+        with self._lock:
+            self._entries[key] = (time.time() + ttl, body)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+class SharedMemoryStore:
+    """One file per entry (expiry header + body) in a directory on tmpfs
+
+    Writes go to a temporary file renamed into place, so readers in other
+    processes see a whole entry or none. Every prune_every writes, the
+    writer drops expired entries and the oldest ones beyond max_entries.
+    """
+
+    HEADER = struct.Struct('<d')
+
+    def __init__(self, directory=SHM_DIR, max_entries=MAX_ENTRIES, prune_every=64):
+        self.directory = directory
+        self.max_entries = max_entries
+        self.prune_every = prune_every
+        self._writes = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.directory, key)
+
+    def get(self, key):
+        try:
+            with open(self._path(key), 'rb') as f:
+                data = f.read()
+        except FileNotFoundError:
+            return None
+        (expires_at,) = self.HEADER.unpack_from(data)
+        if expires_at < time.time():
+            return None
+        return data[self.HEADER.size:]
+
+    def set(self, key, body, ttl):
+        fd, tmp = tempfile.mkstemp(dir=self.directory, prefix='.tmp-')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(self.HEADER.pack(time.time() + ttl))
+                f.write(body)
+            os.replace(tmp, self._path(key))
+        except BaseException:
+            os.unlink(tmp)
+            raise
+        self._writes += 1
+        if self._writes % self.prune_every == 0:
+            self.prune()
+
+    def prune(self):
+        """Remove expired entries, then the least recently written beyond max_entries"""
+        now = time.time()
+        live = []
+        for entry in os.scandir(self.directory):
+            if entry.name.startswith('.tmp-'):
+                continue
+            try:
+                with open(entry.path, 'rb') as f:
+                    (expires_at,) = self.HEADER.unpack(f.read(self.HEADER.size))
+                if expires_at < now:
+                    os.remove(entry.path)
+                else:
+                    live.append((entry.stat().st_mtime, entry.path))
+            except (OSError, struct.error):
+                continue  # Removed or replaced by another worker meanwhile
+        live.sort()
+        for _, path in live[:max(0, len(live) - self.max_entries)]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def clear(self):
+        for entry in os.scandir(self.directory):
+            try:
+                os.remove(entry.path)
+            except OSError:
+                pass
+
+class RedisStore:
+    """Entries in Redis; expiry is left to Redis"""
+
+    def __init__(self, client=None, url=None, prefix='sip:response:'):
+        if client is None:
+            import redis
+            client = redis.Redis.from_url(url or os.getenv('REDIS_URL', 'redis://localhost:6379/0'),
+                                          socket_timeout=0.5, socket_connect_timeout=0.5)
+        self.client = client
+        self.prefix = prefix
+
+    def get(self, key):
+        return self.client.get(self.prefix + key)
+
+    def set(self, key, body, ttl):
+        self.client.set(self.prefix + key, body, ex=int(ttl))
+
+    def clear(self):
+        for key in self.client.scan_iter(self.prefix + '*'):
+            self.client.delete(key)
+
+class ResponseCache:
+    """Rendered JSON bodies by request key; backend errors count as misses (with a warning)"""
+
+    def __init__(self, store=None, ttl=TTL):
+        self.store = store
+        self.ttl = ttl
+
+    @property
+    def enabled(self):
+        return self.store is not None
+
+    def get(self, key):
+        if self.store is None:
+            return None
+        try:
+            return self.store.get(key)
+        except Exception as e:
+            logger.warning(f"Response cache read failed: {e}")
+            return None
+
+    def set(self, key, body):
+        if self.store is None:
+            return
+        try:
+            self.store.set(key, body, self.ttl)
+        except Exception as e:
+            logger.warning(f"Response cache write failed: {e}")
+
+def create_response_cache(backend=BACKEND):
+    """Cache for the configured backend; an unavailable shared backend falls back to per-process"""
+    if backend in ('', 'off', 'none'):
+        return ResponseCache()
+    try:
+        if backend == 'redis':
+            store = RedisStore()
+            store.client.ping()
+            return ResponseCache(store)
+        if backend == 'shm':
+            return ResponseCache(SharedMemoryStore())
+    except Exception as e:
+        logger.warning(f"Response cache backend '{backend}' unavailable ({e}), caching per process")
+    return ResponseCache(LocalStore())
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Background revalidation for SIP Simulator caches
+Stale-while-revalidate: an expired entry keeps being served while one
+background refresh per key brings it up to date
+"""
+
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from metrics import track_queue
+
+logger = logging.getLogger(__name__)
+
+# How long past its TTL an entry may still be served while it is refreshed
+NAV_MAX_STALE = int(os.getenv('NAV_MAX_STALE', 6 * 3600))
+SEARCH_MAX_STALE = int(os.getenv('SEARCH_MAX_STALE', 7 * 86400))
+
+class Revalidator:
+    """Runs background refreshes, at most one in flight per key"""
+
+    def __init__(self, max_workers=2):
+        self.max_workers = max_workers
+        self.reset()
+
+    def reset(self):
+        """Forget in-flight refreshes and worker threads (e.g. in a forked worker)"""
+        self._lock = threading.Lock()
+        self._executor = None
+        self._pending = set()
+
+    def submit(self, key, fn, *args, **kwargs):
+        """Schedule fn unless a refresh for key is already pending; returns True if scheduled"""
+        with self._lock:
+            if key in self._pending:
+                return False
+            self._pending.add(key)
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='revalidate')
+            executor = self._executor
+
+        def run():
+            try:
+                fn(*args, **kwargs)
+            except Exception as e:
+                logger.warning(f"Background refresh of {key} failed: {e}")
+            finally:
+                with self._lock:
+                    self._pending.discard(key)
+
+        executor.submit(track_queue('revalidate', run))
+        return True
+
+    def pending(self, key):
+        with self._lock:
+            return key in self._pending
+
+# Process-wide revalidator; forked workers start without the parent's threads
+REVALIDATOR = Revalidator()
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=REVALIDATOR.reset)
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Response encoding for SIP Simulator
+A Flask JSON provider that encodes with orjson, which serialises NumPy
+arrays and scalars natively (NaN and infinity as null), so handlers can
+return engine arrays instead of building Python floats row by row.
+Clients sending Accept: application/msgpack get MessagePack instead.
+Without orjson the stdlib encoder is used, with NumPy values converted in
+to_builtin() (NaN float scalars then stay NaN); without msgpack every
+response is JSON. Objects with a to_wire() method (the engine's
+SimulationResult) are encoded as what it returns.
+
+install(app) must run before instrumentation.install(app), whose
+serialize stage wraps the provider's response().
+"""
+
+import datetime
+import json
+import math
+
+import numpy as np
+from flask import has_request_context, request
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # Optional: falls back to the stdlib encoder
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # Optional: JSON only
+    msgpack = None
+
+JSON_MIMETYPE = 'application/json'
+MSGPACK_MIMETYPE = 'application/msgpack'
+MSGPACK_ALIASES = ('application/x-msgpack', 'application/vnd.msgpack')
+ORJSON_OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS if orjson is not None else 0
+
+def to_builtin(value):
+    """Plain Python form of a value orjson would encode natively (or a date), for the other encoders
+
+    Also the fallback for every encoder, so objects with to_wire() are
+    converted here, at the response boundary.
+    """
+    if hasattr(value, 'to_wire'):
+        return value.to_wire()
+    if isinstance(value, np.ndarray):
+        if value.dtype.kind == 'M':
+            return np.datetime_as_string(value.astype('datetime64[s]')).tolist()  # As orjson writes them
+        if value.dtype.kind == 'f':
+            return np.where(np.isfinite(value), value, None).tolist()  # NaN -> None, as orjson writes null
+        return value.tolist()
+    if isinstance(value, np.datetime64):
+        return str(value.astype('datetime64[s]'))
+    if isinstance(value, np.generic):
+        value = value.item()
+        return None if isinstance(value, float) and not math.isfinite(value) else value
+    if isinstance(value, (datetime.date, datetime.time)):
+        return value.isoformat()  # pandas Timestamps too
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not serializable")
+
+def dumps_bytes(obj):
+    """UTF-8 JSON of obj"""
+    if orjson is None:
+        return json.dumps(obj, default=to_builtin, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    return orjson.dumps(obj, default=to_builtin, option=ORJSON_OPTIONS)
+
+def negotiate(accept_mimetypes):
+    """Response mimetype for an Accept header: MessagePack when preferred (and available), else JSON"""
+    if msgpack is None:
+        return JSON_MIMETYPE
+    best = accept_mimetypes.best_match([JSON_MIMETYPE, MSGPACK_MIMETYPE, *MSGPACK_ALIASES], default=JSON_MIMETYPE)
+    return JSON_MIMETYPE if best == JSON_MIMETYPE else MSGPACK_MIMETYPE
+
+def encode(obj, mimetype=JSON_MIMETYPE):
+    if mimetype == MSGPACK_MIMETYPE:
+        return msgpack.packb(obj, default=to_builtin, use_bin_type=True)
+    return dumps_bytes(obj)
+
+def decode(body, mimetype=JSON_MIMETYPE):
+    if mimetype == MSGPACK_MIMETYPE:
+        return msgpack.unpackb(body, raw=False, strict_map_key=False)
+    return orjson.loads(body) if orjson is not None else json.loads(body)
+
+class FastJSONProvider(DefaultJSONProvider):
+    """orjson encoding, and MessagePack responses for clients that prefer it"""
+
+    def dumps(self, obj, **kwargs):
+        if kwargs:  # Stdlib options (indent, sort_keys, ...) asked for explicitly
+            kwargs.setdefault('default', to_builtin)
+            return json.dumps(obj, **kwargs)
+        return dumps_bytes(obj).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        if kwargs or orjson is None:
+            return json.loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        mimetype = negotiate(request.accept_mimetypes) if has_request_context() else JSON_MIMETYPE
+        response = self._app.response_class(encode(obj, mimetype), mimetype=mimetype)
+        response.vary.add('Accept')
+        return response
+
+def install(app):
+    """Encode the app's JSON responses with FastJSONProvider"""
+    app.json = FastJSONProvider(app)
+    return app
@@ -1,6 +1,7 @@
 # Goal planning service for SIP Simulator
 from datetime import datetime
 from utils.calculations import calculate_goal_sip_requirements, get_asset_allocation_recommendation, determine_risk_level
+from utils.withdrawal import required_corpus
 from config import DEFAULT_EXPECTED_RETURN, DEFAULT_INFLATION_RATE
 
 class GoalService:
@@ -12,8 +13,9 @@ class GoalService:
         try:
             goal_type = goal_data.get('goal_type')
             current_age = goal_data.get('current_age')
-            expected_return = goal_data.get('expected_return', DEFAULT_EXPECTED_RETURN)
-            inflation_rate = goal_data.get('inflation_rate', DEFAULT_INFLATION_RATE)
+            # Rates are percentages here; config keeps them as fractions
+            expected_return = goal_data.get('expected_return', DEFAULT_EXPECTED_RETURN * 100)
+            inflation_rate = goal_data.get('inflation_rate', DEFAULT_INFLATION_RATE * 100)
             
             # Calculate goal-specific parameters
             if goal_type == 'retirement':
@@ -62,9 +64,11 @@ class GoalService:
         # Calculate inflation-adjusted monthly expenses at retirement
         future_monthly_expenses = monthly_expenses * ((1 + inflation_rate/100) ** time_horizon)
         
-        # Calculate total corpus needed (25x annual expenses rule)
-        annual_expenses_at_retirement = future_monthly_expenses * 12
-        target_amount = annual_expenses_at_retirement * years_after_retirement
+        # Calculate corpus that funds inflation-indexed withdrawals after retirement
+        post_retirement_return = goal_data.get('post_retirement_return', 8)
+        target_amount = required_corpus(
+            future_monthly_expenses, years_after_retirement, post_retirement_return, inflation_rate
+        )
         
         return {
             'goal_type': 'Retirement Planning',
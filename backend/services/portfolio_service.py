@@ -1,5 +1,6 @@
 # Portfolio service for SIP Simulator
 from datetime import datetime
+import numpy as np
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from utils.data_generator import generate_mock_nav_data, simulate_sip_investment
 from utils.calculations import calculate_cagr, calculate_xirr
@@ -61,9 +62,8 @@ class PortfolioService:
                 return None
             
             # Calculate metrics
-            final_data = investment_data[-1]
-            total_invested = final_data['invested']
-            current_value = final_data['current_value']
+            total_invested = float(investment_data.invested[-1])
+            current_value = float(investment_data.value[-1])
             
             # Calculate returns
             absolute_return = ((current_value - total_invested) / total_invested) * 100
@@ -73,12 +73,10 @@ class PortfolioService:
             cagr = calculate_cagr(total_invested, current_value, years)
             
             # Calculate XIRR
-            cash_flows = []
-            for item in investment_data:
-                cash_flows.append({
-                    'date': item['date'],
-                    'amount': -sip_amount  # Negative for investment
-                })
+            cash_flows = [
+                {'date': date, 'amount': -sip_amount}  # Negative for investment
+                for date in np.datetime_as_string(investment_data.dates, unit='D').tolist()
+            ]
             # Add final value as positive cash flow
             cash_flows.append({
                 'date': end_date.strftime('%Y-%m-%d'),
@@ -96,7 +94,7 @@ class PortfolioService:
                 'return_pct': absolute_return,
                 'cagr': cagr,
                 'xirr': xirr,
-                'monthly_data': investment_data
+                'monthly_data': investment_data  # Rows built when the response is encoded
             }
             
         except Exception as e:
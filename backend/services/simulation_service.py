@@ -1,7 +1,9 @@
 # Simulation service for SIP Simulator
 from datetime import datetime
-from utils.data_generator import generate_mock_nav_data, generate_nifty50_data, simulate_sip_investment, generate_step_up_sip_data
+import numpy as np
+from utils.data_generator import generate_mock_nav_data, generate_nifty50_data, simulate_sip_investment, generate_step_up_sip_data, SIP_ROWS
 from utils.calculations import calculate_cagr, calculate_xirr
+from utils.sip_engine import SimulationResult, combine_by_date
 
 class SimulationService:
     def __init__(self):
@@ -32,42 +34,27 @@ class SimulationService:
             
         except Exception as e:
             print(f"Error in cumulative performance: {e}")
-            return {'portfolio': [], 'nifty50': [], 'metadata': {}}
+            return {'portfolio': combine_by_date([]), 'nifty50': SimulationResult.empty(SIP_ROWS), 'metadata': {}}
     
     def _generate_portfolio_cumulative_data(self, funds_data, start_date, end_date):
         """Generate cumulative portfolio performance data"""
         try:
             # Simulate each fund and combine results
-            combined_data = {}
+            fund_results = []
             
             for fund in funds_data:
                 nav_data = generate_mock_nav_data(fund['scheme_code'], start_date, end_date)
                 if nav_data:
                     investment_data = simulate_sip_investment(nav_data, fund['sip_amount'], start_date, end_date)
-                    
-                    # Combine with other funds
-                    for item in investment_data:
-                        date = item['date']
-                        if date not in combined_data:
-                            combined_data[date] = {'invested': 0, 'current_value': 0}
-                        
-                        combined_data[date]['invested'] += item['invested']
-                        combined_data[date]['current_value'] += item['current_value']
-            
-            # Convert to list format
-            portfolio_data = []
-            for date in sorted(combined_data.keys()):
-                portfolio_data.append({
-                    'date': date,
-                    'invested': combined_data[date]['invested'],
-                    'current_value': combined_data[date]['current_value']
-                })
+                    if investment_data:
+                        fund_results.append(investment_data)
             
-            return portfolio_data
+            # Sum the funds' columns per date
+            return combine_by_date(fund_results)
             
         except Exception as e:
             print(f"Error generating portfolio cumulative data: {e}")
-            return []
+            return combine_by_date([])
     
     def _generate_benchmark_cumulative_data(self, total_sip_amount, start_date, end_date):
         """Generate benchmark (Nifty 50) cumulative data"""
@@ -75,11 +62,11 @@ class SimulationService:
             nifty_nav_data = generate_nifty50_data(start_date, end_date)
             if nifty_nav_data:
                 return simulate_sip_investment(nifty_nav_data, total_sip_amount, start_date, end_date)
-            return []
+            return SimulationResult.empty(SIP_ROWS)
             
         except Exception as e:
             print(f"Error generating benchmark data: {e}")
-            return []
+            return SimulationResult.empty(SIP_ROWS)
     
     def benchmark_comparison(self, start_date, end_date, sip_amount):
         """Compare SIP with Nifty 50 benchmark"""
@@ -96,9 +83,8 @@ class SimulationService:
                 raise Exception("Could not simulate Nifty 50 investment")
             
             # Calculate summary metrics
-            final_data = investment_data[-1]
-            total_invested = final_data['invested']
-            final_value = final_data['current_value']
+            total_invested = float(investment_data.invested[-1])
+            final_value = float(investment_data.value[-1])
             
             # Calculate returns
             absolute_return = ((final_value - total_invested) / total_invested) * 100
@@ -110,12 +96,10 @@ class SimulationService:
             cagr = calculate_cagr(total_invested, final_value, years)
             
             # Calculate XIRR
-            cash_flows = []
-            for item in investment_data:
-                cash_flows.append({
-                    'date': item['date'],
-                    'amount': -sip_amount  # Negative for investment
-                })
+            cash_flows = [
+                {'date': date, 'amount': -sip_amount}  # Negative for investment
+                for date in np.datetime_as_string(investment_data.dates, unit='D').tolist()
+            ]
             # Add final value as positive cash flow
             cash_flows.append({
                 'date': end_date,
@@ -162,22 +146,23 @@ class SimulationService:
                     )
                     
                     if step_up_data:
-                        final_data = step_up_data[-1]
+                        invested = float(step_up_data.invested[-1])
+                        current_value = float(step_up_data.value[-1])
                         
                         fund_result = {
                             'fund_name': fund['fund_name'],
                             'scheme_code': fund['scheme_code'],
                             'initial_sip': fund['sip_amount'],
-                            'final_sip': final_data['sip_amount'],
-                            'invested': final_data['invested'],
-                            'current_value': final_data['current_value'],
-                            'return_pct': ((final_data['current_value'] - final_data['invested']) / final_data['invested']) * 100,
+                            'final_sip': float(step_up_data.amount[-1]),
+                            'invested': invested,
+                            'current_value': current_value,
+                            'return_pct': ((current_value - invested) / invested) * 100,
                             'monthly_data': step_up_data
                         }
                         
                         portfolio_results.append(fund_result)
-                        portfolio_summary['total_invested'] += final_data['invested']
-                        portfolio_summary['final_value'] += final_data['current_value']
+                        portfolio_summary['total_invested'] += invested
+                        portfolio_summary['final_value'] += current_value
             
             # Calculate portfolio return
             if portfolio_summary['total_invested'] > 0:
@@ -209,11 +194,12 @@ class SimulationService:
             if nifty_data:
                 investment_data = simulate_sip_investment(nifty_data, total_sip_amount, start_date, end_date)
                 if investment_data:
-                    final_data = investment_data[-1]
+                    invested = float(investment_data.invested[-1])
+                    final_value = float(investment_data.value[-1])
                     return {
-                        'total_invested': final_data['invested'],
-                        'final_value': final_data['current_value'],
-                        'return_percentage': ((final_data['current_value'] - final_data['invested']) / final_data['invested']) * 100
+                        'total_invested': invested,
+                        'final_value': final_value,
+                        'return_percentage': ((final_value - invested) / invested) * 100
                     }
             
             return {
@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+Request coalescing (single-flight) for SIP Simulator
+Concurrent callers asking for the same key share one execution: the first
+caller (the leader) runs the fetch and the others wait for its result.
+With a spill directory, leaders in different worker processes also
+coalesce through per-key file locks, and the result is handed over as a
+short-lived pickle.
+"""
+
+import fcntl
+import hashlib
+import os
+import pickle
+import tempfile
+import threading
+import time
+
+_MISSING = object()  # Result of a key the leader's fetch did not return
+
+class _Call:
+    __slots__ = ('event', 'result', 'error')
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+class SingleFlight:
+    """Coalesce concurrent executions per key within (and optionally across) processes"""
+
+    def __init__(self, namespace='flight', spill_dir=None, spill_ttl=30):
+        self.namespace = namespace
+        self.spill_dir = spill_dir
+        self.spill_ttl = spill_ttl
+        self.executions = 0  # Keys actually fetched by this process
+        self.coalesced = 0   # Callers served by another caller's fetch
+        self._calls = {}
+        self._lock = threading.Lock()
+        if spill_dir:
+            os.makedirs(spill_dir, exist_ok=True)
+
+    def _count(self, executions=0, coalesced=0):
+        with self._lock:
+            self.executions += executions
+            self.coalesced += coalesced
+
+    # In-process coalescing
+
+    def _begin(self, key):
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                self.coalesced += 1
+                return call, False
+            call = self._calls[key] = _Call()
+            return call, True
+
+    def _finish(self, key, call, result=None, error=None):
+        call.result, call.error = result, error
+        with self._lock:
+            self._calls.pop(key, None)
+        call.event.set()
+
+    @staticmethod
+    def _wait(call):
+        call.event.wait()
+        if call.error is not None:
+            raise call.error
+        return call.result
+
+    def do(self, key, fn, *args, **kwargs):
+        """Return fn(*args, **kwargs), sharing one execution among concurrent callers of key"""
+        call, leader = self._begin(key)
+        if not leader:
+            result = self._wait(call)
+            if result is _MISSING:  # Led by a batch that failed this key: try it ourselves
+                return self.do(key, fn, *args, **kwargs)
+            return result
+
+        try:
+            result = self._execute([key], lambda keys: {key: fn(*args, **kwargs)})[key]
+        except BaseException as e:
+            self._finish(key, call, error=e)
+            raise
+        self._finish(key, call, result)
+        return result
+
+    def do_many(self, keys, fn_many):
+        """Batch variant: fn_many(keys) -> {key: result} runs only for keys nobody is fetching
+
+        Keys already in flight (in this process or, with a spill directory,
+        in another worker) are waited for instead of fetched again. Keys
+        fn_many leaves out (failed fetches) are left out of the results too,
+        and are not handed to other callers or workers.
+        """
+        calls = {key: self._begin(key) for key in dict.fromkeys(keys)}
+        leaders = [key for key, (_, leader) in calls.items() if leader]
+        followers = [key for key, (_, leader) in calls.items() if not leader]
+
+        results = {}
+        try:
+            if leaders:
+                results.update(self._execute(leaders, fn_many))
+        except BaseException as e:
+            for key in leaders:
+                self._finish(key, calls[key][0], error=e)
+            raise
+
+        for key in leaders:
+            self._finish(key, calls[key][0], results.get(key, _MISSING))
+        for key in followers:
+            result = self._wait(calls[key][0])
+            if result is not _MISSING:
+                results[key] = result
+        return results
+
+    def _execute(self, keys, fn_many):
+        """Run fn_many for keys this process leads"""
+        if self.spill_dir:
+            return self._fetch_across_processes(keys, fn_many)
+        self._count(executions=len(keys))
+        return fn_many(keys)
+
+    # Cross-process coalescing
+
+    def _path(self, key, suffix):
+        digest = hashlib.sha1(f"{self.namespace}:{key}".encode()).hexdigest()
+        return os.path.join(self.spill_dir, f"{self.namespace}-{digest}{suffix}")
+
+    def _lock_file(self, key, blocking):
+        fd = os.open(self._path(key, '.lock'), os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(fd)
+            return None
+        return fd
+
+    @staticmethod
+    def _unlock_file(fd):
+        fcntl.flock(fd, fcntl.LOCK_UN)
+        os.close(fd)
+
+    def _load_spill(self, key):
+        path = self._path(key, '.pkl')
+        try:
+            if time.time() - os.path.getmtime(path) > self.spill_ttl:
+                return False, None
+            with open(path, 'rb') as f:
+                return True, pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            return False, None
+
+    def _store_spill(self, key, result):
+        fd, tmp_path = tempfile.mkstemp(dir=self.spill_dir, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump(result, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, self._path(key, '.pkl'))
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+
+    def _fetch_across_processes(self, keys, fn_many):
+        """Fetch keys while holding their file locks; wait on keys other workers hold"""
+        results = {}
+        held = {}
+        busy = []
+        try:
+            for key in keys:
+                fd = self._lock_file(key, blocking=False)
+                if fd is None:
+                    busy.append(key)
+                    continue
+                held[key] = fd
+                hit, result = self._load_spill(key)
+                if hit:
+                    self._count(coalesced=1)
+                    results[key] = result
+
+            to_fetch = [key for key in held if key not in results]
+            if to_fetch:
+                self._count(executions=len(to_fetch))
+                fetched = fn_many(to_fetch)
+                for key in to_fetch:
+                    if key in fetched:
+                        results[key] = fetched[key]
+                        self._store_spill(key, results[key])
+        finally:
+            for fd in held.values():
+                self._unlock_file(fd)
+
+        # Another worker was fetching these: wait for its lock, then take its result
+        for key in busy:
+            fd = self._lock_file(key, blocking=True)
+            try:
+                hit, result = self._load_spill(key)
+                if hit:
+                    self._count(coalesced=1)
+                else:
+                    self._count(executions=1)
+                    fetched = fn_many([key])
+                    if key not in fetched:
+                        continue  # Failed here too: nothing to share
+                    result = fetched[key]
+                    self._store_spill(key, result)
+                results[key] = result
+            finally:
+                self._unlock_file(fd)
+
+        return results
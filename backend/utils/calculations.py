@@ -6,6 +6,7 @@ from scipy.optimize import newton
 import math
 import random
 from config import RISK_FREE_RATE, DEFAULT_EXPECTED_RETURN, DEFAULT_INFLATION_RATE
+from utils.goal_solver import future_value_step_up, solve_step_up_sip
 
 def calculate_xirr(cash_flows):
     """Calculate XIRR (Extended Internal Rate of Return) for irregular cash flows"""
@@ -69,27 +70,7 @@ def calculate_required_sip(target_amount, annual_return, years):
 
 def calculate_step_up_sip_value(initial_sip, annual_return, years, step_up_percentage):
     """Calculate future value of step-up SIP"""
-    monthly_return = annual_return / 12 / 100
-    annual_step_up = step_up_percentage / 100
-    
-    total_value = 0
-    current_sip = initial_sip
-    
-    for year in range(years):
-        # Calculate value for current year
-        year_value = calculate_sip_future_value(current_sip, annual_return, 1)
-        
-        # Compound the value for remaining years
-        remaining_years = years - year - 1
-        if remaining_years > 0:
-            year_value *= (1 + annual_return / 100) ** remaining_years
-        
-        total_value += year_value
-        
-        # Increase SIP for next year
-        current_sip *= (1 + annual_step_up)
-    
-    return total_value
+    return float(future_value_step_up(initial_sip, years, annual_return, step_up_percentage))
 
 def calculate_risk_metrics(fund_data, benchmark_data=None):
     """Calculate comprehensive risk metrics for a fund"""
@@ -203,9 +184,9 @@ def calculate_goal_sip_requirements(goal_amount, time_horizon, expected_return,
     # Regular SIP calculation
     regular_sip = calculate_required_sip(goal_amount, expected_return, time_horizon)
     
-    # Step-up SIP calculation (starting with 20% less, increasing 10% annually)
-    step_up_initial = regular_sip * 0.8
+    # Step-up SIP calculation (exact initial SIP, increasing 10% annually)
     step_up_percentage = 10
+    step_up_initial = float(solve_step_up_sip(goal_amount, time_horizon, expected_return, step_up_percentage))
     
     # Calculate total investment for regular SIP
     total_investment_regular = regular_sip * 12 * time_horizon
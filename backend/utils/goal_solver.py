@@ -0,0 +1,97 @@
+# Goal planning solver for SIP Simulator
+# Closed-form step-up SIP annuities, vectorized over arrays of goals.
+# Rates are annual percentages (12 = 12%), compounded monthly like
+# calculate_sip_future_value; SIP instalments are paid at month end.
+import numpy as np
+
+def _monthly_rate(annual_return):
+    return np.asarray(annual_return, dtype=float) / 12 / 100
+
+def _to_months(years):
+    return np.rint(np.asarray(years, dtype=float) * 12).astype(int)
+
+def step_up_fv_factor(years, annual_return, step_up_percentage):
+    """Future value of a SIP of 1/month that steps up once a year
+
+    Year k contributes 12 instalments of (1+g)^k, worth A12·(1+g)^k at
+    year end, where A12 is the 12-month annuity factor. Compounding the
+    years forward gives the geometric series
+        A12 · Σ (1+g)^k · q^(Y-1-k) = A12 · (q^Y - s^Y) / (q - s)
+    with q = (1+r)^12 and s = 1+g. A partial final year is added as a
+    plain annuity at the last stepped-up amount.
+    """
+    r = _monthly_rate(annual_return)
+    months = _to_months(years)
+    s = 1 + np.asarray(step_up_percentage, dtype=float) / 100
+    full_years, tail_months = np.divmod(months, 12)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        growth = 1 + r
+        q = growth ** 12
+        flat = np.isclose(r, 0)
+        safe_r = np.where(flat, 1, r)
+        year_annuity = np.where(flat, 12.0, (q - 1) / safe_r)
+        tail_annuity = np.where(flat, tail_months, (growth ** tail_months - 1) / safe_r)
+
+        same_growth = np.isclose(q, s)
+        series = np.where(
+            same_growth,
+            full_years * q ** np.maximum(full_years - 1, 0),
+            (q ** full_years - s ** full_years) / np.where(same_growth, 1, q - s)
+        )
+
+    return year_annuity * series * growth ** tail_months + s ** full_years * tail_annuity
+
+def future_value_step_up(initial_sip, years, annual_return, step_up_percentage):
+    """Corpus built by a step-up SIP"""
+    return np.asarray(initial_sip, dtype=float) * step_up_fv_factor(years, annual_return, step_up_percentage)
+
+def solve_step_up_sip(target_amount, years, annual_return, step_up_percentage):
+    """Exact initial monthly SIP that reaches target_amount with annual step-ups"""
+    return np.asarray(target_amount, dtype=float) / step_up_fv_factor(years, annual_return, step_up_percentage)
+
+def total_step_up_investment(initial_sip, years, step_up_percentage):
+    """Total amount paid into a step-up SIP"""
+    months = _to_months(years)
+    s = 1 + np.asarray(step_up_percentage, dtype=float) / 100
+    full_years, tail_months = np.divmod(months, 12)
+
+    no_step_up = np.isclose(s, 1)
+    yearly_sum = np.where(no_step_up, full_years, (s ** full_years - 1) / np.where(no_step_up, 1, s - 1))
+
+    return np.asarray(initial_sip, dtype=float) * (12 * yearly_sum + tail_months * s ** full_years)
+
+def solve_goals(goal_amount, years, expected_return, inflation_rate, step_up_percentage=None):
+    """Plan a batch of goals in one vectorized pass
+
+    goal_amount is in today's money and is inflated over the horizon.
+    Every argument may be a scalar or an array; they broadcast together.
+    The step-up defaults to the inflation rate.
+    """
+    if step_up_percentage is None:
+        step_up_percentage = inflation_rate
+
+    goal_amount, years, expected_return, inflation_rate, step_up_percentage = np.broadcast_arrays(
+        *[np.asarray(v, dtype=float) for v in (goal_amount, years, expected_return, inflation_rate, step_up_percentage)]
+    )
+    if np.any(years <= 0):
+        raise ValueError("Time horizon must be positive")
+
+    months = _to_months(years)
+    target_amount = goal_amount * (1 + inflation_rate / 100) ** years
+
+    regular_sip = solve_step_up_sip(target_amount, years, expected_return, 0)
+    step_up_sip = solve_step_up_sip(target_amount, years, expected_return, step_up_percentage)
+    total_regular = regular_sip * months
+    total_step_up = total_step_up_investment(step_up_sip, years, step_up_percentage)
+
+    return {
+        'target_amount': target_amount,
+        'time_horizon_years': years,
+        'regular_sip': regular_sip,
+        'step_up_sip': step_up_sip,
+        'step_up_percentage': step_up_percentage,
+        'total_investment_regular': total_regular,
+        'total_investment_step_up': total_step_up,
+        'wealth_multiplier': target_amount / total_regular
+    }
@@ -0,0 +1,49 @@
+# Lazy imports for SIP Simulator
+# Heavy libraries (pandas, scipy) dominate cold start but are only needed by
+# the simulation routes. lazy_import() returns a module stand-in that
+# imports the real module on first attribute access, so health, search and
+# goal planning requests never pay for them. After loading, the stand-in
+# carries the module's attributes, so later lookups cost the same as on the
+# real module.
+import importlib
+import importlib.util
+import sys
+import threading
+import types
+
+_IMPORT_LOCK = threading.RLock()
+
+class LazyModule(types.ModuleType):
+    """Placeholder for a module that is imported on first use"""
+
+    def _load(self):
+        with _IMPORT_LOCK:
+            module = importlib.import_module(self.__name__)
+            self.__dict__.update(module.__dict__)
+            self.__dict__['_lazy_module'] = module
+        return module
+
+    def __getattr__(self, attr):
+        module = self.__dict__.get('_lazy_module') or self._load()
+        return getattr(module, attr)
+
+    def __repr__(self):
+        state = 'loaded' if '_lazy_module' in self.__dict__ else 'not loaded'
+        return f"<lazy module '{self.__name__}' ({state})>"
+
+def lazy_import(name, optional=False):
+    """Module name, imported on first attribute access
+
+    Already imported modules are returned as they are. With optional=True,
+    None is returned when the module is not installed (checked without
+    importing it).
+    """
+    if name in sys.modules:
+        return sys.modules[name]
+    if optional and importlib.util.find_spec(name) is None:
+        return None
+    return LazyModule(name)
+
+def is_loaded(name):
+    """True once the real module has been imported"""
+    return name in sys.modules
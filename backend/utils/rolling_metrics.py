@@ -0,0 +1,101 @@
+# Rolling regression utilities for SIP Simulator
+import numpy as np
+from utils.lazy_imports import lazy_import
+
+pd = lazy_import('pandas')
+
+RISK_FREE_RATE = 0.06  # 6% risk-free rate
+PERIODS_PER_YEAR = 12  # monthly returns
+
+def monthly_nav_panel(nav_frames):
+    """Align NAV DataFrames on month-end closes
+
+    nav_frames maps a series name to a DataFrame with 'date' and 'nav'
+    columns. Returns (month_labels, nav_matrix) where nav_matrix has one
+    column per series, in the order of nav_frames, restricted to months
+    present in every series.
+    """
+    columns = {}
+    for name, df in nav_frames.items():
+        if df is None or df.empty:
+            raise ValueError(f"No NAV data for {name}")
+        series = df.sort_values('date')
+        monthly = series.groupby(series['date'].dt.to_period('M'))['nav'].last()
+        columns[name] = monthly
+
+    panel = pd.DataFrame(columns).dropna()
+    month_labels = [period.strftime('%Y-%m') for period in panel.index]
+    return month_labels, panel.to_numpy(dtype=float)
+
+def periodic_returns(values):
+    """Simple period-over-period returns along the first axis"""
+    values = np.asarray(values, dtype=float)
+    return values[1:] / values[:-1] - 1
+
+def _moving_sum(values, window):
+    """Sum over each trailing window via a cumulative sum (one pass)"""
+    cumulative = np.cumsum(values, axis=0)
+    zero_row = np.zeros((1,) + values.shape[1:])
+    cumulative = np.concatenate([zero_row, cumulative], axis=0)
+    return cumulative[window:] - cumulative[:-window]
+
+def rolling_regression(fund_returns, benchmark_returns, window=12,
+                       risk_free_rate=RISK_FREE_RATE, periods_per_year=PERIODS_PER_YEAR):
+    """Rolling beta, alpha, R², tracking error and information ratio
+
+    fund_returns is a (T,) array for one fund or (T, N) for N funds,
+    benchmark_returns is (T,). Every statistic is built from moving sums
+    of x, y, x², y² and xy, so the cost is O(T·N) regardless of window.
+    Results have T - window + 1 rows; alpha is annualised Jensen's alpha,
+    tracking error is annualised and windows with a flat benchmark are NaN.
+    """
+    y = np.asarray(fund_returns, dtype=float)
+    x = np.asarray(benchmark_returns, dtype=float)
+    single_fund = y.ndim == 1
+    if single_fund:
+        y = y[:, None]
+
+    if x.ndim != 1 or len(x) != len(y):
+        raise ValueError("Benchmark returns must be 1-D and aligned with fund returns")
+    if window < 2 or window > len(x):
+        raise ValueError(f"Window must be between 2 and {len(x)} periods")
+
+    rf = risk_free_rate / periods_per_year
+    x = x[:, None] - rf
+    y = y - rf
+    active = y - x
+
+    # Centre on the full-sample mean so the moving moments stay well conditioned
+    x_mean, y_mean, active_mean = x.mean(axis=0), y.mean(axis=0), active.mean(axis=0)
+    xc, yc, ac = x - x_mean, y - y_mean, active - active_mean
+
+    sum_x = _moving_sum(xc, window)
+    sum_y = _moving_sum(yc, window)
+    sum_a = _moving_sum(ac, window)
+    sxx = _moving_sum(xc * xc, window) - sum_x * sum_x / window
+    syy = _moving_sum(yc * yc, window) - sum_y * sum_y / window
+    sxy = _moving_sum(xc * yc, window) - sum_x * sum_y / window
+    saa = _moving_sum(ac * ac, window) - sum_a * sum_a / window
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        valid_x = sxx > 1e-12
+        beta = np.where(valid_x, sxy / sxx, np.nan)
+        alpha = (sum_y / window + y_mean) - beta * (sum_x / window + x_mean)
+        r_squared = np.where(valid_x & (syy > 1e-12), sxy * sxy / (sxx * syy), np.nan)
+
+        tracking_error = np.sqrt(np.clip(saa, 0, None) / (window - 1)) * np.sqrt(periods_per_year)
+        active_return = (sum_a / window + active_mean) * periods_per_year
+        information_ratio = np.where(tracking_error > 1e-12, active_return / tracking_error, np.nan)
+
+    results = {
+        'beta': beta,
+        'alpha': alpha * periods_per_year,
+        'r_squared': r_squared,
+        'tracking_error': tracking_error,
+        'information_ratio': information_ratio
+    }
+
+    if single_fund:
+        results = {name: values[:, 0] for name, values in results.items()}
+
+    return results
@@ -0,0 +1,142 @@
+# Vectorized SIP engine for SIP Simulator
+# Every SIP variant (regular, step-up, several plans at once) runs over the
+# same NAV arrays: instalment dates are matched to NAVs with one
+# searchsorted and units accumulate with one cumulative sum.
+import numpy as np
+from utils.lazy_imports import lazy_import
+
+pd = lazy_import('pandas')
+
+SIP_DAY = 3  # Instalments go in on the 3rd of every month
+
+def sip_schedule(start_date, end_date, sip_day=SIP_DAY):
+    """Instalment dates (datetime64[D]) for every month start in the range"""
+    month_starts = pd.date_range(start=start_date, end=end_date, freq='MS')
+    return month_starts.to_numpy().astype('datetime64[D]') + np.timedelta64(sip_day - 1, 'D')
+
+def step_up_amounts(sip_amount, instalments, step_up_percentage=0):
+    """Instalment amounts that grow by step_up_percentage every 12 instalments"""
+    years_elapsed = np.arange(instalments) // 12
+    return sip_amount * (1 + step_up_percentage / 100) ** years_elapsed
+
+def execution_index(nav_dates, txn_dates, carry_last=True):
+    """Index of the NAV each instalment executes at
+
+    An instalment buys at the first NAV on or after its date. Instalments
+    past the end of the series use the last NAV when carry_last is set,
+    otherwise they are marked -1 (not executed).
+    """
+    index = np.searchsorted(nav_dates, txn_dates, side='left')
+    past_end = index >= len(nav_dates)
+    index[past_end] = len(nav_dates) - 1 if carry_last else -1
+    return index
+
+def run_sip(nav_dates, navs, txn_dates, amounts, carry_last=True):
+    """Simulate one or more SIP plans over a NAV series
+
+    amounts is a scalar, a (T,) array or a (T, K) array for K plans sharing
+    the same schedule. Instalments that find no NAV are dropped. Returns
+    per-instalment arrays; units, invested and value are (T,) or (T, K).
+    """
+    amounts = np.asarray(amounts, dtype=float)
+    if amounts.ndim == 0:
+        amounts = np.full(len(txn_dates), float(amounts))
+
+    index = execution_index(nav_dates, txn_dates, carry_last)
+    executed = index >= 0
+    index, amounts = index[executed], amounts[executed]
+
+    nav = navs[index]
+    price = nav[:, None] if amounts.ndim == 2 else nav
+    units = amounts / price
+    total_units = np.cumsum(units, axis=0)
+
+    return {
+        'date': nav_dates[index],
+        'nav': nav,
+        'amount': amounts,
+        'units': units,
+        'total_units': total_units,
+        'invested': np.cumsum(amounts, axis=0),
+        'value': total_units * price
+    }
+
+def valuation_nav(nav_dates, navs, as_of):
+    """Latest NAV on or before as_of, or None when the series starts later"""
+    position = np.searchsorted(nav_dates, np.datetime64(pd.Timestamp(as_of).date()), side='right')
+    if position == 0:
+        return None
+    return float(navs[position - 1])
+
+# Per-month row layouts: (wire key, column, decimals or None)
+CHART_ROWS = (('invested', 'invested', None), ('current_value', 'value', None), ('nav', 'nav', None))
+PORTFOLIO_ROWS = (('invested', 'invested', None), ('current_value', 'value', None))
+
+class SimulationResult:
+    """A simulated plan: NumPy columns, one entry per instalment, and scalar summary fields
+
+    Columns are dates (datetime64[D]), nav, amount, units (bought),
+    total_units, invested and value (both cumulative); a producer leaves out
+    the ones it does not track. summary holds the scalar fields of the
+    response and rows the columns (and their keys and rounding) of each
+    per-month row. Handlers aggregate the columns directly; rows are only
+    built by to_wire(), which the response encoders call.
+    """
+
+    __slots__ = ('dates', 'nav', 'amount', 'units', 'total_units', 'invested', 'value', 'summary', 'rows')
+
+    def __init__(self, dates, nav=None, amount=None, units=None, total_units=None, invested=None, value=None,
+                 summary=None, rows=CHART_ROWS):
+        self.dates = dates
+        self.nav = nav
+        self.amount = amount
+        self.units = units
+        self.total_units = total_units
+        self.invested = invested
+        self.value = value
+        self.summary = summary
+        self.rows = rows
+
+    @classmethod
+    def from_sip(cls, sip, plan=None, **kwargs):
+        """Result of a run_sip() output; plan picks one column of a multi-plan run"""
+        def column(name):
+            return sip[name] if plan is None else sip[name][:, plan]
+        return cls(sip['date'], sip['nav'], column('amount'), column('units'), column('total_units'),
+                   column('invested'), column('value'), **kwargs)
+
+    @classmethod
+    def empty(cls, rows=CHART_ROWS, summary=None):
+        """Result with no instalments (every column empty)"""
+        return cls(np.array([], dtype='datetime64[D]'), *(np.array([]) for _ in range(6)), summary=summary, rows=rows)
+
+    def __len__(self):
+        return len(self.dates)
+
+    def records(self):
+        """Per-month rows, built column by column"""
+        keys = ['date']
+        columns = [np.datetime_as_string(self.dates, unit='D').tolist()]
+        for key, name, decimals in self.rows:
+            values = getattr(self, name)
+            keys.append(key)
+            columns.append((values if decimals is None else np.round(values, decimals)).tolist())
+        return [dict(zip(keys, row)) for row in zip(*columns)]
+
+    def to_wire(self):
+        """Response form: the rows alone, or the summary fields with the rows as monthly_data"""
+        if self.summary is None:
+            return self.records()
+        return {**self.summary, 'monthly_data': self.records()}
+
+def combine_by_date(results, rows=PORTFOLIO_ROWS):
+    """Invested and value summed per date over several results (dates with nothing invested dropped)"""
+    results = [result for result in results if len(result)]
+    if not results:
+        return SimulationResult.empty(rows)
+    dates, position = np.unique(np.concatenate([result.dates for result in results]), return_inverse=True)
+    invested, value = np.zeros(len(dates)), np.zeros(len(dates))
+    np.add.at(invested, position, np.concatenate([result.invested for result in results]))
+    np.add.at(value, position, np.concatenate([result.value for result in results]))
+    keep = invested > 0
+    return SimulationResult(dates[keep], invested=invested[keep], value=value[keep], rows=rows)
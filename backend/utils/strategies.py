@@ -0,0 +1,140 @@
+# Investment strategy engine for SIP Simulator
+# Each strategy turns the monthly instalment schedule (and the NAVs it
+# executes at) into amounts bought per instalment - negative amounts are
+# sales - in a target fund and, for transfer plans, a source fund. Every
+# plan on a fund is stacked as one column and run through
+# utils.sip_engine.run_sip together, so comparing strategies costs one NAV
+# load and one pass per fund.
+import numpy as np
+from utils.sip_engine import sip_schedule, step_up_amounts, execution_index, run_sip, valuation_nav, SimulationResult
+
+# Per-month rows of a strategy: external cash flow, net invested, value, target NAV
+STRATEGY_ROWS = (('amount', 'amount', 2), ('invested', 'invested', 2), ('current_value', 'value', 2),
+                 ('nav', 'nav', None))
+
+def lumpsum(prices, amount):
+    """Everything invested at the first instalment"""
+    amounts = np.zeros(len(prices))
+    amounts[:1] = amount
+    return amounts, None
+
+def sip(prices, sip_amount, step_up_percentage=0):
+    """Monthly instalments, stepped up every 12 instalments when step_up_percentage is set"""
+    return step_up_amounts(sip_amount, len(prices), step_up_percentage), None
+
+def stp(prices, amount, source_prices, months=12):
+    """Lumpsum parked in the source fund and moved to the target in equal monthly transfers
+
+    The last transfer sweeps the source units left, so the source fund's
+    gains move across too.
+    """
+    count = max(1, min(int(months), len(prices)))
+    transfers = np.zeros(len(prices))
+    transfers[:count] = amount / count
+    units_sold = transfers[:count] / source_prices[:count]
+    transfers[count - 1] = max(amount / source_prices[0] - units_sold[:-1].sum(), 0) * source_prices[count - 1]
+
+    source = -transfers
+    source[0] += amount
+    return transfers, source
+
+def value_averaging(prices, monthly_target, expected_return=0, allow_sell=False):
+    """Buy (or sell) whatever brings the holding to a target value path
+
+    The target grows by monthly_target every instalment, compounding at
+    expected_return (annual %). Without allow_sell units are never sold, so
+    the units held are the running maximum of target / NAV.
+    """
+    rate = expected_return / 1200
+    steps = np.arange(1, len(prices) + 1)
+    target = monthly_target * steps if rate == 0 else monthly_target * ((1 + rate) ** steps - 1) / rate
+    units = target / prices
+    if not allow_sell:
+        units = np.maximum.accumulate(units)
+    return np.diff(units, prepend=0) * prices, None
+
+STRATEGIES = {
+    'lumpsum': lumpsum,
+    'sip': sip,
+    'stp': stp,
+    'value_averaging': value_averaging
+}
+
+# Parameters each strategy takes from a request (the rest come from defaults)
+STRATEGY_PARAMS = {
+    'lumpsum': ('amount',),
+    'sip': ('sip_amount', 'step_up_percentage'),
+    'stp': ('amount', 'months'),
+    'value_averaging': ('monthly_target', 'expected_return', 'allow_sell')
+}
+
+def parse_plans(specs, defaults):
+    """(name, type, params) of strategy specs such as {'type': 'sip', 'sip_amount': 5000, 'name': ...}"""
+    plans = []
+    for spec in specs:
+        kind = spec.get('type') if isinstance(spec, dict) else spec
+        if kind not in STRATEGIES:
+            raise ValueError(f"Unknown strategy '{kind}': use one of {', '.join(STRATEGIES)}")
+        spec = spec if isinstance(spec, dict) else {}
+        params = {key: spec.get(key, defaults.get(key)) for key in STRATEGY_PARAMS[kind]}
+        plans.append((spec.get('name', kind), kind, {k: v for k, v in params.items() if v is not None}))
+    return plans
+
+def compare_strategies(plans, target, start_date, end_date, source=None):
+    """One SimulationResult per plan, all run over the same NAV histories
+
+    target and source are NAV series (dates, navs); source is only read by
+    transfer plans. Instalments follow process_fund: the SIP day of every
+    month, at the first NAV on or after it, and holdings are valued at the
+    last NAV on or before end_date. amount is the investor's cash flow per
+    instalment (transfers between the funds cancel out) and invested its
+    running total.
+    """
+    if not plans:
+        raise ValueError("No strategies to compare")
+    txn_dates = sip_schedule(start_date, end_date)
+    if not len(txn_dates):
+        raise ValueError("No instalments between the start and end dates")
+    prices = target.navs[execution_index(target.dates, txn_dates)]
+    source_prices = None if source is None else source.navs[execution_index(source.dates, txn_dates)]
+
+    target_amounts, source_amounts = [], {}
+    for column, (name, kind, params) in enumerate(plans):
+        if kind == 'stp':
+            if source is None:
+                raise ValueError(f"Strategy '{name}' needs a source fund to transfer from")
+            params = dict(params, source_prices=source_prices)
+        into, out_of = STRATEGIES[kind](prices, **params)
+        target_amounts.append(into)
+        if out_of is not None:
+            source_amounts[column] = out_of
+
+    # One pass over the target fund for every plan, one over the source for transfer plans
+    run = run_sip(target.dates, target.navs, txn_dates, np.column_stack(target_amounts))
+    amount, value = run['amount'].copy(), run['value'].copy()
+    final_value = run['total_units'][-1] * latest_nav(target, end_date)
+    if source_amounts:
+        columns = list(source_amounts)
+        source_run = run_sip(source.dates, source.navs, txn_dates, np.column_stack(list(source_amounts.values())))
+        amount[:, columns] += source_run['amount']
+        value[:, columns] += source_run['value']
+        final_value[columns] += source_run['total_units'][-1] * latest_nav(source, end_date)
+
+    invested = np.cumsum(amount, axis=0)
+    return [
+        SimulationResult(run['date'], run['nav'], amount[:, k], total_units=run['total_units'][:, k],
+                         invested=invested[:, k], value=value[:, k], rows=STRATEGY_ROWS, summary={
+                             'strategy': name,
+                             'type': kind,
+                             'invested': float(invested[-1, k]),
+                             'current_value': float(final_value[k])
+                         })
+        for k, (name, kind, _) in enumerate(plans)
+    ]
+
+def latest_nav(series, as_of):
+    """Valuation NAV of a series, as process_fund takes it"""
+    nav = valuation_nav(series.dates, series.navs, as_of)
+    if nav is None:
+        raise ValueError(f"No NAV data on or before {as_of.date()} for scheme {series.scheme_code}")
+    return nav
@@ -0,0 +1,90 @@
+# Synthetic market data for SIP Simulator
+# Deterministic geometric Brownian motion NAVs for offline/fallback mode and
+# load tests. Each scheme draws from its own numpy Generator seeded from the
+# scheme code, so a scheme's path is the same in every thread, worker and
+# run, and does not depend on which other schemes share the call. Paths
+# always start at EPOCH, so any date range is a window of the same path
+# (dates before EPOCH have no NAVs).
+# Rates are annual percentages (12 = 12%).
+import hashlib
+import numpy as np
+from utils.lazy_imports import lazy_import
+
+pd = lazy_import('pandas')
+
+EPOCH = '1990-01-01'  # Before any scheme's history (Indian MF NAVs start in the 1990s)
+PERIODS_PER_YEAR = {'daily': 252, 'monthly': 12}
+MARKET_FACTOR = '__market__'  # Seed key of the common factor in correlated paths
+
+def scheme_seed(scheme_code, stream=''):
+    """Stable 64-bit seed for a scheme (independent of PYTHONHASHSEED)"""
+    digest = hashlib.md5(f"{scheme_code}:{stream}".encode()).digest()
+    return int.from_bytes(digest[:8], 'little')
+
+def scheme_parameters(scheme_code):
+    """Deterministic per-scheme starting NAV, expected return and volatility"""
+    rng = np.random.default_rng(scheme_seed(scheme_code, 'parameters'))
+    return {
+        'start_nav': round(float(rng.uniform(15, 150)), 4),
+        'annual_return': float(rng.uniform(8, 16)),
+        'annual_volatility': float(rng.uniform(12, 22))
+    }
+
+def market_dates(start_date, end_date, frequency='daily'):
+    """Business days (daily) or month starts (monthly) as datetime64[D]"""
+    if frequency not in PERIODS_PER_YEAR:
+        raise ValueError(f"Unknown frequency: {frequency}")
+    start = np.datetime64(pd.Timestamp(start_date).date())
+    end = np.datetime64(pd.Timestamp(end_date).date())
+    if frequency == 'daily':
+        days = np.arange(start, end + 1, dtype='datetime64[D]')
+        return days[np.is_busday(days)]
+    months = np.arange(start.astype('datetime64[M]'), end.astype('datetime64[M]') + 1).astype('datetime64[D]')
+    return months[months >= start]
+
+def _shocks(seed_key, frequency, periods):
+    return np.random.default_rng(scheme_seed(seed_key, frequency)).standard_normal(periods)
+
+def generate_paths(scheme_codes, start_date, end_date, frequency='daily', correlation=0.0):
+    """NAV paths for several schemes over one date grid
+
+    Returns (dates, navs) with navs shaped (len(dates), len(scheme_codes)).
+    With correlation > 0 every scheme shares a common market factor, giving
+    an equicorrelated panel of log returns.
+    """
+    if not 0 <= correlation < 1:
+        raise ValueError("Correlation must be in [0, 1)")
+
+    grid = market_dates(EPOCH, end_date, frequency)
+    periods = len(grid)
+    dt = 1 / PERIODS_PER_YEAR[frequency]
+
+    params = [scheme_parameters(code) for code in scheme_codes]
+    start_nav = np.array([p['start_nav'] for p in params])
+    sigma = np.array([p['annual_volatility'] for p in params]) / 100
+    drift = np.log1p(np.array([p['annual_return'] for p in params]) / 100) - sigma ** 2 / 2
+
+    shocks = np.column_stack([_shocks(code, frequency, periods) for code in scheme_codes]) if scheme_codes else np.empty((periods, 0))
+    if correlation > 0:
+        market = _shocks(MARKET_FACTOR, frequency, periods)[:, None]
+        shocks = np.sqrt(correlation) * market + np.sqrt(1 - correlation) * shocks
+
+    log_returns = drift * dt + sigma * np.sqrt(dt) * shocks
+    log_returns[0] = 0  # Paths start at their starting NAV
+    navs = np.round(start_nav * np.exp(np.cumsum(log_returns, axis=0)), 4)
+
+    in_range = grid >= np.datetime64(pd.Timestamp(start_date).date())
+    return grid[in_range], navs[in_range]
+
+def synthetic_nav_frame(scheme_code, start_date, end_date, frequency='daily'):
+    """Synthetic NAV history in the providers' 'date'/'nav' DataFrame format"""
+    dates, navs = generate_paths([scheme_code], start_date, end_date, frequency)
+    return pd.DataFrame({'date': pd.to_datetime(dates), 'nav': navs[:, 0]})
+
+def synthetic_nav_records(scheme_code, start_date, end_date, frequency='monthly'):
+    """Synthetic NAV history as [{'date': 'YYYY-MM-DD', 'nav': float}, ...]"""
+    dates, navs = generate_paths([scheme_code], start_date, end_date, frequency)
+    return [
+        {'date': date, 'nav': nav}
+        for date, nav in zip(np.datetime_as_string(dates, unit='D').tolist(), navs[:, 0].tolist())
+    ]
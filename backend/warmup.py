@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Startup cache warmup for SIP Simulator
+Loads the NAV histories of a hot list of schemes (the benchmark, configured
+schemes and the most used schemes from the usage log) and builds the search
+index before gunicorn forks its workers, so every worker starts with warm
+caches shared copy-on-write with the master process.
+"""
+
+import gc
+import logging
+import os
+import re
+import time
+from collections import Counter
+
+logger = logging.getLogger(__name__)
+
+WARMUP_ENABLED = os.getenv('SIP_WARMUP', '').lower() in ('1', 'true', 'yes')
+WARMUP_SCHEMES = [code.strip() for code in os.getenv('WARMUP_SCHEMES', '').split(',') if code.strip()]
+WARMUP_TOP_N = int(os.getenv('WARMUP_TOP_N', 20))
+SCHEME_USAGE_LOG = os.getenv('SCHEME_USAGE_LOG', '')  # Unset: usage is not recorded
+
+USAGE_MARKER = 'scheme_usage'
+USAGE_PATTERN = re.compile(r'\b\d{5,7}\b')
+
+_usage_logger = None
+
+def _get_usage_logger():
+    global _usage_logger
+    if _usage_logger is None:
+        usage_logger = logging.getLogger('sip.usage')
+        usage_logger.propagate = False
+        usage_logger.setLevel(logging.INFO)
+        try:
+            os.makedirs(os.path.dirname(SCHEME_USAGE_LOG) or '.', exist_ok=True)
+            handler = logging.FileHandler(SCHEME_USAGE_LOG)
+            handler.setFormatter(logging.Formatter('%(asctime)s %(message)s'))
+            usage_logger.addHandler(handler)
+        except OSError as e:
+            logger.warning(f"Scheme usage log unavailable: {e}")
+        _usage_logger = usage_logger
+    return _usage_logger
+
+def record_usage(scheme_codes):
+    """Append the schemes a request used to the usage log (if configured)"""
+    if SCHEME_USAGE_LOG and scheme_codes:
+        _get_usage_logger().info(f"{USAGE_MARKER} {' '.join(str(code) for code in scheme_codes)}")
+
+def top_schemes(log_path, n=WARMUP_TOP_N):
+    """Most used scheme codes in a usage log, most used first"""
+    counts = Counter()
+    try:
+        with open(log_path, encoding='utf-8', errors='replace') as f:
+            for line in f:
+                _, marker, codes = line.partition(USAGE_MARKER)
+                if marker:
+                    counts.update(USAGE_PATTERN.findall(codes))
+    except OSError:
+        return []
+    return [code for code, _ in counts.most_common(n)]
+
+def hot_schemes(benchmark_codes=(), configured=None, usage_log=None, top_n=WARMUP_TOP_N):
+    """Benchmarks, then configured schemes, then the top-N used schemes (deduplicated)"""
+    configured = WARMUP_SCHEMES if configured is None else configured
+    usage_log = SCHEME_USAGE_LOG if usage_log is None else usage_log
+    used = top_schemes(usage_log, top_n) if usage_log and top_n > 0 else []
+    return list(dict.fromkeys(str(code) for code in [*benchmark_codes, *configured, *used]))
+
+def warm_caches(scheme_codes, prefetch, nav_store, search_warmers=(), freeze=True):
+    """Prefetch NAV histories and build search indexes; returns a summary
+
+    prefetch(scheme_codes) loads the histories into nav_store and each
+    search warmer builds one search index, returning a true value on
+    success. Failures are logged, not raised,
+    so a provider outage never blocks startup. With freeze, the warmed
+    objects are moved out of the garbage collector's reach (gc.freeze) so
+    collections in forked workers do not touch, and copy, their pages.
+    """
+    summary = {'schemes': list(scheme_codes), 'nav_loaded': 0, 'search_indexes': 0}
+    started = time.time()
+
+    try:
+        prefetch(scheme_codes)
+    except Exception as e:
+        logger.warning(f"NAV warmup failed: {e}")
+
+    summary['nav_loaded'] = sum(1 for code in summary['schemes'] if nav_store.peek(code) is not None)
+
+    for warmer in search_warmers:
+        try:
+            if warmer():
+                summary['search_indexes'] += 1
+        except Exception as e:
+            logger.warning(f"Search index warmup failed: {e}")
+
+    if freeze and hasattr(gc, 'freeze'):
+        gc.collect()
+        gc.freeze()
+
+    summary['seconds'] = round(time.time() - started, 3)
+    logger.info(
+        f"Warmup: {summary['nav_loaded']}/{len(summary['schemes'])} NAV histories, "
+        f"{summary['search_indexes']} search indexes in {summary['seconds']}s"
+    )
+    return summary
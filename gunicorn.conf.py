@@ -6,13 +6,43 @@ import os
 bind = f"0.0.0.0:{os.getenv('APP_PORT', 5000)}"
 backlog = 2048
 
-# Worker processes
-workers = multiprocessing.cpu_count() * 2 + 1
-worker_class = "sync"
-worker_connections = 1000
-timeout = 300
+# Worker processes. GUNICORN_PROFILE picks the worker model:
+#   sync    - one request per process; suits CPU-bound simulations (default)
+#   gthread - GUNICORN_THREADS requests per process; a thread waiting on an
+#             upstream NAV fetch no longer blocks the whole worker
+#   gevent  - up to GUNICORN_WORKER_CONNECTIONS greenlets per process, for
+#             mostly I/O-bound traffic (needs gevent installed)
+worker_profile = os.getenv('GUNICORN_PROFILE', 'sync').lower()
+cpus = multiprocessing.cpu_count()
 keepalive = 2
 
+if worker_profile == 'gthread':
+    worker_class = "gthread"
+    workers = int(os.getenv('GUNICORN_WORKERS', cpus + 1))
+    threads = int(os.getenv('GUNICORN_THREADS', 8))
+    timeout = 120
+    concurrency = threads
+elif worker_profile == 'gevent':
+    # Patch before the app is preloaded, so its locks and sockets are cooperative
+    from gevent import monkey
+    monkey.patch_all()
+    worker_class = "gevent"
+    workers = int(os.getenv('GUNICORN_WORKERS', cpus))
+    worker_connections = int(os.getenv('GUNICORN_WORKER_CONNECTIONS', 1000))
+    timeout = 120
+    concurrency = worker_connections
+else:
+    worker_class = "sync"
+    workers = int(os.getenv('GUNICORN_WORKERS', cpus * 2 + 1))
+    timeout = 300
+    concurrency = 1
+
+# Size each worker's upstream pools to the requests it serves at once
+# (capped, so a gevent worker does not open a thousand upstream connections)
+os.environ.setdefault('HTTP_MAX_PER_HOST', str(min(max(4, 2 * concurrency), 32)))
+os.environ.setdefault('HTTP_POOL_SIZE', str(min(max(10, 2 * concurrency), 32)))
+os.environ.setdefault('PROVIDER_POOL_SIZE', str(min(max(8, 2 * concurrency), 64)))
+
 # Restart workers after this many requests, to help prevent memory leaks
 max_requests = 1000
 max_requests_jitter = 100
@@ -41,6 +71,34 @@ tmp_upload_dir = None
 preload_app = True
 worker_tmp_dir = "/dev/shm"
 
+# Warm NAV and search caches in the master while the app is preloaded, so
+# forked workers share them copy-on-write (see backend/warmup.py)
+os.environ.setdefault('SIP_WARMUP', '1')
+os.environ.setdefault('SCHEME_USAGE_LOG', 'logs/scheme_usage.log')
+
+# Prometheus metrics shared by all workers (see backend/metrics.py). The
+# directory must exist, and be emptied of the previous run's samples,
+# before the app is imported.
+os.environ.setdefault('PROMETHEUS_MULTIPROC_DIR', '/dev/shm/sip-metrics')
+_metrics_dir = os.environ['PROMETHEUS_MULTIPROC_DIR']
+os.makedirs(_metrics_dir, exist_ok=True)
+for _name in os.listdir(_metrics_dir):
+    if _name.endswith('.db'):
+        os.remove(os.path.join(_metrics_dir, _name))
+
+# Simulation responses cached once for all workers (see backend/response_cache.py),
+# starting empty so a deploy never serves responses of the previous code
+os.environ.setdefault('RESPONSE_CACHE_BACKEND', 'shm')
+os.environ.setdefault('RESPONSE_CACHE_DIR', '/dev/shm/sip-responses')
+if os.environ['RESPONSE_CACHE_BACKEND'] == 'shm' and os.path.isdir(os.environ['RESPONSE_CACHE_DIR']):
+    for _name in os.listdir(os.environ['RESPONSE_CACHE_DIR']):
+        os.remove(os.path.join(os.environ['RESPONSE_CACHE_DIR'], _name))
+
+def child_exit(server, worker):
+    """Drop the live gauges of a worker that exited"""
+    from metrics import mark_process_dead
+    mark_process_dead(worker.pid)
+
 # Security
 limit_request_line = 4094
 limit_request_fields = 100
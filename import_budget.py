@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Import-time budget report for SIP Simulator
+Imports each entry module in a fresh interpreter with `python -X importtime`,
+reports its cold import time and the slowest imports, and fails when an
+entry module goes over its budget or loads a module that must stay lazy.
+
+Usage: python import_budget.py [--top N]
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+BACKEND = os.path.join(ROOT, 'backend')
+
+# Entry module -> cold import budget in milliseconds
+BUDGETS_MS = {
+    'app': int(os.getenv('IMPORT_BUDGET_APP_MS', 600)),
+    'app_production': int(os.getenv('IMPORT_BUDGET_PRODUCTION_MS', 700)),
+}
+
+# Only the simulation routes may load these
+LAZY_MODULES = ('pandas', 'scipy', 'aiohttp')
+
+def measure(module, cwd=BACKEND):
+    """Cold import of module: {'total_ms', 'imports': [(name, cumulative_ms)], 'loaded': set}"""
+    env = dict(os.environ, PYTHONPATH=cwd, SIP_WARMUP='')
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=cwd, env=env, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{result.stderr[-2000:]}")
+
+    imports = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        # "import time: <self us> | <cumulative us> | <indented module name>"
+        _, cumulative_us, name = line[len('import time:'):].split('|')
+        imports.append((name.strip(), int(cumulative_us) / 1000))
+
+    total = next((ms for name, ms in imports if name == module), 0.0)
+    return {
+        'total_ms': total,
+        'imports': sorted(imports, key=lambda item: item[1], reverse=True),
+        'loaded': {name for name, _ in imports}
+    }
+
+def check(module, budget_ms, top=10):
+    """Print the report for one entry module; returns a list of problems"""
+    report = measure(module)
+    problems = []
+
+    print(f"{module}: {report['total_ms']:.0f} ms (budget {budget_ms} ms)")
+    for name, ms in [item for item in report['imports'] if item[0] != module][:top]:
+        print(f"  {ms:8.1f} ms  {name}")
+
+    if report['total_ms'] > budget_ms:
+        problems.append(f"{module} imports in {report['total_ms']:.0f} ms, over its {budget_ms} ms budget")
+    for name in LAZY_MODULES:
+        if name in report['loaded']:
+            problems.append(f"{module} eagerly imports {name}")
+    return problems
+
+def main():
+    parser = argparse.ArgumentParser(description='Report cold import times against their budgets')
+    parser.add_argument('--top', type=int, default=10, help='Slowest imports to list per module')
+    args = parser.parse_args()
+
+    problems = []
+    for module, budget_ms in BUDGETS_MS.items():
+        problems.extend(check(module, budget_ms, args.top))
+
+    if problems:
+        print("\n❌ Import budget exceeded:")
+        for problem in problems:
+            print(f"  - {problem}")
+        sys.exit(1)
+    print("\n✅ All entry modules within their import budgets")
+
+if __name__ == '__main__':
+    main()
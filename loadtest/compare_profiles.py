@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Compare gunicorn worker profiles under the same load
+Runs the load driver against gunicorn.conf.py once per GUNICORN_PROFILE
+(sync, gthread, gevent), all with the same worker count and mock upstream
+latency, and prints throughput and latency side by side.
+
+Usage:
+    python loadtest/compare_profiles.py --workers 2 --users 32 --duration 30
+    python loadtest/compare_profiles.py --profiles sync,gthread --upstream-latency-ms 300
+"""
+
+import argparse
+import asyncio
+import importlib.util
+import json
+import os
+import signal
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from driver import DEFAULT_MIX, parse_mix, run_load, start_gunicorn, wait_until_healthy
+from mock_upstream import Faults, serve
+
+def run_profile(profile, args, upstream_url):
+    process = start_gunicorn(args.app, args.port, upstream_url, profile=profile, workers=args.workers)
+    try:
+        url = f'http://127.0.0.1:{args.port}'
+        wait_until_healthy(url)
+        return asyncio.run(run_load(url, args.users, args.duration, args.warmup, args.mix, timeout=args.timeout))
+    finally:
+        os.killpg(process.pid, signal.SIGTERM)
+        process.wait(timeout=30)
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare gunicorn worker profiles')
+    parser.add_argument('--profiles', default='sync,gthread,gevent', help='Comma-separated GUNICORN_PROFILE values')
+    parser.add_argument('--workers', type=int, default=2, help='Worker processes for every profile')
+    parser.add_argument('--users', type=int, default=32, help='Concurrent virtual users')
+    parser.add_argument('--duration', type=float, default=30.0, help='Measured seconds per profile')
+    parser.add_argument('--warmup', type=float, default=5.0, help='Unmeasured seconds per profile')
+    parser.add_argument('--mix', type=parse_mix, default=DEFAULT_MIX, help='Scenario weights')
+    parser.add_argument('--timeout', type=float, default=60.0, help='Per-request timeout (s)')
+    parser.add_argument('--app', default='app:app', help='WSGI app')
+    parser.add_argument('--port', type=int, default=5056)
+    parser.add_argument('--upstream-latency-ms', type=float, default=200.0, help='Mock upstream median latency')
+    parser.add_argument('--json', dest='json_path', help='Also write all summaries to this file')
+    args = parser.parse_args()
+
+    profiles = [profile.strip() for profile in args.profiles.split(',') if profile.strip()]
+    if 'gevent' in profiles and importlib.util.find_spec('gevent') is None:
+        print("gevent is not installed, skipping the gevent profile")
+        profiles.remove('gevent')
+
+    server = serve(port=0, faults=Faults(args.upstream_latency_ms))
+    upstream_url = f'http://127.0.0.1:{server.server_address[1]}'
+    results = {}
+    try:
+        for profile in profiles:
+            print(f"Running the {profile} profile ({args.workers} workers, {args.users} users)...")
+            results[profile] = run_profile(profile, args, upstream_url)
+    finally:
+        server.shutdown()
+
+    print(f"\n{'profile':<9} {'req/s':>8} {'errors':>7} {'p50':>8} {'p95':>8} {'p99':>8}")
+    for profile, summary in results.items():
+        total = summary['total']
+        print(f"{profile:<9} {total['throughput_rps']:>8.1f} {sum(total['errors'].values()):>7} "
+              f"{total.get('p50_ms', float('nan')):>8.1f} {total.get('p95_ms', float('nan')):>8.1f} "
+              f"{total.get('p99_ms', float('nan')):>8.1f}")
+    print('(latencies in ms)')
+
+    if args.json_path:
+        with open(args.json_path, 'w') as f:
+            json.dump({'workers': args.workers, 'users': args.users, 'profiles': results}, f, indent=2)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+"""
+Load test driver for SIP Simulator
+Virtual users send a weighted mix of search, simulate, risk and goal
+requests in a closed loop and the run is summarised as throughput and
+latency percentiles per scenario.
+
+Usage:
+    python loadtest/driver.py --url http://127.0.0.1:5000 --users 32 --duration 60
+    python loadtest/driver.py --gunicorn --users 64     # gunicorn.conf.py against the mock upstream
+    python loadtest/driver.py --mix search=70,simulate=30 --json results.json
+
+With --gunicorn the driver starts loadtest/mock_upstream.py in-process,
+launches gunicorn with gunicorn.conf.py pointed at it, runs the scenario
+and stops both, so the numbers never depend on api.mfapi.in.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import signal
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+DEFAULT_MIX = {'search': 40, 'simulate': 25, 'risk': 15, 'goal': 20}
+PERCENTILES = (50, 90, 95, 99)
+
+SEARCH_TERMS = ['sbi', 'hdfc', 'axis bluechip', 'icici', 'midcap', 'small cap', 'flexi', 'index', 'liquid',
+                'parag parikh', 'kotak', 'elss', 'nippon', 'gilt', 'uti nifty']
+SCHEME_CODES = ['120503', '118989', '119551', '120716', '122639', '120465', '118825', '125497', '119062', '120841']
+GOALS = [
+    {'goal_type': 'retirement', 'current_age': 30, 'retirement_age': 60, 'monthly_expenses': 50000,
+     'expected_return': 12, 'inflation_rate': 6},
+    {'goal_type': 'education', 'current_age': 30, 'child_current_age': 5, 'current_education_cost': 2000000,
+     'expected_return': 12, 'inflation_rate': 6},
+    {'goal_type': 'custom', 'goal_amount': 5000000, 'time_horizon': 10, 'expected_return': 12,
+     'inflation_rate': 6},
+]
+
+def _portfolio(rng):
+    years = rng.choice((3, 5, 10))
+    end = datetime.now() - timedelta(days=1)
+    return {
+        'funds': [
+            {'fund_name': f'Fund {code}', 'scheme_code': code, 'sip_amount': rng.choice((2000, 5000, 10000))}
+            for code in rng.sample(SCHEME_CODES, rng.randint(1, 4))
+        ],
+        'start_date': (end - timedelta(days=365 * years)).strftime('%Y-%m-%d'),
+        'end_date': end.strftime('%Y-%m-%d')
+    }
+
+# Scenario -> rng -> (method, path, json body)
+SCENARIOS = {
+    'search': lambda rng: ('GET', f'/api/search-funds?q={rng.choice(SEARCH_TERMS)}', None),
+    'simulate': lambda rng: ('POST', '/api/simulate', _portfolio(rng)),
+    'risk': lambda rng: ('POST', '/api/risk-analysis', _portfolio(rng)),
+    'goal': lambda rng: ('POST', '/api/goal-planning', rng.choice(GOALS)),
+}
+
+def parse_mix(text):
+    """'search=60,simulate=40' -> {'search': 60.0, 'simulate': 40.0}"""
+    mix = {}
+    for part in filter(None, text.split(',')):
+        name, _, weight = part.partition('=')
+        if name.strip() not in SCENARIOS:
+            raise ValueError(f"Unknown scenario '{name}' (choose from {', '.join(SCENARIOS)})")
+        mix[name.strip()] = float(weight or 1)
+    return mix
+
+class Recorder:
+    """Latencies and outcomes per scenario, ignoring requests that started during warm-up"""
+
+    def __init__(self, measure_from):
+        self.measure_from = measure_from
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(lambda: defaultdict(int))
+        self.started = None
+        self.finished = None
+
+    def add(self, scenario, started, seconds, outcome):
+        if started < self.measure_from:
+            return
+        if self.started is None:
+            self.started = started
+        self.finished = max(self.finished or 0.0, started + seconds)
+        if outcome == 200:
+            self.latencies[scenario].append(seconds)
+        else:
+            self.errors[scenario][str(outcome)] += 1
+
+    def summary(self):
+        """{'duration_s', 'scenarios': {name: {...}}, 'total': {...}}"""
+        elapsed = (self.finished - self.started) if self.started is not None else 0.0
+
+        def describe(latencies, errors):
+            ok = len(latencies)
+            failed = sum(errors.values())
+            row = {
+                'requests': ok + failed,
+                'errors': dict(errors),
+                'throughput_rps': round((ok + failed) / elapsed, 2) if elapsed else 0.0,
+            }
+            if ok:
+                values = np.percentile(np.array(latencies) * 1000, PERCENTILES)
+                row.update({f'p{p}_ms': round(float(v), 1) for p, v in zip(PERCENTILES, values)})
+                row['max_ms'] = round(max(latencies) * 1000, 1)
+            return row
+
+        scenarios = sorted(set(self.latencies) | set(self.errors))
+        all_errors = defaultdict(int)
+        for name in scenarios:
+            for outcome, count in self.errors[name].items():
+                all_errors[outcome] += count
+        return {
+            'duration_s': round(elapsed, 2),
+            'scenarios': {name: describe(self.latencies[name], self.errors[name]) for name in scenarios},
+            'total': describe([v for name in scenarios for v in self.latencies[name]], all_errors)
+        }
+
+async def _user(session, base_url, mix, recorder, deadline, seed, think_time, timeout):
+    import aiohttp
+
+    rng = random.Random(seed)
+    names, weights = list(mix), list(mix.values())
+    while time.perf_counter() < deadline:
+        scenario = rng.choices(names, weights)[0]
+        method, path, body = SCENARIOS[scenario](rng)
+        started = time.perf_counter()
+        try:
+            async with session.request(method, base_url + path, json=body,
+                                       timeout=aiohttp.ClientTimeout(total=timeout)) as response:
+                await response.read()
+                outcome = response.status
+        except asyncio.TimeoutError:
+            outcome = 'timeout'
+        except aiohttp.ClientError as e:
+            outcome = type(e).__name__
+        recorder.add(scenario, started, time.perf_counter() - started, outcome)
+        if think_time:
+            await asyncio.sleep(rng.expovariate(1 / think_time))
+
+async def run_load(base_url, users=16, duration=30.0, warmup=5.0, mix=None, think_time=0.0, timeout=60.0, seed=0):
+    """Drive base_url with `users` concurrent virtual users; returns the Recorder summary"""
+    try:
+        import aiohttp
+    except ImportError:
+        raise SystemExit("The load test driver needs aiohttp (pip install aiohttp)")
+
+    start = time.perf_counter()
+    recorder = Recorder(start + warmup)
+    connector = aiohttp.TCPConnector(limit=users)
+    async with aiohttp.ClientSession(connector=connector) as session:
+        await asyncio.gather(*(
+            _user(session, base_url.rstrip('/'), mix or DEFAULT_MIX, recorder, start + warmup + duration,
+                  seed + i, think_time, timeout)
+            for i in range(users)
+        ))
+    return recorder.summary()
+
+def print_report(summary, users):
+    print(f"\n{users} users, {summary['duration_s']:.1f} s measured")
+    header = f"{'scenario':<10} {'requests':>9} {'errors':>7} {'req/s':>8}" + ''.join(
+        f" {f'p{p}':>8}" for p in PERCENTILES) + f" {'max':>8}"
+    print(header)
+    print('-' * len(header))
+    for name, row in list(summary['scenarios'].items()) + [('total', summary['total'])]:
+        line = f"{name:<10} {row['requests']:>9} {sum(row['errors'].values()):>7} {row['throughput_rps']:>8.1f}"
+        line += ''.join(f" {row.get(f'p{p}_ms', float('nan')):>8.1f}" for p in PERCENTILES)
+        line += f" {row.get('max_ms', float('nan')):>8.1f}"
+        print(line)
+    errors = summary['total']['errors']
+    if errors:
+        print('Errors: ' + ', '.join(f'{outcome} x{count}' for outcome, count in sorted(errors.items())))
+    print('(latencies in ms)')
+
+def wait_until_healthy(url, timeout=120.0):
+    import requests
+
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            if requests.get(f'{url}/health', timeout=2).status_code == 200:
+                return
+        except requests.RequestException:
+            pass
+        time.sleep(0.5)
+    raise RuntimeError(f"{url} did not become healthy within {timeout:.0f} s")
+
+def start_gunicorn(app_module, port, upstream_url, extra_args=(), profile=None, workers=None):
+    """gunicorn with gunicorn.conf.py, its upstreams pointed at the mock server"""
+    env = dict(
+        os.environ,
+        APP_PORT=str(port),
+        MFAPI_BASE_URL=upstream_url,
+        AMFI_NAV_URL=f'{upstream_url}/spages/NAVAll.txt',
+        RATE_LIMIT_ENABLED='False'  # Measure the app, not the limiter
+    )
+    if profile:
+        env['GUNICORN_PROFILE'] = profile
+    if workers:
+        env['GUNICORN_WORKERS'] = str(workers)
+    os.makedirs(os.path.join(ROOT, 'logs'), exist_ok=True)
+    return subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '--config', 'gunicorn.conf.py', *extra_args, app_module],
+        cwd=ROOT, env=env, start_new_session=True
+    )
+
+def main():
+    parser = argparse.ArgumentParser(description='SIP Simulator load test driver')
+    parser.add_argument('--url', default='http://127.0.0.1:5000', help='App under test (ignored with --gunicorn)')
+    parser.add_argument('--users', type=int, default=16, help='Concurrent virtual users')
+    parser.add_argument('--duration', type=float, default=30.0, help='Measured seconds')
+    parser.add_argument('--warmup', type=float, default=5.0, help='Unmeasured seconds before the run')
+    parser.add_argument('--mix', type=parse_mix, default=DEFAULT_MIX, help='Scenario weights, e.g. search=60,risk=40')
+    parser.add_argument('--think-time', type=float, default=0.0, help='Mean pause between a user\'s requests (s)')
+    parser.add_argument('--timeout', type=float, default=60.0, help='Per-request timeout (s)')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--json', dest='json_path', help='Also write the summary to this file')
+    parser.add_argument('--gunicorn', action='store_true', help='Start gunicorn and the mock upstream')
+    parser.add_argument('--app', default='app:app', help='WSGI app for --gunicorn')
+    parser.add_argument('--port', type=int, default=5055, help='Port for --gunicorn')
+    parser.add_argument('--profile', choices=('sync', 'gthread', 'gevent'), help='GUNICORN_PROFILE for --gunicorn')
+    parser.add_argument('--workers', type=int, help='GUNICORN_WORKERS for --gunicorn')
+    parser.add_argument('--gunicorn-args', default='', help='Extra gunicorn arguments, e.g. "--threads 16"')
+    parser.add_argument('--upstream-latency-ms', type=float, default=50.0, help='Mock upstream median latency')
+    parser.add_argument('--upstream-error-rate', type=float, default=0.0, help='Mock upstream error rate')
+    args = parser.parse_args()
+
+    server = process = None
+    url = args.url
+    try:
+        if args.gunicorn:
+            from mock_upstream import Faults, serve
+
+            server = serve(port=0, faults=Faults(args.upstream_latency_ms, error_rate=args.upstream_error_rate))
+            upstream_url = f'http://127.0.0.1:{server.server_address[1]}'
+            process = start_gunicorn(args.app, args.port, upstream_url, args.gunicorn_args.split(),
+                                     args.profile, args.workers)
+            url = f'http://127.0.0.1:{args.port}'
+            wait_until_healthy(url)
+            print(f"gunicorn ({args.app}, {args.profile or 'default'} profile) on {url}, "
+                  f"mock upstream on {upstream_url}")
+
+        summary = asyncio.run(run_load(url, args.users, args.duration, args.warmup, args.mix, args.think_time,
+                                       args.timeout, args.seed))
+    finally:
+        if process is not None:
+            os.killpg(process.pid, signal.SIGTERM)
+            process.wait(timeout=30)
+        if server is not None:
+            print(f"Mock upstream served: {dict(server.stats)}")
+            server.shutdown()
+
+    print_report(summary, args.users)
+    if args.json_path:
+        with open(args.json_path, 'w') as f:
+            json.dump(dict(summary, users=args.users, url=url, mix=args.mix), f, indent=2)
+
+if __name__ == '__main__':
+    main()
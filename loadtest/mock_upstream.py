@@ -0,0 +1,261 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the mfapi.in and AMFI upstreams
+Serves /mf (scheme list), /mf/<code> (NAV history) and /spages/NAVAll.txt
+from recorded responses, falling back to deterministic synthetic data for
+anything that was not recorded, with configurable latency and error
+injection. Point the app at it with
+
+    MFAPI_BASE_URL=http://127.0.0.1:9100
+    AMFI_NAV_URL=http://127.0.0.1:9100/spages/NAVAll.txt
+
+Usage:
+    python loadtest/mock_upstream.py serve --latency-ms 80 --error-rate 0.01
+    python loadtest/mock_upstream.py record --codes 120503,118989   # needs network
+
+Faults can be changed while the server runs:
+    curl -X POST localhost:9100/_faults -d '{"error_rate": 0.2}'
+    curl localhost:9100/_stats
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'backend'))
+
+import numpy as np
+from fund_master import COMPREHENSIVE_FUND_LIST
+from utils.synthetic_market import generate_paths
+
+RECORDINGS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'recordings')
+HISTORY_START = '2013-01-01'
+EXTRA_SCHEMES = 2000  # Synthetic schemes added to the list, so search has a realistic size
+
+class Faults:
+    """Injected latency (log-normal around a median) and failures"""
+
+    FIELDS = ('latency_ms', 'jitter', 'error_rate', 'error_status', 'hang_rate', 'hang_s')
+
+    def __init__(self, latency_ms=50.0, jitter=0.5, error_rate=0.0, error_status=503, hang_rate=0.0, hang_s=30.0):
+        self.latency_ms = latency_ms
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.hang_rate = hang_rate
+        self.hang_s = hang_s
+        self._random = random.Random()
+        self._lock = threading.Lock()
+
+    def update(self, settings):
+        with self._lock:
+            for field in self.FIELDS:
+                if field in settings:
+                    setattr(self, field, type(getattr(self, field))(settings[field]))
+
+    def as_dict(self):
+        return {field: getattr(self, field) for field in self.FIELDS}
+
+    def draw(self):
+        """(delay_seconds, status or None) for one request"""
+        with self._lock:
+            roll = self._random.random()
+            if roll < self.hang_rate:
+                return self.hang_s, None
+            delay = self.latency_ms / 1000 * self._random.lognormvariate(0, self.jitter) if self.latency_ms else 0.0
+            if roll < self.hang_rate + self.error_rate:
+                return delay, self.error_status
+            return delay, None
+
+class Upstream:
+    """Response bodies by path: recordings first, synthetic data otherwise"""
+
+    def __init__(self, recordings_dir=RECORDINGS_DIR, extra_schemes=EXTRA_SCHEMES):
+        self.recordings_dir = recordings_dir
+        self.extra_schemes = extra_schemes
+        self._bodies = {}
+        self._lock = threading.Lock()
+
+    def body(self, path):
+        """(content_type, bytes) for path, or None when it is not an upstream path"""
+        if path == '/mf':
+            key, build = 'mf', self._scheme_list
+        elif path.startswith('/mf/') and path[4:].isdigit():
+            key, build = f'mf/{path[4:]}', lambda: self._nav_history(path[4:])
+        elif path == '/spages/NAVAll.txt':
+            key, build = 'NAVAll.txt', self._amfi_nav
+        else:
+            return None
+
+        body = self._bodies.get(key)
+        if body is None:
+            body = self._recorded(key) or build()
+            with self._lock:
+                self._bodies[key] = body
+        content_type = 'text/plain; charset=utf-8' if key.endswith('.txt') else 'application/json'
+        return content_type, body
+
+    def _recorded(self, key):
+        path = os.path.join(self.recordings_dir, key if key.endswith('.txt') else f'{key}.json')
+        if os.path.exists(path):
+            with open(path, 'rb') as f:
+                return f.read()
+        return None
+
+    def schemes(self):
+        """[(code, name, fund_house)] of the static fund list plus synthetic schemes"""
+        schemes = [
+            (fund['scheme_code'], fund['fund_name'], fund['fund_name'].split(' ')[0])
+            for fund in COMPREHENSIVE_FUND_LIST
+        ]
+        styles = ['Bluechip', 'Flexi Cap', 'Midcap', 'Small Cap', 'ELSS Tax Saver', 'Liquid', 'Gilt', 'Index']
+        houses = ['Axis', 'DSP', 'HDFC', 'ICICI Prudential', 'Kotak', 'Nippon India', 'SBI', 'UTI']
+        for i in range(self.extra_schemes):
+            house = houses[i % len(houses)]
+            schemes.append((str(150000 + i), f"{house} {styles[i // len(houses) % len(styles)]} Fund {i} - Growth", house))
+        return schemes
+
+    def _scheme_list(self):
+        return json.dumps([{'schemeCode': int(code), 'schemeName': name} for code, name, _ in self.schemes()]).encode()
+
+    def _nav_history(self, code):
+        dates, navs = generate_paths([code], HISTORY_START, datetime.now().strftime('%Y-%m-%d'))
+        names = {scheme_code: (name, house) for scheme_code, name, house in self.schemes()}
+        name, house = names.get(code, (f'Synthetic Scheme {code}', 'Synthetic'))
+        payload = {
+            'meta': {
+                'fund_house': house, 'scheme_type': 'Open Ended Schemes', 'scheme_category': 'Equity Scheme',
+                'scheme_code': int(code), 'scheme_name': name
+            },
+            # Newest first, dd-mm-yyyy dates and string NAVs, as mfapi.in returns them
+            'data': [
+                {'date': f'{date[8:10]}-{date[5:7]}-{date[:4]}', 'nav': f'{nav:.5f}'}
+                for date, nav in zip(reversed(np.datetime_as_string(dates, unit='D').tolist()),
+                                     reversed(navs[:, 0].tolist()))
+            ],
+            'status': 'SUCCESS'
+        }
+        return json.dumps(payload).encode()
+
+    def _amfi_nav(self):
+        today = datetime.now().strftime('%d-%b-%Y')
+        lines = ['Scheme Code;ISIN Div Payout/ ISIN Growth;ISIN Div Reinvestment;Scheme Name;Net Asset Value;Date', '']
+        current_house = None
+        for code, name, house in sorted(self.schemes(), key=lambda scheme: scheme[2]):
+            if house != current_house:
+                lines.extend(['', f'{house} Mutual Fund', ''])
+                current_house = house
+            lines.append(f'{code};-;-;{name};{100 + int(code) % 900:.4f};{today}')
+        return '\n'.join(lines).encode()
+
+def make_handler(upstream, faults, stats):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'  # Keep-alive, like the real upstream
+
+        def log_message(self, format, *args):
+            pass
+
+        def _send(self, status, body, content_type='application/json'):
+            self.send_response(status)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            path = self.path.split('?', 1)[0]
+            if path == '/_stats':
+                return self._send(200, json.dumps({'requests': dict(stats), 'faults': faults.as_dict()}).encode())
+
+            found = upstream.body(path)
+            if found is None:
+                stats['not_found'] += 1
+                return self._send(404, b'{"status": "ERROR"}')
+
+            delay, error = faults.draw()
+            time.sleep(delay)
+            if error:
+                stats['injected_error'] += 1
+                return self._send(error, b'{"status": "ERROR"}')
+            stats['ok'] += 1
+            self._send(200, found[1], found[0])
+
+        def do_POST(self):
+            if self.path != '/_faults':
+                return self._send(404, b'{}')
+            length = int(self.headers.get('Content-Length', 0))
+            try:
+                faults.update(json.loads(self.rfile.read(length) or b'{}'))
+            except (ValueError, TypeError) as e:
+                return self._send(400, json.dumps({'error': str(e)}).encode())
+            self._send(200, json.dumps(faults.as_dict()).encode())
+
+    return Handler
+
+def serve(host='127.0.0.1', port=9100, faults=None, upstream=None):
+    """Start the mock upstream in a background thread; returns the server (call shutdown() to stop)"""
+    stats = Counter()
+    server = ThreadingHTTPServer((host, port), make_handler(upstream or Upstream(), faults or Faults(), stats))
+    server.daemon_threads = True
+    server.stats = stats
+    threading.Thread(target=server.serve_forever, name='mock-upstream', daemon=True).start()
+    return server
+
+def record(codes, out=RECORDINGS_DIR, mfapi='https://api.mfapi.in',
+           amfi='https://www.amfiindia.com/spages/NAVAll.txt'):
+    """Save real upstream responses for replay"""
+    import requests
+
+    os.makedirs(os.path.join(out, 'mf'), exist_ok=True)
+    targets = [(f'{mfapi}/mf', 'mf.json'), (amfi, 'NAVAll.txt')]
+    targets += [(f'{mfapi}/mf/{code}', os.path.join('mf', f'{code}.json')) for code in codes]
+    for url, name in targets:
+        response = requests.get(url, timeout=60)
+        response.raise_for_status()
+        with open(os.path.join(out, name), 'wb') as f:
+            f.write(response.content)
+        print(f"Recorded {url} -> {name} ({len(response.content)} bytes)")
+
+def main():
+    parser = argparse.ArgumentParser(description='Mock mfapi.in / AMFI upstream for load tests')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    serve_parser = commands.add_parser('serve', help='Serve recorded or synthetic responses')
+    serve_parser.add_argument('--host', default='127.0.0.1')
+    serve_parser.add_argument('--port', type=int, default=9100)
+    serve_parser.add_argument('--recordings', default=RECORDINGS_DIR, help='Directory of recorded responses')
+    serve_parser.add_argument('--latency-ms', type=float, default=50.0, help='Median response latency')
+    serve_parser.add_argument('--jitter', type=float, default=0.5, help='Log-normal sigma of the latency')
+    serve_parser.add_argument('--error-rate', type=float, default=0.0, help='Fraction of requests that fail')
+    serve_parser.add_argument('--error-status', type=int, default=503)
+    serve_parser.add_argument('--hang-rate', type=float, default=0.0, help='Fraction of requests that stall')
+    serve_parser.add_argument('--hang-s', type=float, default=30.0, help='How long a stalled request takes')
+
+    record_parser = commands.add_parser('record', help='Save real upstream responses for replay')
+    record_parser.add_argument('--codes', default=','.join(fund['scheme_code'] for fund in COMPREHENSIVE_FUND_LIST[:20]))
+    record_parser.add_argument('--out', default=RECORDINGS_DIR)
+
+    args = parser.parse_args()
+    if args.command == 'record':
+        record([code for code in args.codes.split(',') if code], args.out)
+        return
+
+    faults = Faults(args.latency_ms, args.jitter, args.error_rate, args.error_status, args.hang_rate, args.hang_s)
+    server = serve(args.host, args.port, faults, Upstream(args.recordings))
+    print(f"Mock upstream on http://{args.host}:{args.port} ({json.dumps(faults.as_dict())})")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+if __name__ == '__main__':
+    main()
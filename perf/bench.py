@@ -0,0 +1,399 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite for SIP Simulator hot paths
+Times the SIP engine, XIRR, risk metrics, fund search at 40k schemes and
+end-to-end API requests over synthetic market data (no network), and
+compares the results with a stored baseline.
+
+Usage:
+    python perf/bench.py                   # run and compare with perf/baseline.json
+    python perf/bench.py -k e2e            # only cases whose name contains 'e2e'
+    python perf/bench.py --save-baseline   # record the current timings as the baseline
+
+Timings are normalised by a fixed reference workload measured on both
+machines, so a baseline recorded on a laptop still applies in CI. A case
+regresses when its fastest round is more than `threshold` times its
+baseline, on the first run and on a re-run of the regressed cases.
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'backend'))
+sys.path.insert(0, ROOT)  # 'app' is the root app, as in production
+os.environ['SIP_WARMUP'] = ''  # The suite seeds its own data
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+DEFAULT_THRESHOLD = 1.5
+
+END_DATE = '2024-12-31'
+HISTORY_START = '2004-01-01'
+SEARCH_SCHEMES = 40000
+BENCHMARK_CODE = '147625'
+FUND_CODES = ['120503', '118989', '119551', '120716', '122639', '120465', '118825', '125497', '119062', '120841']
+
+CASES = []
+
+def case(name):
+    """Register setup(): returns the zero-argument callable to time, or raises Skip"""
+    def register(setup):
+        CASES.append((name, setup))
+        return setup
+    return register
+
+class Skip(Exception):
+    """Case cannot run in this tree (e.g. a module fails to import)"""
+
+# Synthetic data
+
+def horizon(years):
+    end = datetime.strptime(END_DATE, '%Y-%m-%d')
+    return end.replace(year=end.year - years), end
+
+def portfolio(size, sip_amount=5000):
+    return [
+        {'fund_name': f'Fund {code}', 'scheme_code': code, 'sip_amount': sip_amount + 500 * i}
+        for i, code in enumerate(FUND_CODES[:size])
+    ]
+
+def scheme_list(count=SEARCH_SCHEMES):
+    """Deterministic MF API style scheme list of realistic names"""
+    amcs = ['Aditya Birla Sun Life', 'Axis', 'Bandhan', 'DSP', 'Edelweiss', 'Franklin India', 'HDFC', 'HSBC',
+            'ICICI Prudential', 'Invesco India', 'Kotak', 'Mirae Asset', 'Motilal Oswal', 'Nippon India',
+            'Parag Parikh', 'Quant', 'SBI', 'Sundaram', 'Tata', 'UTI']
+    categories = ['Bluechip', 'Flexi Cap', 'Large & Mid Cap', 'Midcap', 'Small Cap', 'Multi Cap', 'Value',
+                  'Focused', 'ELSS Tax Saver', 'Balanced Advantage', 'Corporate Bond', 'Liquid', 'Gilt',
+                  'Nifty 50 Index', 'Banking & PSU Debt', 'Arbitrage', 'Dividend Yield', 'Infrastructure',
+                  'Pharma & Healthcare', 'Technology']
+    variants = ['Direct Plan - Growth', 'Regular Plan - Growth', 'Direct Plan - IDCW', 'Regular Plan - IDCW']
+    schemes = []
+    for i in range(count):
+        amc = amcs[i % len(amcs)]
+        category = categories[(i // len(amcs)) % len(categories)]
+        variant = variants[(i // (len(amcs) * len(categories))) % len(variants)]
+        series = i // (len(amcs) * len(categories) * len(variants))
+        schemes.append({
+            'schemeCode': 100000 + i,
+            'schemeName': f"{amc} {category} Fund {'Series ' + str(series) + ' ' if series else ''}- {variant}",
+            'fundHouse': f"{amc} Mutual Fund"
+        })
+    return schemes
+
+_seeded = {}
+
+def seeded_backend():
+    """backend.app with every benchmark scheme in the NAV store and a 40k-scheme search index"""
+    if not _seeded:
+        from utils.synthetic_market import synthetic_nav_frame
+        from fund_data_sources import HybridDataProvider, MFAPIProvider
+        import backend.app as backend_app
+
+        for code in FUND_CODES + [BENCHMARK_CODE]:
+            backend_app.NAV_STORE.put(code, synthetic_nav_frame(code, HISTORY_START, END_DATE))
+
+        mfapi = MFAPIProvider()
+        mfapi.cache['all_funds'] = (time.time() + 86400, mfapi._build_search_index(scheme_list()))
+        backend_app.FUND_DATA_PROVIDER = HybridDataProvider(providers=[mfapi])
+        _seeded.update(app=backend_app, mfapi=mfapi)
+    return _seeded['app']
+
+def client():
+    from app import app
+    seeded_backend()
+    return app.test_client()
+
+# Cases: SIP engine
+
+for years in (5, 20):
+    @case(f'engine/process_fund[{years}y]')
+    def _process_fund(years=years):
+        backend_app = seeded_backend()
+        start, end = horizon(years)
+        info = {'scheme_code': FUND_CODES[0], 'sip_amount': 5000}
+        return lambda: backend_app.process_fund('Fund', info, start, end, [])
+
+for size, years in ((1, 5), (5, 10), (10, 20)):
+    @case(f'engine/process_portfolio_cumulative_optimized[{size} funds, {years}y]')
+    def _cumulative(size=size, years=years):
+        backend_app = seeded_backend()
+        start, end = horizon(years)
+        funds = {f['fund_name']: {'scheme_code': f['scheme_code'], 'sip_amount': f['sip_amount']} for f in portfolio(size)}
+        return lambda: backend_app.process_portfolio_cumulative_optimized(funds, start, end)
+
+# Cases: XIRR
+
+def sip_cash_flows(years, funds=1):
+    import pandas as pd
+    start, end = horizon(years)
+    dates = list(pd.date_range(start, end, freq='MS'))
+    flows = [(date, -5000.0 * funds) for date in dates]
+    flows.append((pd.Timestamp(end), 5000.0 * funds * len(dates) * 1.6))
+    return flows
+
+for years, funds in ((10, 1), (20, 10)):
+    @case(f'xirr/xirr[{years}y, {funds} funds]')
+    def _xirr(years=years, funds=funds):
+        backend_app = seeded_backend()
+        flows = sip_cash_flows(years, funds)
+        return lambda: backend_app.xirr(flows)
+
+@case('xirr/calculate_xirr[10y]')
+def _calculate_xirr():
+    try:
+        from utils.calculations import calculate_xirr
+    except ImportError as e:
+        raise Skip(f"utils.calculations does not import: {e}")
+    flows = [{'date': date, 'amount': amount} for date, amount in sip_cash_flows(10)]
+    return lambda: calculate_xirr(flows)
+
+# Cases: risk metrics
+
+def monthly_values(code, years):
+    backend_app = seeded_backend()
+    start, end = horizon(years)
+    return backend_app.process_fund_cumulative(code, {'scheme_code': code, 'sip_amount': 5000}, start, end)
+
+@case('risk/calculate_risk_metrics[10y]')
+def _risk():
+    backend_app = seeded_backend()
+    data = monthly_values(FUND_CODES[0], 10)
+    return lambda: backend_app.calculate_risk_metrics(data)
+
+@case('risk/calculate_risk_metrics[10y, benchmark]')
+def _risk_benchmark():
+    backend_app = seeded_backend()
+    data, benchmark = monthly_values(FUND_CODES[0], 10), monthly_values(BENCHMARK_CODE, 10)
+    return lambda: backend_app.calculate_risk_metrics(data, benchmark)
+
+@case('risk/utils.calculate_risk_metrics[10y]')
+def _utils_risk():
+    try:
+        from utils.calculations import calculate_risk_metrics
+    except ImportError as e:
+        raise Skip(f"utils.calculations does not import: {e}")
+    data = monthly_values(FUND_CODES[0], 10).records()  # Takes chart rows
+    return lambda: calculate_risk_metrics(data)
+
+# Cases: search
+
+for query in ('bluechip', 'no such scheme'):
+    @case(f'search/_filter_funds[40k, {query!r}]')
+    def _filter(query=query):
+        seeded_backend()
+        mfapi = _seeded['mfapi']
+        index = mfapi.cache['all_funds'][1]
+        return lambda: mfapi._filter_funds(index, query, 50)
+
+# Cases: end-to-end requests
+
+def post(path, payload):
+    test_client = client()
+    body = json.dumps(payload)
+
+    def request():
+        response = test_client.post(path, data=body, content_type='application/json')
+        assert response.status_code == 200, response.status_code
+    return request
+
+for size, years in ((1, 5), (5, 10), (10, 20)):
+    @case(f'e2e/simulate[{size} funds, {years}y]')
+    def _simulate(size=size, years=years):
+        start, end = horizon(years)
+        return post('/api/simulate', {'funds': portfolio(size), 'start_date': f'{start:%Y-%m-%d}', 'end_date': END_DATE})
+
+@case('e2e/cumulative-performance[5 funds, 10y]')
+def _cumulative_e2e():
+    start, end = horizon(10)
+    return post('/api/cumulative-performance', {'funds': portfolio(5), 'start_date': f'{start:%Y-%m-%d}', 'end_date': END_DATE})
+
+@case('e2e/risk-analysis[5 funds, 10y]')
+def _risk_e2e():
+    start, end = horizon(10)
+    return post('/api/risk-analysis', {'funds': portfolio(5), 'start_date': f'{start:%Y-%m-%d}', 'end_date': END_DATE})
+
+@case('e2e/strategy-compare[4 strategies, 20y]')
+def _strategy_e2e():
+    start, end = horizon(20)
+    return post('/api/strategy-compare', {'scheme_code': FUND_CODES[0], 'source_scheme_code': FUND_CODES[1],
+                                          'start_date': f'{start:%Y-%m-%d}', 'end_date': END_DATE})
+
+@case('e2e/search-funds[40k]')
+def _search_e2e():
+    test_client = client()
+
+    def request():
+        response = test_client.get('/api/search-funds?q=flexi')
+        assert response.status_code == 200, response.status_code
+    return request
+
+# Harness
+
+def reference_workload():
+    """Fixed mix of interpreter and NumPy work used to normalise across machines"""
+    import numpy as np
+    total = 0
+    for i in range(100000):
+        total += i * i % 7
+    values = np.random.default_rng(0).standard_normal(200000)
+    np.sort(values)
+    return total
+
+def measure(fn, rounds=5, min_round=0.05):
+    """Per-call (min, median) in milliseconds over rounds of auto-sized loops"""
+    with contextlib.redirect_stdout(io.StringIO()):
+        fn()  # Warm caches and lazy imports
+        loops, elapsed = 1, 0.0
+        while True:
+            started = time.perf_counter()
+            for _ in range(loops):
+                fn()
+            elapsed = time.perf_counter() - started
+            if elapsed >= min_round or loops >= 1 << 16:
+                break
+            loops *= 2 if elapsed == 0 else max(2, min(10, int(min_round / elapsed) + 1))
+
+        timings = []
+        for _ in range(rounds):
+            started = time.perf_counter()
+            for _ in range(loops):
+                fn()
+            timings.append((time.perf_counter() - started) / loops * 1000)
+    return min(timings), statistics.median(timings)
+
+def run(pattern=None, rounds=7, names=None):
+    """Timings of the selected cases: {'reference_ms', 'cases': {name: {...}}}"""
+    reference = [measure(reference_workload, rounds)[0]]
+    results = {'cases': {}}
+    for name, setup in CASES:
+        if (pattern and pattern not in name) or (names is not None and name not in names):
+            continue
+        try:
+            fn = setup()
+        except Skip as e:
+            results['cases'][name] = {'skipped': str(e)}
+            continue
+        best, median = measure(fn, rounds)
+        results['cases'][name] = {'min_ms': round(best, 4), 'median_ms': round(median, 4)}
+    # Best of before and after, so a noisy moment does not skew every ratio
+    reference.append(measure(reference_workload, rounds)[0])
+    results['reference_ms'] = min(reference)
+    return results
+
+def compare(results, baseline, threshold=None):
+    """Rows of (name, min_ms, expected_ms, ratio, status) against a normalised baseline
+
+    The fastest round is compared: it is the least disturbed by other load
+    on the machine.
+    """
+    scale = results['reference_ms'] / baseline['reference_ms'] if baseline.get('reference_ms') else 1.0
+    rows = []
+    for name, current in results['cases'].items():
+        if 'skipped' in current:
+            rows.append((name, None, None, None, 'skipped'))
+            continue
+        stored = baseline.get('cases', {}).get(name)
+        if not stored or 'min_ms' not in stored:
+            rows.append((name, current['min_ms'], None, None, 'new'))
+            continue
+        limit = threshold or stored.get('threshold') or baseline.get('threshold', DEFAULT_THRESHOLD)
+        expected = stored['min_ms'] * scale
+        ratio = current['min_ms'] / expected
+        rows.append((name, current['min_ms'], expected, ratio, 'REGRESSED' if ratio > limit else 'ok'))
+    return rows
+
+def confirm(results, baseline, threshold=None, rounds=7):
+    """Re-measure regressed cases once, keeping their faster timing
+
+    A slowdown has to show up twice before it is reported, which filters
+    out moments where other load on the machine slowed a whole case down.
+    """
+    regressed = {row[0] for row in compare(results, baseline, threshold) if row[4] == 'REGRESSED'}
+    if not regressed:
+        return results
+    retry = run(rounds=rounds, names=regressed)
+    for name, data in retry['cases'].items():
+        first = results['cases'][name]
+        # Ratios, so both runs are judged against their own reference workload
+        if data['min_ms'] / retry['reference_ms'] < first['min_ms'] / results['reference_ms']:
+            results['cases'][name] = {
+                key: round(value * results['reference_ms'] / retry['reference_ms'], 4)
+                for key, value in data.items()
+            }
+    return results
+
+def save_baseline(results, path=BASELINE_PATH, threshold=DEFAULT_THRESHOLD):
+    """Store results as the baseline, keeping per-case thresholds of the previous one"""
+    previous = {}
+    if os.path.exists(path):
+        with open(path) as f:
+            previous = json.load(f).get('cases', {})
+    cases = {}
+    for name, data in results['cases'].items():
+        if 'skipped' in data:
+            continue
+        cases[name] = dict(data)
+        if 'threshold' in previous.get(name, {}):
+            cases[name]['threshold'] = previous[name]['threshold']
+
+    baseline = {
+        'recorded': datetime.now().strftime('%Y-%m-%d'),
+        'machine': f"{platform.machine()} {platform.system()}, Python {platform.python_version()}",
+        'threshold': threshold,
+        'reference_ms': round(results['reference_ms'], 4),
+        'cases': cases
+    }
+    with open(path, 'w') as f:
+        json.dump(baseline, f, indent=2)
+        f.write('\n')
+    return baseline
+
+def main():
+    parser = argparse.ArgumentParser(description='SIP Simulator benchmark suite')
+    parser.add_argument('-k', dest='pattern', help='Only run cases whose name contains this')
+    parser.add_argument('--rounds', type=int, default=7, help='Timed rounds per case')
+    parser.add_argument('--baseline', default=BASELINE_PATH, help='Baseline JSON file')
+    parser.add_argument('--threshold', type=float, help='Allowed slowdown ratio (overrides the baseline)')
+    parser.add_argument('--save-baseline', action='store_true', help='Store these timings as the baseline')
+    args = parser.parse_args()
+
+    results = run(args.pattern, args.rounds)
+    print(f"Reference workload: {results['reference_ms']:.2f} ms")
+
+    if args.save_baseline:
+        save_baseline(results, args.baseline)
+        print(f"Baseline saved to {args.baseline}")
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    if baseline and not args.save_baseline:
+        results = confirm(results, baseline, args.threshold, args.rounds)
+
+    regressions = 0
+    for name, best, expected, ratio, status in compare(results, baseline, args.threshold):
+        if status == 'skipped':
+            print(f"  {'skipped':>10}  {name}: {results['cases'][name]['skipped']}")
+        elif expected is None:
+            print(f"  {best:8.3f} ms  {name} (no baseline)")
+        else:
+            print(f"  {best:8.3f} ms  {name}  x{ratio:.2f} of baseline {expected:.3f} ms  {status}")
+            regressions += status == 'REGRESSED'
+
+    if regressions:
+        print(f"\n❌ {regressions} benchmark(s) regressed")
+        sys.exit(1)
+    print("\n✅ No benchmark regressions")
+
+if __name__ == '__main__':
+    main()
@@ -8,8 +8,10 @@ import json
 import sys
 import os
 import time
+import functools
 from unittest.mock import patch, MagicMock
 from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
 
 # Add current directory to path
 sys.path.insert(0, os.path.dirname(__file__))
@@ -17,6 +19,30 @@ sys.path.insert(0, os.path.dirname(__file__))
 # Import the app
 from app import app
 
+# Backend modules (importing the app puts backend/ on the path)
+import numpy as np
+import pandas as pd
+from utils.rolling_metrics import rolling_regression
+from utils.goal_solver import future_value_step_up, solve_step_up_sip
+from utils.withdrawal import (
+    monte_carlo_return_paths, required_corpus, simulate_withdrawals, max_sustainable_withdrawal
+)
+from utils.synthetic_market import generate_paths, synthetic_nav_frame
+from utils.sip_engine import sip_schedule, step_up_amounts, run_sip
+from backend.app import NAV_STORE, prefetch_nav_histories
+from async_fetch import fetch_nav_histories
+from singleflight import SingleFlight
+from nav_store import NAVStore
+from revalidate import Revalidator
+from fund_data_sources import HybridDataProvider, MFAPIProvider
+from warmup import hot_schemes, warm_caches
+from provider_selection import ProviderSelector
+from http_transport import HTTPTransport, CircuitOpenError
+from utils.lazy_imports import LazyModule, lazy_import
+import import_budget
+import instrumentation
+import metrics
+
 @pytest.fixture
 def client():
     """Create test client"""
@@ -341,6 +367,1380 @@ def test_backend_connectivity(client):
         # Check if response is reasonable
         assert response_time < 10.0  # Should respond within 10 seconds
 
+def test_rolling_regression_matches_refit():
+    """Test cumulative-sum rolling moments against a per-window refit"""
+    rng = np.random.default_rng(42)
+    benchmark = rng.normal(0.01, 0.05, 60)
+    funds = np.column_stack([
+        0.002 + 1.2 * benchmark + rng.normal(0, 0.02, 60),
+        0.8 * benchmark + rng.normal(0, 0.03, 60)
+    ])
+    window = 12
+    rf = 0.06 / 12
+    
+    metrics = rolling_regression(funds, benchmark, window)
+    assert metrics['beta'].shape == (60 - window + 1, 2)
+    
+    for end in (window, 30, 60):
+        x = benchmark[end - window:end] - rf
+        for i in range(2):
+            y = funds[end - window:end, i] - rf
+            beta, alpha = np.polyfit(x, y, 1)
+            active = y - x
+            tracking_error = active.std(ddof=1) * np.sqrt(12)
+            row = end - window
+            assert np.isclose(metrics['beta'][row, i], beta)
+            assert np.isclose(metrics['alpha'][row, i], alpha * 12)
+            assert np.isclose(metrics['r_squared'][row, i], np.corrcoef(x, y)[0, 1] ** 2)
+            assert np.isclose(metrics['tracking_error'][row, i], tracking_error)
+            assert np.isclose(metrics['information_ratio'][row, i], active.mean() * 12 / tracking_error)
+    
+    single = rolling_regression(funds[:, 0], benchmark, window)
+    assert np.allclose(single['beta'], metrics['beta'][:, 0])
+    print("✅ Rolling regression matches per-window refit")
+
+def test_rolling_metrics_endpoint(client):
+    """Test rolling metrics endpoint against a configurable benchmark"""
+    response = client.get('/api/benchmarks')
+    assert response.status_code == 200
+    keys = [b['key'] for b in json.loads(response.data)['benchmarks']]
+    assert 'nifty50' in keys
+    
+    end_date = datetime.now()
+    start_date = end_date - timedelta(days=5*365)
+    test_data = {
+        "funds": [
+            {"fund_name": "Test Fund", "scheme_code": "123456", "sip_amount": 5000},
+            {"fund_name": "Other Fund", "scheme_code": "120503", "sip_amount": 5000}
+        ],
+        "start_date": start_date.strftime('%Y-%m-%d'),
+        "end_date": end_date.strftime('%Y-%m-%d'),
+        "benchmark": "sensex",
+        "window": 12
+    }
+    response = client.post('/api/rolling-metrics',
+                          data=json.dumps(test_data),
+                          content_type='application/json')
+    assert response.status_code in [200, 503]
+    
+    if response.status_code == 200:
+        data = json.loads(response.data)
+        assert data['success'] == True
+        assert data['data']['benchmark']['key'] == 'sensex'
+        for fund in data['data']['funds']:
+            assert len(fund['rolling']['beta']) == len(data['data']['dates'])
+    print("✅ Rolling metrics endpoint tested")
+
+def test_step_up_sip_closed_form():
+    """Test closed-form step-up SIP against a month-by-month simulation"""
+    def simulate(initial_sip, years, annual_return, step_up):
+        value = 0
+        for month in range(int(round(years * 12))):
+            value = value * (1 + annual_return / 1200) + initial_sip * (1 + step_up / 100) ** (month // 12)
+        return value
+    
+    for initial_sip, years, annual_return, step_up in [(10000, 10, 12, 10), (5000, 7.5, 11, 6), (2000, 15, 0, 5)]:
+        assert np.isclose(future_value_step_up(initial_sip, years, annual_return, step_up),
+                          simulate(initial_sip, years, annual_return, step_up))
+    
+    # Solving for the SIP inverts the future value, for a whole batch at once
+    sips = solve_step_up_sip([1e6, 5e6, 2e7], [5, 10, 25], [10, 12, 14], [0, 10, 6])
+    values = future_value_step_up(sips, [5, 10, 25], [10, 12, 14], [0, 10, 6])
+    assert np.allclose(values, [1e6, 5e6, 2e7])
+    print("✅ Closed-form step-up SIP verified")
+
+def test_calculations_use_goal_solver():
+    """Test the services' step-up and goal SIP calculations agree with the goal solver"""
+    from utils.calculations import (calculate_step_up_sip_value, calculate_goal_sip_requirements,
+                                    calculate_required_sip, get_asset_allocation_recommendation)
+    from utils.goal_solver import solve_goals
+    
+    assert np.isclose(calculate_step_up_sip_value(10000, 12, 10, 10), future_value_step_up(10000, 10, 12, 10))
+    assert isinstance(calculate_step_up_sip_value(5000, 11, 7.5, 6), float)
+    
+    # Goals in future money: no inflation on top, a 10% step-up
+    plan = calculate_goal_sip_requirements(5e6, 15, 12, 6)
+    solved = solve_goals(5e6, 15, 12, 0, step_up_percentage=10)
+    assert plan['regular_sip'] == round(float(solved['regular_sip']))
+    assert plan['step_up_sip'] == round(float(solved['step_up_sip']))
+    assert plan['total_investment_regular'] == round(float(solved['total_investment_regular']))
+    assert np.isclose(calculate_required_sip(5e6, 12, 15), solved['regular_sip'])
+    assert np.isclose(future_value_step_up(plan['step_up_sip'], 15, 12, 10), 5e6, rtol=1e-4)
+    
+    assert get_asset_allocation_recommendation(20, 'aggressive') == {'equity': 80, 'debt': 15, 'gold': 5}
+    print("✅ Calculations agree with the goal solver")
+
+def test_goal_planning_batch_endpoint(client):
+    """Test batch goal planning endpoint"""
+    goals = [
+        {"goal_amount": 1000000 + i * 1000, "time_horizon": 5 + i % 20, "expected_return": 12, "inflation_rate": 6}
+        for i in range(500)
+    ] + [{"goal_amount": 2000000, "current_age": 30, "goal_age": 45, "step_up_percentage": 10}]
+    
+    response = client.post('/api/goal-planning/batch',
+                          data=json.dumps({"goals": goals}),
+                          content_type='application/json')
+    assert response.status_code in [200, 503]
+    
+    if response.status_code == 200:
+        data = json.loads(response.data)['data']
+        assert data['count'] == len(goals)
+        assert len(data['results']['step_up_sip']) == len(goals)
+        assert data['results']['time_horizon_years'][-1] == 15
+        assert all(s < r for s, r in zip(data['results']['step_up_sip'], data['results']['regular_sip']))
+    print("✅ Batch goal planning tested")
+
+def test_withdrawal_engine():
+    """Test SWP simulation, required corpus and sustainable withdrawals"""
+    # A corpus sized at a constant return lasts exactly the horizon (a
+    # Monte Carlo path without volatility compounds at the same rate)
+    monthly_return = monte_carlo_return_paths(1, 300, 8, 0)
+    corpus = required_corpus(50000, 25, 8, 6)
+    result = simulate_withdrawals(corpus, 50000, monthly_return, 6)
+    assert abs(result['terminal_balance'][0, 0]) < 1e-3
+    assert result['depletion_month'][0, 0] == -1
+    
+    # Each path's sustainable withdrawal is the depletion boundary
+    paths = monte_carlo_return_paths(200, 240, 10, 15, seed=7)
+    sustainable = max_sustainable_withdrawal([1e7, 2e7], paths, 6)
+    assert sustainable.shape == (2, 200)
+    assert np.allclose(sustainable[1], 2 * sustainable[0])
+    for i in (0, 50, 199):
+        path = paths[i:i+1]
+        assert simulate_withdrawals(1e7, sustainable[0, i] * 0.999, path, 6)['depletion_month'][0, 0] == -1
+        assert simulate_withdrawals(1e7, sustainable[0, i] * 1.001, path, 6)['depletion_month'][0, 0] >= 0
+    print("✅ Withdrawal engine verified")
+
+def test_goal_service_retirement_corpus():
+    """Test the retirement goal funds its withdrawals over the withdrawal engine's returns"""
+    from services.goal_service import GoalService
+    
+    goal = GoalService().calculate_goal_requirements({
+        'goal_type': 'retirement', 'current_age': 35, 'retirement_age': 60,
+        'monthly_expenses': 40000, 'years_after_retirement': 25, 'post_retirement_return': 8
+    })
+    details = goal['goal_details']
+    assert details['time_horizon_years'] == 25 and details['expected_return'] == 12
+    
+    # Retiring on the target corpus, withdrawals run out right at the horizon
+    paths = monte_carlo_return_paths(1, 300, 8, 0)
+    result = simulate_withdrawals(details['target_amount'], details['future_monthly_expenses'], paths, 6)
+    assert result['depletion_month'][0, 0] in (-1, 299)
+    assert abs(result['terminal_balance'][0, 0]) < details['future_monthly_expenses']
+    assert goal['sip_requirements']['regular_sip'] > 0
+    print("✅ Goal service retirement corpus verified")
+
+def test_retirement_swp_endpoint(client):
+    """Test SWP endpoint for a batch of client profiles"""
+    test_data = {
+        "years": 30,
+        "n_paths": 500,
+        "profiles": [
+            {"corpus": 20000000, "monthly_withdrawal": 80000, "inflation_rate": 6},
+            {"corpus": 30000000, "withdrawal_rate": 3.5, "inflation_rate": 5}
+        ]
+    }
+    response = client.post('/api/retirement/swp',
+                          data=json.dumps(test_data),
+                          content_type='application/json')
+    assert response.status_code in [200, 503]
+    
+    if response.status_code == 200:
+        data = json.loads(response.data)['data']
+        assert len(data['profiles']) == 2
+        for profile in data['profiles']:
+            assert 0 <= profile['depletion_probability'] <= 100
+            assert profile['safe_withdrawal_rate'] > 0
+    print("✅ Retirement SWP endpoint tested")
+
+def test_sip_engine_matches_loop():
+    """Test vectorized SIP engine against a per-instalment loop"""
+    nav_dates = np.arange('2020-01-01', '2022-06-15', dtype='datetime64[D]')
+    nav_dates = nav_dates[np.is_busday(nav_dates)]
+    navs = 20 * np.cumprod(1 + np.random.default_rng(3).normal(0.0004, 0.01, len(nav_dates)))
+    txn_dates = sip_schedule('2020-01-01', '2022-12-31')
+    amounts = step_up_amounts(5000, len(txn_dates), 10)
+    
+    sip = run_sip(nav_dates, navs, txn_dates, amounts)
+    units = 0
+    for i, txn in enumerate(txn_dates):
+        later = np.nonzero(nav_dates >= txn)[0]
+        nav = navs[later[0]] if len(later) else navs[-1]
+        units += amounts[i] / nav
+        assert np.isclose(sip['total_units'][i], units)
+    assert np.allclose(sip['amount'][[0, 12, 24]], [5000, 5500, 6050])
+    
+    # Several plans share one pass; without carry_last instalments past the data are dropped
+    both = run_sip(nav_dates, navs, txn_dates, np.column_stack([amounts, np.full(len(txn_dates), 5000.0)]))
+    assert np.allclose(both['value'][:, 0], sip['value'])
+    assert len(run_sip(nav_dates, navs, txn_dates, 5000, carry_last=False)['nav']) == 30
+    print("✅ SIP engine verified")
+
+def test_step_up_sip_uses_nav_history(client):
+    """Test step-up SIP runs over stored NAV history and is deterministic"""
+    nav_dates = np.arange('2019-01-01', '2024-01-01', dtype='datetime64[D]')
+    navs = 30 * np.cumprod(1 + np.random.default_rng(11).normal(0.0003, 0.008, len(nav_dates)))
+    NAV_STORE.put('990001', pd.DataFrame({'date': pd.to_datetime(nav_dates), 'nav': navs}))
+    
+    test_data = {
+        "funds": [{"fund_name": "Stored Fund", "scheme_code": "990001", "sip_amount": 5000}],
+        "start_date": "2019-01-01",
+        "end_date": "2023-12-31",
+        "step_up_percentage": 10
+    }
+    responses = [
+        json.loads(client.post('/api/step-up-sip', data=json.dumps(test_data),
+                               content_type='application/json').data)
+        for _ in range(2)
+    ]
+    assert responses[0] == responses[1]
+    
+    data = responses[0]['data']
+    fund = data['funds'][0]
+    assert fund['monthly_data'][0]['date'] == '2019-01-03'
+    assert fund['monthly_data'][0]['nav'] == round(navs[2], 2)
+    assert fund['final_sip'] == round(5000 * 1.1 ** 4)
+    assert data['comparison']['regular_sip']['total_invested'] == 5000 * 60
+    NAV_STORE.invalidate('990001')
+    print("✅ Step-up SIP over NAV history verified")
+
+def test_synthetic_market_deterministic():
+    """Test synthetic NAVs are per-scheme deterministic, window-consistent and correlated"""
+    full = synthetic_nav_frame('120503', '2015-01-01', '2020-12-31')
+    window = synthetic_nav_frame('120503', '2018-01-01', '2019-12-31')
+    assert (full['date'].dt.dayofweek < 5).all()
+    assert full.set_index('date').loc[window['date'], 'nav'].tolist() == window['nav'].tolist()
+
+    # A window starting before 2000 is the same path, not a re-anchored one
+    early = synthetic_nav_frame('120503', '1995-06-01', '2002-12-31', 'monthly')
+    late = synthetic_nav_frame('120503', '2000-06-01', '2005-12-31', 'monthly')
+    overlap = early.merge(late, on='date', suffixes=('_early', '_late'))
+    assert len(overlap) == 31 and overlap['nav_early'].tolist() == overlap['nav_late'].tolist()
+
+    # A scheme's path does not depend on the other schemes in the call
+    _, alone = generate_paths(['120503'], '2010-01-01', '2020-12-31', 'monthly')
+    _, batch = generate_paths(['118834', '120503'], '2010-01-01', '2020-12-31', 'monthly')
+    assert np.array_equal(alone[:, 0], batch[:, 1])
+    
+    _, correlated = generate_paths([str(code) for code in range(100000, 100020)],
+                                   '2005-01-01', '2024-12-31', correlation=0.6)
+    corr = np.corrcoef(np.diff(np.log(correlated), axis=0).T)
+    assert abs(corr[np.triu_indices(20, 1)].mean() - 0.6) < 0.05
+    print("✅ Synthetic market generator verified")
+
+@pytest.fixture
+def stub_upstream():
+    """Local HTTP/1.1 stub that counts requests, connections and concurrency"""
+    import threading
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+    
+    state = {'requests': 0, 'ports': set(), 'active': 0, 'max_active': 0, 'fail_first': 0, 'delay': 0}
+    lock = threading.Lock()
+    
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+        
+        def do_GET(self):
+            with lock:
+                state['requests'] += 1
+                state['ports'].add(self.client_address[1])
+                state['active'] += 1
+                state['max_active'] = max(state['max_active'], state['active'])
+                failing = state['requests'] <= state['fail_first']
+            time.sleep(state['delay'])
+            body = b'{"ok": true}'
+            self.send_response(503 if failing else 200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            with lock:
+                state['active'] -= 1
+        
+        def log_message(self, *args):
+            pass
+    
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    state['url'] = f"http://127.0.0.1:{server.server_port}/mf"
+    yield state
+    server.shutdown()
+
+def test_http_transport_pooling_and_retries(stub_upstream):
+    """Test keep-alive reuse, retry with backoff and the circuit breaker"""
+    transport = HTTPTransport(retries=2, backoff_base=0.001, breaker_threshold=2, breaker_cooldown=60)
+    for _ in range(5):
+        assert transport.get(stub_upstream['url']).json() == {'ok': True}
+    assert len(stub_upstream['ports']) == 1  # One pooled connection
+    
+    # Two failures are retried away
+    stub_upstream['fail_first'] = stub_upstream['requests'] + 2
+    assert transport.get(stub_upstream['url']).status_code == 200
+    
+    # Persistent failures open the breaker, which then fails fast
+    stub_upstream['fail_first'] = 10**6
+    for _ in range(2):
+        assert transport.get(stub_upstream['url']).status_code == 503
+    seen = stub_upstream['requests']
+    with pytest.raises(CircuitOpenError):
+        transport.get(stub_upstream['url'])
+    assert stub_upstream['requests'] == seen
+    print("✅ HTTP transport pooling, retries and breaker verified")
+
+def test_http_transport_host_limit(stub_upstream):
+    """Test per-host concurrency is bounded"""
+    transport = HTTPTransport(max_per_host=2)
+    stub_upstream['delay'] = 0.05
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        codes = list(executor.map(lambda _: transport.get(stub_upstream['url']).status_code, range(8)))
+    assert codes == [200] * 8
+    assert stub_upstream['max_active'] <= 2
+    print("✅ HTTP transport host limit verified")
+
+@pytest.mark.skipif(not hasattr(os, 'fork'), reason="needs os.fork")
+def test_http_transport_reset_after_fork():
+    """Test a forked worker gets a free lock and its own backoff jitter"""
+    from http_transport import TRANSPORT
+    
+    read_end, write_end = os.pipe()
+    with TRANSPORT._lock:  # Held by another thread of the parent while forking
+        pid = os.fork()
+        if pid == 0:
+            free = TRANSPORT._lock.acquire(timeout=1)
+            os.write(write_end, json.dumps([free, [TRANSPORT._backoff(5) for _ in range(4)]]).encode())
+            os._exit(0)
+    os.waitpid(pid, 0)
+    free, child_jitter = json.loads(os.read(read_end, 4096))
+    os.close(read_end)
+    os.close(write_end)
+    assert free
+    assert child_jitter != [TRANSPORT._backoff(5) for _ in range(4)]
+    print("✅ HTTP transport fork reset verified")
+
+@pytest.fixture
+def stub_mfapi():
+    """Local stand-in for the MF API serving synthetic NAV histories"""
+    import threading
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+    
+    state = {'requests': 0, 'delay': 0.5}
+    
+    @functools.lru_cache(maxsize=None)
+    def payload(code):
+        navs = synthetic_nav_frame(code, '2018-01-01', '2023-12-31').iloc[::-1]
+        return json.dumps({
+            'meta': {'scheme_code': int(code), 'scheme_name': f'Stub Fund {code}'},
+            'data': [{'date': d.strftime('%d-%m-%Y'), 'nav': f'{n:.4f}'} for d, n in zip(navs['date'], navs['nav'])]
+        }).encode()
+    
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+        
+        def do_GET(self):
+            state['requests'] += 1
+            time.sleep(state['delay'])
+            code = self.path.rstrip('/').rsplit('/', 1)[-1]
+            if not code.startswith('98'):
+                self.send_response(404)
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+            body = payload(code)
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        
+        def log_message(self, *args):
+            pass
+    
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    state['base_url'] = f"http://127.0.0.1:{server.server_port}"
+    yield state
+    server.shutdown()
+
+def test_async_nav_fetch_concurrent(stub_mfapi):
+    """Test all schemes of a request are fetched in one concurrent round"""
+    codes = [f'98000{i}' for i in range(6)] + ['123']
+    started = time.time()
+    histories = fetch_nav_histories(codes, stub_mfapi['base_url'])
+    elapsed = time.time() - started
+    
+    assert stub_mfapi['requests'] == 7
+    assert elapsed < 5 * stub_mfapi['delay']  # Serial fetching takes at least 7 delays
+    assert histories['123'].empty
+    expected = synthetic_nav_frame('980003', '2018-01-01', '2023-12-31')
+    assert histories['980003']['date'].is_monotonic_increasing
+    assert np.allclose(histories['980003']['nav'].to_numpy(), expected['nav'].to_numpy())
+    print(f"✅ Concurrent NAV fetch verified ({elapsed:.2f}s for {len(codes)} schemes)")
+
+def test_simulate_uses_prefetched_navs(client, stub_mfapi):
+    """Test simulation reads NAVs loaded by the prefetch stage"""
+    prefetch_nav_histories(['981001', '981002'], stub_mfapi['base_url'])
+    test_data = {
+        "funds": [
+            {"fund_name": "Stub A", "scheme_code": "981001", "sip_amount": 5000},
+            {"fund_name": "Stub B", "scheme_code": "981002", "sip_amount": 3000}
+        ],
+        "start_date": "2019-01-01",
+        "end_date": "2023-06-30"
+    }
+    response = client.post('/api/simulate', data=json.dumps(test_data), content_type='application/json')
+    assert response.status_code == 200
+    
+    fund = json.loads(response.data)['data']['funds'][0]
+    stub_navs = synthetic_nav_frame('981001', '2019-01-01', '2019-01-31')
+    assert fund['monthly_data'][0]['nav'] == pytest.approx(stub_navs['nav'].iloc[2], abs=1e-4)  # 2019-01-03
+    NAV_STORE.invalidate('981001')
+    NAV_STORE.invalidate('981002')
+    print("✅ Simulation over prefetched NAVs verified")
+
+def _slow_fetch(log_path, delay=0.3):
+    """Fetch stand-in that records each execution in a shared log file"""
+    with open(log_path, 'a') as log:
+        log.write(f"{os.getpid()}\n")
+    time.sleep(delay)
+    return {'nav': 42.0}
+
+def test_singleflight_coalesces_threads(tmp_path):
+    """Test concurrent callers of one key share a single fetch"""
+    import threading
+    flight = SingleFlight()
+    log_path = tmp_path / 'fetches.log'
+    barrier = threading.Barrier(8)
+    
+    def call(_):
+        barrier.wait()
+        return flight.do('120503', _slow_fetch, log_path)
+    
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        results = list(executor.map(call, range(8)))
+    assert results == [{'nav': 42.0}] * 8
+    assert len(log_path.read_text().splitlines()) == 1
+    assert (flight.executions, flight.coalesced) == (1, 7)
+    
+    # Batches only fetch keys nobody else is fetching; errors reach every waiter
+    fetched = []
+    def fetch_many(keys):
+        fetched.extend(keys)
+        time.sleep(0.2)
+        return {key: key.upper() for key in keys}
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        first = executor.submit(flight.do_many, ['a', 'b'], fetch_many)
+        time.sleep(0.05)
+        second = executor.submit(flight.do_many, ['b', 'c'], fetch_many)
+        assert first.result() == {'a': 'A', 'b': 'B'} and second.result() == {'b': 'B', 'c': 'C'}
+    assert sorted(fetched) == ['a', 'b', 'c']
+    with pytest.raises(ZeroDivisionError):
+        flight.do('bad', lambda: 1 / 0)
+    print("✅ Single-flight coalescing verified")
+
+def test_singleflight_coalesces_processes(tmp_path):
+    """Test workers sharing a spill directory fetch a scheme once"""
+    import multiprocessing
+    log_path = tmp_path / 'fetches.log'
+    spill_dir = str(tmp_path / 'flight')
+    
+    def worker(queue):
+        queue.put(SingleFlight('nav', spill_dir=spill_dir).do('120503', _slow_fetch, log_path))
+    
+    context = multiprocessing.get_context('fork')
+    queue = context.Queue()
+    workers = [context.Process(target=worker, args=(queue,)) for _ in range(4)]
+    for process in workers:
+        process.start()
+    results = [queue.get(timeout=10) for _ in workers]
+    for process in workers:
+        process.join(timeout=10)
+    
+    assert results == [{'nav': 42.0}] * 4
+    assert len(log_path.read_text().splitlines()) == 1
+    print("✅ Cross-worker single-flight verified")
+
+def test_singleflight_drops_failed_keys(tmp_path, monkeypatch):
+    """Test keys a batch fetch leaves out reach no caller, spill file or the NAV store"""
+    import backend.app as sip_app
+
+    def fetch_some(keys):
+        time.sleep(0.2)
+        return {key: key.upper() for key in keys if key != 'gone'}
+
+    for flight in (SingleFlight(), SingleFlight('nav', spill_dir=str(tmp_path / 'flight'))):
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            leader = executor.submit(flight.do_many, ['ok', 'gone'], fetch_some)
+            time.sleep(0.05)
+            follower = executor.submit(flight.do_many, ['gone'], fetch_some)
+            assert leader.result() == {'ok': 'OK'} and follower.result() == {}
+        assert len(list(tmp_path.glob('flight/*.pkl'))) == (1 if flight.spill_dir else 0)  # Only 'ok' spilled
+        assert flight.do('gone', lambda: 'retried') == 'retried'  # Nothing cached for the failed key
+
+    # A scheme missing upstream leaves the others servable instead of failing the request
+    monkeypatch.setattr(sip_app, 'NAV_FLIGHT', SingleFlight('nav', spill_dir=str(tmp_path / 'nav')))
+    monkeypatch.setattr(sip_app, 'fetch_nav_histories', lambda codes, base_url: {
+        '990331': synthetic_nav_frame('990331', '2020-01-01', '2021-12-31')})
+    try:
+        sip_app.prefetch_nav_histories(['990331', '999999'])
+        assert NAV_STORE.servable('990331') is not None and NAV_STORE.servable('999999') is None
+        sip_app.store_nav_histories({'999999': None})
+    finally:
+        NAV_STORE.invalidate('990331')
+    print("✅ Failed single-flight keys verified")
+
+def test_nav_store_stale_while_revalidate():
+    """Test expired NAV histories are served at once while refreshing in the background"""
+    loads = []
+    def loader(scheme_code):
+        loads.append(time.time())
+        time.sleep(0.3)
+        if len(loads) == 3:
+            return pd.DataFrame()  # Upstream outage during a refresh
+        return synthetic_nav_frame(scheme_code, '2020-01-01', '2020-12-31')
+    
+    revalidator = Revalidator()
+    store = NAVStore(loader, ttl=0.5, max_stale=2, miss_ttl=1, revalidator=revalidator)
+    first = store.get('120503')
+    assert len(loads) == 1
+    
+    time.sleep(0.6)  # Expired, but within max_stale
+    started = time.time()
+    assert store.get('120503') is first
+    assert time.time() - started < 0.1
+    while revalidator.pending(('nav', id(store), '120503')):
+        time.sleep(0.05)
+    refreshed = store.get('120503')
+    assert len(loads) == 2 and refreshed.fetched_at > first.fetched_at
+    
+    # A failed refresh keeps the last good series and is not retried at once
+    time.sleep(0.6)
+    assert store.get('120503') is refreshed
+    while revalidator.pending(('nav', id(store), '120503')):
+        time.sleep(0.05)
+    assert store.get('120503') is refreshed
+    assert len(loads) == 3 and not revalidator.pending(('nav', id(store), '120503'))
+    
+    # Past max_stale the request waits for a fresh load
+    time.sleep(2.6)
+    assert store.get('120503') is not refreshed and len(loads) == 4
+    print("✅ Stale-while-revalidate NAV store verified")
+
+class StubProvider:
+    """Local stand-in for a data provider with fixed latency and outcome"""
+    
+    def __init__(self, name, delay, healthy=True):
+        self.name = name
+        self.delay = delay
+        self.healthy = healthy
+        self.calls = 0
+    
+    def get_nav_data(self, scheme_code, start_date=None, end_date=None):
+        self.calls += 1
+        time.sleep(self.delay)
+        if not self.healthy:
+            raise IOError(f"{self.name} unavailable")
+        return pd.DataFrame({'date': pd.to_datetime(['2024-01-01']), 'nav': [100.0], 'source': [self.name]})
+    
+    def search_funds(self, query, limit=50):
+        self.calls += 1
+        time.sleep(self.delay)
+        return [{'scheme_code': '1', 'fund_name': f'{self.name} {query}'}] if self.healthy else []
+
+def test_hybrid_provider_hedges_slow_primary():
+    """Test a slow primary is hedged after its percentile delay and demoted"""
+    slow, fast = StubProvider('slow', 0.6), StubProvider('fast', 0.02)
+    hybrid = HybridDataProvider(providers=[slow, fast])
+    hybrid.selector.default_hedge_delay = 0.1
+    
+    started = time.time()
+    df = hybrid.get_nav_data('120503', fallback=False)
+    assert df['source'].iloc[0] == 'fast'
+    assert time.time() - started < 0.4  # Not the primary's 0.6s
+    
+    # Once latencies are known the fast provider is asked first
+    time.sleep(0.6)
+    for _ in range(6):
+        hybrid.get_nav_data('120503', fallback=False)
+    assert hybrid.selector.ordered('nav')[0] is fast
+    assert hybrid.search_funds('bluechip')[0]['fund_name'] == 'fast bluechip'
+    print("✅ Hedged provider selection verified")
+
+def test_provider_selector_fails_over_immediately():
+    """Test a failing provider hands over at once and sinks in the order"""
+    broken, backup = StubProvider('broken', 0.0, healthy=False), StubProvider('backup', 0.05)
+    selector = ProviderSelector([broken, backup], default_hedge_delay=5)
+    
+    started = time.time()
+    df, provider = selector.call('nav', lambda p: p.get_nav_data('1'), lambda d: not d.empty)
+    assert provider is backup and time.time() - started < 1
+    assert selector.snapshot()['broken.nav']['failures'] == 1
+    assert selector.ordered('nav') == [backup, broken]
+    
+    # Nobody healthy: no result
+    backup.healthy = False
+    assert selector.call('nav', lambda p: p.get_nav_data('1'), lambda d: not d.empty) == (None, None)
+    print("✅ Provider failover verified")
+
+def test_warmup_hot_list_from_usage_log(tmp_path):
+    """Test the hot list is benchmark, configured schemes, then the most used schemes"""
+    usage_log = tmp_path / 'scheme_usage.log'
+    usage_log.write_text(
+        "2024-01-01 10:00:00,000 scheme_usage 120503 118989\n"
+        "2024-01-01 10:01:00,000 scheme_usage 118989\n"
+        "2024-01-01 10:02:00,000 unrelated line 999999\n"
+        "2024-01-01 10:03:00,000 scheme_usage 118989 125497 120503\n"
+    )
+    
+    assert hot_schemes(['147625'], ['125497'], str(usage_log), top_n=2) == ['147625', '125497', '118989', '120503']
+    assert hot_schemes(['147625'], [], str(tmp_path / 'missing.log')) == ['147625']
+    print("✅ Warmup hot list verified")
+
+def test_warmup_fills_nav_store_and_search_index(stub_mfapi):
+    """Test warmup loads hot NAV histories and tolerates failing warmers"""
+    def broken_index():
+        raise IOError("fund list unavailable")
+    
+    provider = MFAPIProvider()
+    provider.base_url = stub_mfapi['base_url']
+    summary = warm_caches(
+        ['983001', '983002', '100001'],
+        lambda codes: prefetch_nav_histories(codes, stub_mfapi['base_url']),
+        NAV_STORE,
+        search_warmers=[broken_index, lambda: False, lambda: True],
+        freeze=False
+    )
+    assert summary['nav_loaded'] == 2 and summary['search_indexes'] == 1
+    assert NAV_STORE.peek('983001') is not None and NAV_STORE.peek('100001') is None
+    
+    # Search runs on the prebuilt index without touching the network
+    provider.cache['all_funds'] = (time.time(), provider._build_search_index([
+        {'schemeCode': 120503, 'schemeName': 'Axis Bluechip Fund - Direct Growth'},
+        {'schemeCode': 118989, 'schemeName': 'HDFC Mid-Cap Opportunities Fund'}
+    ]))
+    requests_before = stub_mfapi['requests']
+    assert [f['scheme_code'] for f in provider.search_funds('bluechip')] == ['120503']
+    assert stub_mfapi['requests'] == requests_before
+    
+    NAV_STORE.invalidate('983001')
+    NAV_STORE.invalidate('983002')
+    print("✅ Startup warmup verified")
+
+def test_lazy_module_loads_on_first_use():
+    """Test lazy modules import on first attribute access and resolve optional ones"""
+    lazy_json = LazyModule('json')
+    assert 'not loaded' in repr(lazy_json)
+    assert lazy_json.dumps({'a': 1}) == '{"a": 1}'
+    assert 'not loaded' not in repr(lazy_json)
+    assert lazy_import('os') is os
+    assert lazy_import('surely_not_an_installed_module', optional=True) is None
+    print("✅ Lazy module loading verified")
+
+def test_light_routes_skip_heavy_imports():
+    """Test health, search and goal planning run without pandas or scipy"""
+    import subprocess
+    
+    script = (
+        "import sys, json\n"
+        "from app import app\n"
+        "client = app.test_client()\n"
+        "assert client.get('/health').status_code == 200\n"
+        "client.get('/api/search-funds?q=bluechip')\n"
+        "goal = {'goal_type': 'custom', 'target_amount': 5000000, 'time_horizon': 10, 'expected_return': 12}\n"
+        "assert client.post('/api/goal-planning', json=goal).status_code == 200\n"
+        "print(json.dumps({m: m in sys.modules for m in ('pandas', 'scipy')}))\n"
+    )
+    root = os.path.dirname(os.path.abspath(__file__))
+    result = subprocess.run([sys.executable, '-c', script], cwd=root, capture_output=True, text=True,
+                            env=dict(os.environ, SIP_WARMUP=''), timeout=120)
+    assert result.returncode == 0, result.stderr[-2000:]
+    assert json.loads(result.stdout.strip().splitlines()[-1]) == {'pandas': False, 'scipy': False}
+    
+    report = import_budget.measure('app')
+    assert report['total_ms'] > 0 and not report['loaded'] & set(import_budget.LAZY_MODULES)
+    print("✅ Light routes avoid heavy imports")
+
+def test_server_timing_stages(client):
+    """Test simulation responses report per-stage timings"""
+    test_data = {
+        "funds": [
+            {"fund_name": "Fund A", "scheme_code": "120503", "sip_amount": 5000},
+            {"fund_name": "Fund B", "scheme_code": "118989", "sip_amount": 3000}
+        ],
+        "start_date": "2020-01-01",
+        "end_date": "2023-06-30"
+    }
+    response = client.post('/api/simulate', data=json.dumps(test_data), content_type='application/json')
+    assert response.status_code == 200
+    
+    stages = {part.split(';')[0]: part for part in response.headers['Server-Timing'].split(', ')}
+    assert {'fetch', 'nav', 'sip', 'xirr', 'serialize', 'total'} <= set(stages)
+    assert 'desc="x2"' in stages['sip']  # One SIP run per fund
+    assert 'X-Profile-Output' not in response.headers  # Profiling is opt-in
+    
+    # Outside a request stages are no-ops
+    with instrumentation.stage('sip'):
+        pass
+    assert instrumentation.current_timings() is None
+    print("✅ Server-Timing stages verified")
+
+def test_request_profiling_on_demand(client, monkeypatch, tmp_path):
+    """Test X-Profile writes folded stacks or a pstats file when enabled"""
+    import pstats
+    monkeypatch.setattr(instrumentation, 'PROFILE_REQUESTS', True)
+    monkeypatch.setattr(instrumentation, 'PROFILE_DIR', str(tmp_path))
+    monkeypatch.setattr(instrumentation, 'PROFILE_INTERVAL', 0.001)
+    test_data = {
+        "funds": [{"fund_name": "Fund A", "scheme_code": "120503", "sip_amount": 5000}],
+        "start_date": "2015-01-01",
+        "end_date": "2023-06-30"
+    }
+    
+    response = client.post('/api/risk-analysis', data=json.dumps(test_data),
+                           content_type='application/json', headers={'X-Profile': 'sample'})
+    folded = (tmp_path / response.headers['X-Profile-Output']).read_text().splitlines()
+    assert folded and all(line.rsplit(' ', 1)[1].isdigit() for line in folded)
+    
+    response = client.post('/api/simulate', data=json.dumps(test_data),
+                           content_type='application/json', headers={'X-Profile': 'cprofile'})
+    stats = pstats.Stats(str(tmp_path / response.headers['X-Profile-Output']))
+    assert any(func[2] == 'xirr' for func in stats.stats)
+    print("✅ On-demand request profiling verified")
+
+def _metric_value(text, name, **labels):
+    """Value of one sample in a Prometheus text exposition (0 if absent)"""
+    from prometheus_client.parser import text_string_to_metric_families
+    for family in text_string_to_metric_families(text):
+        for sample in family.samples:
+            if sample.name == name and all(sample.labels.get(k) == v for k, v in labels.items()):
+                return sample.value
+    return 0
+
+def test_metrics_endpoint(client):
+    """Test /metrics exports route latency, cache, provider and XIRR metrics"""
+    test_data = {
+        "funds": [{"fund_name": "Fund A", "scheme_code": "120503", "sip_amount": 5000}],
+        "start_date": "2020-01-01",
+        "end_date": "2023-06-30"
+    }
+    before = client.get('/metrics').get_data(as_text=True)
+    for _ in range(2):
+        assert client.post('/api/simulate', data=json.dumps(test_data), content_type='application/json').status_code == 200
+    
+    stub = StubProvider('stub', 0.01)
+    ProviderSelector([stub]).call('nav', lambda p: p.get_nav_data('1'), lambda d: not d.empty)
+    
+    response = client.get('/metrics')
+    assert response.status_code == 200 and response.content_type.startswith('text/plain')
+    after = response.get_data(as_text=True)
+    
+    def delta(name, **labels):
+        return _metric_value(after, name, **labels) - _metric_value(before, name, **labels)
+    
+    assert delta('sip_request_duration_seconds_count', route='/api/simulate', method='POST', status='200') == 2
+    assert delta('sip_xirr_iterations_count') >= 4  # Fund and portfolio XIRR per request
+    assert delta('sip_cache_events_total', cache='synthetic_nav', event='hit') >= 1
+    assert delta('sip_provider_call_duration_seconds_count', provider='stub', operation='nav', outcome='ok') == 1
+    assert 'sip_pool_queue_depth' in after
+    print("✅ Metrics endpoint verified")
+
+def test_metrics_aggregate_across_processes(tmp_path):
+    """Test counters written by separate worker processes are summed on /metrics"""
+    import subprocess
+    
+    backend = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend')
+    env = dict(os.environ, PROMETHEUS_MULTIPROC_DIR=str(tmp_path), PYTHONPATH=backend)
+    worker = "import metrics; metrics.cache_event('nav_store', 'hit', 3); metrics.observe_xirr(converged=False)"
+    for _ in range(2):
+        subprocess.run([sys.executable, '-c', worker], env=env, check=True, timeout=60)
+    
+    exposition = subprocess.run(
+        [sys.executable, '-c', "import metrics; print(metrics.render()[0].decode())"],
+        env=env, check=True, capture_output=True, text=True, timeout=60
+    ).stdout
+    assert _metric_value(exposition, 'sip_cache_events_total', cache='nav_store', event='hit') == 6
+    assert _metric_value(exposition, 'sip_xirr_failures_total') == 2
+    print("✅ Multiprocess metric aggregation verified")
+
+def test_benchmark_compare_flags_regressions():
+    """Test benchmark timings are normalised by the reference workload before comparing"""
+    from perf import bench
+    
+    best, median = bench.measure(lambda: sum(range(100)), rounds=3, min_round=0.001)
+    assert 0 < best <= median
+    
+    baseline = {'reference_ms': 10.0, 'threshold': 1.5, 'cases': {
+        'fast': {'min_ms': 1.0}, 'slow': {'min_ms': 1.0}, 'loose': {'min_ms': 1.0, 'threshold': 4.0}
+    }}
+    # Twice the reference time: a machine half as fast
+    results = {'reference_ms': 20.0, 'cases': {
+        'fast': {'min_ms': 2.5}, 'slow': {'min_ms': 4.0}, 'loose': {'min_ms': 6.0},
+        'added': {'min_ms': 1.0}, 'gone': {'skipped': 'not importable'}
+    }}
+    status = {row[0]: row[4] for row in bench.compare(results, baseline)}
+    assert status == {'fast': 'ok', 'slow': 'REGRESSED', 'loose': 'ok', 'added': 'new', 'gone': 'skipped'}
+    print("✅ Benchmark comparison verified")
+
+def test_mock_upstream_replays_and_injects_faults(tmp_path):
+    """Test the load-test upstream serves recordings, synthesises the rest and injects errors"""
+    from loadtest.mock_upstream import Faults, Upstream, serve
+    
+    (tmp_path / 'mf').mkdir()
+    recorded = {'meta': {'scheme_code': 120503}, 'data': [{'date': '02-01-2024', 'nav': '11.5'},
+                                                          {'date': '01-01-2024', 'nav': '10.0'}]}
+    (tmp_path / 'mf' / '120503.json').write_text(json.dumps(recorded))
+    faults = Faults(latency_ms=0)
+    server = serve(port=0, faults=faults, upstream=Upstream(str(tmp_path), extra_schemes=10))
+    base_url = f'http://127.0.0.1:{server.server_address[1]}'
+    try:
+        histories = fetch_nav_histories(['120503', '118989'], base_url)
+        assert histories['120503']['nav'].tolist() == [10.0, 11.5]  # Replayed as recorded
+        assert len(histories['118989']) > 1000  # Synthetic daily history
+        
+        provider = MFAPIProvider()
+        provider.base_url = base_url
+        assert provider.search_funds('bluechip', limit=5)
+        
+        faults.update({'error_rate': 1.0})
+        assert fetch_nav_histories(['120716'], base_url)['120716'].empty
+        assert server.stats['injected_error'] >= 1
+    finally:
+        server.shutdown()
+    print("✅ Mock upstream replay and fault injection verified")
+
+def test_load_driver_reports_percentiles():
+    """Test the load driver mixes scenarios and reports throughput and latency percentiles"""
+    import asyncio
+    import threading
+    from werkzeug.serving import make_server
+    from loadtest.driver import parse_mix, run_load
+    
+    server = make_server('127.0.0.1', 0, app, threaded=True)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        summary = asyncio.run(run_load(f'http://127.0.0.1:{server.server_port}', users=2, duration=1.0,
+                                       warmup=0.2, mix=parse_mix('goal=1')))
+    finally:
+        server.shutdown()
+    
+    goal = summary['scenarios']['goal']
+    assert goal['requests'] > 0 and not goal['errors']
+    assert 0 < goal['p50_ms'] <= goal['p99_ms'] <= goal['max_ms']
+    assert summary['total']['throughput_rps'] > 0
+    with pytest.raises(ValueError):
+        parse_mix('search=1,unknown=2')
+    print("✅ Load driver report verified")
+
+def test_gunicorn_profiles_size_pools_per_worker():
+    """Test the gthread profile sizes upstream pools to the worker's threads"""
+    import subprocess
+    
+    root = os.path.dirname(os.path.abspath(__file__))
+    env = {k: v for k, v in os.environ.items() if not k.startswith(('HTTP_', 'PROVIDER_POOL', 'GUNICORN_'))}
+    env.update(GUNICORN_PROFILE='gthread', GUNICORN_THREADS='6',
+               PROMETHEUS_MULTIPROC_DIR=os.path.join(root, '.pytest_cache', 'metrics'))
+    script = ("import os, runpy; c = runpy.run_path('gunicorn.conf.py'); "
+              "print(c['worker_class'], c['threads'], os.environ['HTTP_MAX_PER_HOST'], os.environ['PROVIDER_POOL_SIZE'])")
+    output = subprocess.run([sys.executable, '-c', script], cwd=root, env=env, check=True,
+                            capture_output=True, text=True, timeout=60).stdout.split()
+    assert output == ['gthread', '6', '12', '12']
+    print("✅ Worker profile pool sizing verified")
+
+def test_cold_search_index_downloaded_once():
+    """Test concurrent cold searches in one worker share a single scheme-list download"""
+    from loadtest.mock_upstream import Faults, Upstream, serve
+    
+    server = serve(port=0, faults=Faults(latency_ms=200, jitter=0), upstream=Upstream(extra_schemes=100))
+    try:
+        provider = MFAPIProvider()
+        provider.base_url = f'http://127.0.0.1:{server.server_address[1]}'
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            results = list(executor.map(lambda q: provider.search_funds(q, limit=5), ['fund'] * 8))
+        assert all(results)
+        assert server.stats['ok'] == 1
+    finally:
+        server.shutdown()
+    print("✅ Cold search coalescing verified")
+
+def test_nav_fetch_in_gevent_worker():
+    """Test NAV fetches in a gevent-patched worker run on greenlets instead of asyncio"""
+    import subprocess
+    pytest.importorskip('gevent')
+    
+    root = os.path.dirname(os.path.abspath(__file__))
+    script = """
+from gevent import monkey; monkey.patch_all()
+import sys, gevent
+sys.path[:0] = ['backend', '.']
+from loadtest.mock_upstream import Faults, Upstream, serve
+import async_fetch
+server = serve(port=0, faults=Faults(latency_ms=100, jitter=0), upstream=Upstream(extra_schemes=0))
+url = f'http://127.0.0.1:{server.server_address[1]}'
+jobs = [gevent.spawn(async_fetch.fetch_nav_histories, [f'1205{i}{j}' for j in range(3)], url) for i in range(4)]
+gevent.joinall(jobs, raise_error=True)
+print(async_fetch._green(), sum(len(frame) > 0 for job in jobs for frame in job.value.values()))
+"""
+    output = subprocess.run([sys.executable, '-c', script], cwd=root, check=True,
+                            capture_output=True, text=True, timeout=120).stdout.split()
+    assert output == ['True', '12']
+    print("✅ gevent NAV fetch verified")
+
+def _run_asgi(scenario):
+    """Run scenario(client) against the ASGI app, with its lifespan (aiohttp session) started"""
+    import asyncio
+    httpx = pytest.importorskip('httpx')
+    pytest.importorskip('starlette')
+    pytest.importorskip('a2wsgi')
+    import asgi
+    
+    async def main():
+        async with asgi.app.router.lifespan_context(asgi.app):
+            transport = httpx.ASGITransport(app=asgi.app)
+            async with httpx.AsyncClient(transport=transport, base_url='http://asgi') as client:
+                return await scenario(client)
+    return asyncio.run(main())
+
+def test_asgi_fund_info_concurrent_and_flask_routes_mounted(monkeypatch):
+    """Test ASGI fund info waits on the upstream concurrently and other routes fall through to Flask"""
+    import asyncio
+    import backend.app as sip_app
+    from loadtest.mock_upstream import Faults, Upstream, serve
+    
+    server = serve(port=0, faults=Faults(latency_ms=300, jitter=0), upstream=Upstream(extra_schemes=10))
+    monkeypatch.setattr(sip_app, 'NAV_API_BASE_URL', f'http://127.0.0.1:{server.server_address[1]}')
+    
+    async def scenario(client):
+        started = time.perf_counter()
+        infos = await asyncio.gather(*(client.get(f'/api/fund-info/1206{i:02d}') for i in range(40)))
+        elapsed = time.perf_counter() - started
+        goal = await client.post('/api/goal-planning', json={'goal_type': 'custom', 'goal_amount': 1000000,
+                                                              'time_horizon': 10})
+        return infos, elapsed, goal
+    
+    try:
+        infos, elapsed, goal = _run_asgi(scenario)
+    finally:
+        server.shutdown()
+    assert all(r.status_code == 200 and r.json()['success'] for r in infos)
+    assert len(infos[0].json()['data']['nav_data']) == 30
+    assert elapsed < 3.0  # 40 x 300 ms upstream calls, served side by side
+    assert goal.status_code == 200 and goal.json()['success']
+    print(f"✅ ASGI fund info verified ({elapsed:.2f}s for 40 concurrent requests)")
+
+def test_asgi_simulate_cold_cache_fetches_once(monkeypatch):
+    """Test concurrent ASGI simulations of an uncached scheme share one async NAV fetch"""
+    import asyncio
+    import backend.app as sip_app
+    from loadtest.mock_upstream import Faults, Upstream, serve
+    
+    server = serve(port=0, faults=Faults(latency_ms=200, jitter=0), upstream=Upstream(extra_schemes=0))
+    monkeypatch.setattr(sip_app, 'NAV_API_BASE_URL', f'http://127.0.0.1:{server.server_address[1]}')
+    code = '149901'
+    NAV_STORE.invalidate(code)
+    body = {'funds': [{'fund_name': 'Cold Fund', 'scheme_code': code, 'sip_amount': 5000}],
+            'start_date': '2018-01-01', 'end_date': '2023-12-31'}
+    
+    async def scenario(client):
+        return await asyncio.gather(*(client.post('/api/simulate', json=body) for _ in range(6)))
+    
+    try:
+        responses = _run_asgi(scenario)
+    finally:
+        server.shutdown()
+    results = [r.json() for r in responses]
+    assert all(r['success'] for r in results)
+    assert len({r['data']['funds'][0]['current_value'] for r in results}) == 1
+    assert server.stats['ok'] == 1
+    assert NAV_STORE.servable(code) is not None
+    print("✅ ASGI cold-cache simulation verified")
+
+def test_token_bucket_refill_and_idle_eviction(tmp_path):
+    """Test token buckets refill at the configured rate and idle buckets are evicted"""
+    from rate_limiter import LocalBuckets, SharedMemoryBuckets
+    
+    for buckets in (LocalBuckets(), SharedMemoryBuckets(str(tmp_path / 'buckets'), groups=4)):
+        assert [buckets.take('client', 2, 20.0)[0] for _ in range(3)] == [True, True, False]
+        allowed, retry_after = buckets.take('client', 2, 20.0)
+        assert not allowed and 0 < retry_after <= 0.05
+        time.sleep(0.06)
+        assert buckets.take('client', 2, 20.0)[0]
+    
+    local = LocalBuckets(idle_ttl=0.01)
+    local.take('a', 5, 1.0)
+    local.take('b', 5, 1.0)
+    time.sleep(0.02)
+    local.take('c', 5, 1.0)
+    assert len(local) == 1
+    
+    # One group of 8 slots: a ninth client reuses the least recently used slot
+    shared = SharedMemoryBuckets(str(tmp_path / 'small'), groups=1)
+    for i in range(9):
+        assert shared.take(f'client-{i}', 1, 0.001)[0]
+    assert not shared.take('client-8', 1, 0.001)[0]
+    print("✅ Token bucket refill and eviction verified")
+
+def test_shared_memory_rate_limit_across_processes(tmp_path):
+    """Test worker processes sharing the memory-mapped buckets enforce one limit together"""
+    import subprocess
+    
+    backend = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend')
+    script = (f"from rate_limiter import SharedMemoryBuckets; b = SharedMemoryBuckets({str(tmp_path / 'shm')!r}); "
+              "print(sum(b.take('10.0.0.1', 50, 50 / 3600)[0] for _ in range(30)))")
+    workers = [
+        subprocess.Popen([sys.executable, '-c', script], env=dict(os.environ, PYTHONPATH=backend),
+                         stdout=subprocess.PIPE, text=True)
+        for _ in range(4)
+    ]
+    allowed = [int(worker.communicate(timeout=60)[0]) for worker in workers]
+    assert sum(allowed) == 50  # Not 4 x 30 = 120, as with per-process limits
+    print(f"✅ Shared rate limit verified ({allowed} allowed per worker)")
+
+def test_rate_limit_keys_forwarded_client(monkeypatch):
+    """Test the production rate limiter keys clients by the address nginx forwards"""
+    import app_production
+    from rate_limiter import RateLimiter, LocalBuckets
+    
+    monkeypatch.setattr(app_production, 'RATE_LIMITER', RateLimiter(LocalBuckets()))
+    monkeypatch.setattr(app_production.config, 'RATE_LIMIT_ENABLED', True)
+    production = app_production.app.test_client()
+    
+    def search(client_ip):
+        return production.get('/api/search-funds?q=x', environ_base={'REMOTE_ADDR': '10.0.0.9'},
+                              headers={'X-Forwarded-For': client_ip})
+    
+    # Every request arrives from the proxy; only the forwarded client runs out
+    assert [search('203.0.113.7').status_code for _ in range(101)][-2:] == [400, 429]
+    assert search('198.51.100.4').status_code == 400
+    assert search('203.0.113.7').headers['Retry-After']
+    print("✅ Rate limit per forwarded client verified")
+
+def test_redis_rate_limit_script():
+    """Test the Redis token bucket script limits, refills and expires idle keys"""
+    fakeredis = pytest.importorskip('fakeredis')
+    pytest.importorskip('lupa')  # Lua scripting for fakeredis
+    from rate_limiter import RateLimiter, RedisBuckets
+    
+    client = fakeredis.FakeRedis()
+    limiter = RateLimiter(RedisBuckets(client=client, idle_ttl=120))
+    results = [limiter.allow('search:10.0.0.2', 3, 60) for _ in range(4)]
+    assert [allowed for allowed, _ in results] == [True, True, True, False]
+    assert 19 < results[-1][1] <= 20  # One token every 20 seconds
+    assert 0 < client.ttl('sip:ratelimit:search:10.0.0.2') <= 120
+    print("✅ Redis rate limit script verified")
+
+def test_response_cache_keyed_by_request_and_nav_version(client, monkeypatch, tmp_path):
+    """Test simulation responses are cached per canonical request and invalidated by new NAVs"""
+    import backend.app as sip_app
+    from response_cache import ResponseCache, SharedMemoryStore
+
+    monkeypatch.setattr(sip_app, 'RESPONSE_CACHE', ResponseCache(SharedMemoryStore(str(tmp_path))))
+    code = '149950'
+    NAV_STORE.put(code, synthetic_nav_frame(code, '2015-01-01', '2023-12-29'))
+    body = {'funds': [{'fund_name': 'Cached Fund', 'scheme_code': code, 'sip_amount': 5000}],
+            'start_date': '2019-01-01', 'end_date': '2023-06-30'}
+
+    def post(path, data):
+        return client.post(path, data=json.dumps(data), content_type='application/json')
+
+    try:
+        first = post('/api/simulate', body)
+        assert first.headers['X-Cache'] == 'MISS'
+        # Key order and fields the response does not depend on leave the key unchanged
+        reordered = {'end_date': body['end_date'], 'start_date': body['start_date'], 'client': 'web',
+                     'funds': [dict(reversed(list(body['funds'][0].items())), color='blue')]}
+        second = post('/api/simulate', reordered)
+        assert second.headers['X-Cache'] == 'HIT' and second.get_json() == first.get_json()
+        assert post('/api/risk-analysis', body).headers['X-Cache'] == 'MISS'
+        assert post('/api/risk-analysis', body).headers['X-Cache'] == 'HIT'
+
+        NAV_STORE.put(code, synthetic_nav_frame(code, '2015-01-01', '2024-01-05'))  # New NAVs landed
+        assert post('/api/simulate', body).headers['X-Cache'] == 'MISS'
+
+        failed = dict(body, funds=[])  # Unsuccessful responses are not stored
+        assert not post('/api/risk-analysis', failed).get_json()['success']
+        assert post('/api/risk-analysis', failed).headers['X-Cache'] == 'MISS'
+    finally:
+        NAV_STORE.invalidate(code)
+    print("✅ Response cache keys and NAV invalidation verified")
+
+def test_response_cache_stores_share_and_expire(tmp_path):
+    """Test shared-memory entries are visible to other processes' stores and pruned, and Redis entries expire"""
+    from response_cache import RedisStore, ResponseCache, SharedMemoryStore, create_response_cache, request_key
+
+    key = request_key('simulate', {'funds': [], 'start_date': '2020-01-01'}, {'120503': '2024-01-05:10:1.0'})
+    assert key == request_key('simulate', {'start_date': '2020-01-01', 'funds': []}, {'120503': '2024-01-05:10:1.0'})
+    assert key != request_key('simulate', {'funds': [], 'start_date': '2020-01-01'}, {'120503': '2024-01-08:11:1.1'})
+
+    writer, reader = SharedMemoryStore(str(tmp_path), max_entries=2), SharedMemoryStore(str(tmp_path))
+    writer.set(key, b'{"success":true}', 60)
+    assert reader.get(key) == b'{"success":true}'
+    writer.set('expired', b'{}', -1)
+    assert reader.get('expired') is None
+    for name in ('a', 'b', 'c'):
+        writer.set(name, b'{}', 60)
+    writer.prune()
+    assert sorted(os.listdir(tmp_path)) == ['b', 'c']  # Expired and oldest entries removed
+
+    fakeredis = pytest.importorskip('fakeredis')
+    client = fakeredis.FakeRedis()
+    cache = ResponseCache(RedisStore(client=client), ttl=30)
+    cache.set(key, b'{"success":true}')
+    assert cache.get(key) == b'{"success":true}'
+    assert 0 < client.ttl('sip:response:' + key) <= 30
+    assert not create_response_cache('off').enabled
+    print("✅ Response cache stores verified")
+
+def test_conditional_get_fund_info_and_search(client, monkeypatch):
+    """Test fund info and search revalidate with ETags from the NAV store and scheme list versions"""
+    import backend.app as sip_app
+    from loadtest.mock_upstream import Faults, Upstream, serve
+
+    server = serve(port=0, faults=Faults(latency_ms=0, jitter=0), upstream=Upstream(extra_schemes=0))
+    monkeypatch.setattr(sip_app, 'NAV_API_BASE_URL', f'http://127.0.0.1:{server.server_address[1]}')
+    code = '149960'
+    NAV_STORE.invalidate(code)
+    try:
+        first = client.get(f'/api/fund-info/{code}')
+        assert first.status_code == 200 and first.headers['Cache-Control'].startswith('public')
+        etag = first.headers['ETag']
+        revalidated = client.get(f'/api/fund-info/{code}', headers={'If-None-Match': etag})
+        assert revalidated.status_code == 304 and revalidated.headers['ETag'] == etag
+        assert server.stats['ok'] == 1  # The 304 never reached the MF API
+
+        NAV_STORE.put(code, synthetic_nav_frame(code, '2015-01-01', '2024-01-05'))  # New NAVs landed
+        assert client.get(f'/api/fund-info/{code}', headers={'If-None-Match': etag}).status_code == 200
+    finally:
+        server.shutdown()
+        NAV_STORE.invalidate(code)
+
+    mfapi = MFAPIProvider()
+    mfapi.store_search_index([{'schemeCode': 100 + i, 'schemeName': f'Alpha Flexi Cap Fund {i}'} for i in range(5)])
+    monkeypatch.setattr(sip_app, 'FUND_DATA_PROVIDER', HybridDataProvider(providers=[mfapi]))
+    first = client.get('/api/search-funds?q=flexi')
+    assert first.get_json()['total_results'] == 5
+    etag = first.headers['ETag']
+    assert client.get('/api/search-funds?q=flexi', headers={'If-None-Match': etag}).status_code == 304
+    assert client.get('/api/search-funds?q=alpha', headers={'If-None-Match': etag}).status_code == 200
+
+    mfapi.store_search_index([{'schemeCode': 200, 'schemeName': 'Beta Flexi Cap Fund'}])  # Scheme list changed
+    assert client.get('/api/search-funds?q=flexi', headers={'If-None-Match': etag}).status_code == 200
+    print("✅ Conditional GETs verified")
+
+def test_fund_info_served_from_nav_store(client, monkeypatch):
+    """Test fund info slices the NAV store with metadata from the scheme payload or the fund master"""
+    import backend.app as sip_app
+    from fund_data_sources import parse_mfapi_nav
+
+    monkeypatch.setattr(sip_app, 'NAV_API_BASE_URL', 'http://127.0.0.1:9')  # Any upstream call would fail
+    navs = synthetic_nav_frame('149970', '2015-01-01', '2023-12-29')
+    payload = {
+        'meta': {'scheme_code': 149970, 'scheme_name': 'Delta Flexi Cap Fund', 'fund_house': 'Delta MF',
+                 'scheme_type': 'Open Ended Schemes', 'scheme_category': 'Equity Scheme - Flexi Cap Fund'},
+        'data': [{'date': d.strftime('%d-%m-%Y'), 'nav': f'{n:.4f}'} for d, n in zip(navs['date'], navs['nav'])][::-1]
+    }
+    NAV_STORE.put('149970', parse_mfapi_nav(payload))
+    NAV_STORE.put('120503', synthetic_nav_frame('120503', '2015-01-01', '2023-12-29'))  # No metadata
+    try:
+        data = client.get('/api/fund-info/149970').get_json()['data']
+        assert data['fund_name'] == 'Delta MF - Delta Flexi Cap Fund'
+        assert data['scheme_category'] == 'Equity Scheme - Flexi Cap Fund'
+        assert data['nav_data'][:30] == [{'date': row['date'], 'nav': float(row['nav'])} for row in payload['data'][:30]]
+        assert len(data['nav_data']) == 30
+
+        assert len(client.get('/api/fund-info/149970?window=90').get_json()['data']['nav_data']) == 90
+        year = client.get('/api/fund-info/149970?window=1y').get_json()['data']['nav_data']
+        assert year[0]['date'] == '29-12-2023' and datetime.strptime(year[-1]['date'], '%d-%m-%Y') >= datetime(2022, 12, 29)
+        assert len(client.get('/api/fund-info/149970?window=max').get_json()['data']['nav_data']) == len(payload['data'])
+        assert client.get('/api/fund-info/149970?window=soon').status_code == 400
+
+        master = client.get('/api/fund-info/120503').get_json()['data']
+        assert master['fund_name'] == 'SBI Bluechip Fund - Direct Plan - Growth' and master['scheme_type'] is None
+    finally:
+        NAV_STORE.invalidate('149970')
+        NAV_STORE.invalidate('120503')
+    print("✅ Fund info from the NAV store verified")
+
+def test_response_encoder_handles_numpy(client):
+    """Test the response encoder writes NumPy arrays, scalars and NaN the same with or without orjson"""
+    import serialization
+
+    payload = {'values': np.array([1.5, np.nan, np.inf]), 'matrix': np.arange(4).reshape(2, 2)[:, 1],
+               'count': np.int64(3), 'dates': np.array(['2024-01-31'], dtype='datetime64[D]'),
+               'day': datetime(2024, 1, 31).date(), 7: 'int key'}
+    expected = {'values': [1.5, None, None], 'matrix': [1, 3], 'count': 3,
+                'dates': ['2024-01-31T00:00:00'], 'day': '2024-01-31', '7': 'int key'}
+    assert json.loads(serialization.dumps_bytes(payload)) == expected
+    with patch.object(serialization, 'orjson', None):
+        assert json.loads(serialization.dumps_bytes(payload)) == expected
+    if serialization.orjson is not None:
+        assert serialization.dumps_bytes({'gap': np.float64('nan')}) == b'{"gap":null}'
+
+    with app.test_request_context():
+        response = app.json.response(payload)
+        assert response.mimetype == 'application/json' and 'Accept' in response.vary
+        assert json.loads(response.get_data()) == expected
+    print("✅ NumPy-aware response encoding verified")
+
+def test_msgpack_negotiation_and_cache_per_format(client, monkeypatch, tmp_path):
+    """Test clients preferring MessagePack get it, and cached responses are kept per format"""
+    msgpack = pytest.importorskip('msgpack')
+    import backend.app as sip_app
+    from response_cache import LocalStore, ResponseCache
+
+    monkeypatch.setattr(sip_app, 'RESPONSE_CACHE', ResponseCache(LocalStore()))
+    body = json.dumps({'funds': [{'fund_name': 'Fund A', 'scheme_code': '120503', 'sip_amount': 5000}],
+                       'start_date': '2021-01-01', 'end_date': '2023-06-30'})
+
+    def post(accept):
+        return client.post('/api/simulate', data=body, content_type='application/json', headers={'Accept': accept})
+
+    as_json = post('application/json')
+    packed = post('application/msgpack, application/json;q=0.5')
+    assert packed.mimetype == 'application/msgpack' and packed.headers['X-Cache'] == 'MISS'
+    assert msgpack.unpackb(packed.data) == as_json.get_json()
+
+    again = post('application/x-msgpack')
+    assert again.headers['X-Cache'] == 'HIT' and again.mimetype == 'application/msgpack' and again.data == packed.data
+    assert post('*/*').mimetype == 'application/json'
+    print("✅ MessagePack negotiation verified")
+
+def test_simulation_results_stay_columnar_until_encoded():
+    """Test engine results keep NumPy columns and become chart rows only when encoded"""
+    import backend.app as sip_app
+    import serialization
+    from utils.sip_engine import SimulationResult, combine_by_date
+
+    code = '990049'
+    NAV_STORE.put(code, synthetic_nav_frame(code, '2018-01-01', '2021-12-31'))
+    try:
+        result, invested, value = sip_app.process_fund('Fund', {'scheme_code': code, 'sip_amount': 1000},
+                                                       datetime(2019, 1, 1), datetime(2020, 12, 31), [])
+        cumulative = sip_app.process_fund_cumulative('Fund', {'scheme_code': code, 'sip_amount': 1000},
+                                                     datetime(2019, 1, 1), datetime(2020, 12, 31))
+    finally:
+        NAV_STORE.invalidate(code)
+    assert isinstance(result, SimulationResult) and not hasattr(result, '__dict__')
+    assert result.dates.dtype == np.dtype('datetime64[D]') and len(result) == 24 and invested == 24000
+
+    wire = json.loads(serialization.dumps_bytes({'fund': result}))['fund']
+    assert wire['fund_name'] == 'Fund' and len(wire['monthly_data']) == 24
+    assert wire['monthly_data'][0] == {'date': '2019-01-03', 'invested': 1000.0,
+                                       'current_value': result.value[0], 'nav': result.nav[0]}
+    with patch.object(serialization, 'orjson', None):
+        assert json.loads(serialization.dumps_bytes({'fund': result}))['fund'] == wire
+
+    # Cumulative series encode as bare rows; combining sums the columns per date
+    portfolio = combine_by_date([cumulative, cumulative])
+    rows = json.loads(serialization.dumps_bytes(portfolio))
+    assert [row['date'] for row in rows] == [row['date'] for row in cumulative.records()]
+    assert rows[-1] == {'date': '2020-12-03', 'invested': 48000.0, 'current_value': 2 * cumulative.value[-1]}
+
+    # Nothing to simulate is still a result, encoded as no rows
+    for empty in (combine_by_date([]), sip_app.process_portfolio_cumulative({}, datetime(2019, 1, 1), datetime(2020, 12, 31))):
+        assert isinstance(empty, SimulationResult) and not empty
+        assert json.loads(serialization.dumps_bytes({'rows': empty})) == {'rows': []}
+    print("✅ Columnar simulation results verified")
+
+def test_data_generator_simulations():
+    """Test the services' SIP and step-up SIP simulations against hand-computed holdings"""
+    from utils.data_generator import simulate_sip_investment, generate_step_up_sip_data
+    
+    # Unsorted on purpose; instalments use the latest NAV on or before the 1st
+    nav_data = [{'date': '2021-01-01', 'nav': 25.0}, {'date': '2020-01-01', 'nav': 10.0},
+                {'date': '2020-02-01', 'nav': 20.0}]
+    sip = simulate_sip_investment(nav_data, 1000, '2020-01-15', '2021-01-31')
+    assert len(sip) == 13
+    assert sip.records()[-1] == {'date': '2021-01-01', 'nav': 25.0, 'invested': 13000.0,
+                                 'units': 100 + 11 * 50 + 40.0, 'current_value': 690 * 25.0}
+    
+    # Steps up 10% in the second calendar year
+    step_up = generate_step_up_sip_data(nav_data, 1000, 10, '2020-01-15', '2021-01-31')
+    assert [row['sip_amount'] for row in step_up.records()] == [1000.0] * 12 + [1100.0]
+    assert step_up.records()[-1]['units'] == 690 + 4.0 and step_up.records()[-1]['invested'] == 13100.0
+    
+    for empty in (simulate_sip_investment([], 1000, '2020-01-15', '2021-01-31'),
+                  generate_step_up_sip_data([], 1000, 10, '2020-01-15', '2021-01-31')):
+        assert len(empty) == 0 and empty.records() == []
+    print("✅ Data generator simulations verified")
+
+def test_strategy_compare_runs_every_plan_over_one_history(client):
+    """Test lumpsum, SIP, STP and value averaging share process_fund's schedule and valuation"""
+    import backend.app as sip_app
+    from utils.strategies import compare_strategies, parse_plans
+
+    target, source = '990501', '990502'
+    for code in (target, source):
+        NAV_STORE.put(code, synthetic_nav_frame(code, '2017-01-01', '2023-12-29'))
+    body = {'scheme_code': target, 'source_scheme_code': source, 'start_date': '2018-01-01',
+            'end_date': '2022-12-31', 'sip_amount': 10000}
+    try:
+        response = client.post('/api/strategy-compare', json=body)
+        simulated = client.post('/api/simulate', json={
+            'funds': [{'fund_name': 'Fund', 'scheme_code': target, 'sip_amount': 10000}],
+            'start_date': body['start_date'], 'end_date': body['end_date']}).get_json()['data']['funds'][0]
+        missing_source = client.post('/api/strategy-compare', json=dict(body, source_scheme_code=None,
+                                                                        strategies=['stp']))
+        unknown = client.post('/api/strategy-compare', json=dict(body, strategies=[{'type': 'martingale'}]))
+
+        start, end = datetime(2018, 1, 1), datetime(2022, 12, 31)
+        series = sip_app.load_nav_series(target, start, end)
+        plans = parse_plans([{'type': 'value_averaging', 'allow_sell': True, 'name': 'va'}, 'stp'],
+                            {'monthly_target': 10000, 'amount': 600000})
+        va, stp = compare_strategies(plans, series, start, end, sip_app.load_nav_series(source, start, end))
+    finally:
+        NAV_STORE.invalidate(target)
+        NAV_STORE.invalidate(source)
+
+    assert response.status_code == 200
+    data = response.get_json()['data']
+    plans_by_type = {plan['type']: plan for plan in data['strategies']}
+    assert set(plans_by_type) == {'lumpsum', 'sip', 'value_averaging', 'stp'} and data['period']['instalments'] == 60
+
+    # The SIP plan is exactly what /api/simulate reports for the fund
+    sip = plans_by_type['sip']
+    assert (sip['invested'], sip['current_value'], sip['xirr']) == (
+        simulated['invested'], simulated['current_value'], simulated['xirr'])
+    assert [row['date'] for row in sip['monthly_data']] == [row['date'] for row in simulated['monthly_data']]
+
+    # Lumpsum and STP invest the same budget once; transfers between the funds are not cash flows
+    assert plans_by_type['lumpsum']['invested'] == plans_by_type['stp']['invested'] == 600000
+    assert [row['amount'] for row in plans_by_type['stp']['monthly_data'][:2]] == [600000, 0]
+    assert stp.total_units[11] == pytest.approx(stp.total_units[-1]) and stp.total_units[10] < stp.total_units[11]
+
+    # Value averaging tracks its target path, selling when the fund runs ahead of it
+    assert va.value == pytest.approx(10000 * np.arange(1, 61))
+    assert (va.amount < 0).any()
+
+    assert missing_source.status_code == 400 and 'source fund' in missing_source.get_json()['error']
+    assert unknown.status_code == 400
+    print("✅ Strategy comparison verified")
+
+def test_asgi_conditional_get(monkeypatch):
+    """Test the native ASGI search and fund info routes answer revalidations with 304"""
+    import backend.app as sip_app
+
+    mfapi = MFAPIProvider()
+    mfapi.store_search_index([{'schemeCode': 300, 'schemeName': 'Gamma Index Fund'}])
+    monkeypatch.setattr(sip_app, 'FUND_DATA_PROVIDER', HybridDataProvider(providers=[mfapi]))
+    code = '149961'
+    NAV_STORE.put(code, synthetic_nav_frame(code, '2015-01-01', '2023-12-29'))
+
+    async def scenario(client):
+        search = await client.get('/api/search-funds?q=gamma')
+        again = await client.get('/api/search-funds?q=gamma', headers={'If-None-Match': search.headers['etag']})
+        first = await client.get(f'/api/fund-info/{code}?window=1y')
+        info = await client.get(f'/api/fund-info/{code}?window=1y', headers={'If-None-Match': first.headers['etag']})
+        return search, again, info
+
+    try:
+        search, again, info = _run_asgi(scenario)
+    finally:
+        NAV_STORE.invalidate(code)
+    assert search.status_code == 200 and search.json()['total_results'] == 1
+    assert again.status_code == 304 and info.status_code == 304
+    assert info.headers['cache-control'] == sip_app.FUND_INFO_CACHE_CONTROL
+    print("✅ ASGI conditional GETs verified")
+
 def run_comprehensive_tests():
     """Run all tests and provide summary"""
     print("🚀 Starting Comprehensive SIP Simulator Tests")